@@ -0,0 +1,113 @@
+"""
+Latency of `get_last` lookups as the history of expired codes grows,
+and after it is purged in batches by `delete_expired`, over a seeded `auth_code`.
+
+The rows are seeded into a temporary `auth_code`, that shadows the real one
+for the benchmark connection only, so nothing is written to the database.
+
+    python -m benchmarks.code_last_lookup <database url> [users] [number]
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from config import settings
+from models.codes import Code
+from repo import CodeRepo
+from services.codes.types import CodeTypeEnum
+
+
+# expired codes added per user and code type on every step
+HISTORY_STEPS = (0, 1, 10, 100)
+RETENTION = timedelta(days=1)
+
+SEED = """
+INSERT INTO auth_code (user_id, code, type, created_at)
+SELECT u, :code, t, now() - CAST(:age AS interval) - make_interval(mins => h)
+FROM generate_series(1, :users) AS u,
+    unnest(ARRAY['EMAIL_CONFIRM', 'RESET_PASSWORD']) AS t,
+    generate_series(1, :history) AS h
+"""
+
+
+async def _measure(connection: AsyncConnection, statement, number: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(number):
+        (await connection.execute(statement)).first()
+    return (time.perf_counter() - started_at) / number * 1e3
+
+
+async def _seed(
+    connection: AsyncConnection, users: int, history: int, age: timedelta
+) -> None:
+    await connection.execute(
+        text(SEED),
+        {
+            "code": "1" * settings.CONFIRMATION_CODE_LENGTH,
+            "users": users,
+            "history": history,
+            "age": age,
+        },
+    )
+    await connection.execute(text("ANALYZE auth_code"))
+
+
+async def _count(connection: AsyncConnection) -> int:
+    return (await connection.execute(text("SELECT count(*) FROM auth_code"))).scalar()
+
+
+async def _purge(connection: AsyncConnection, repo: CodeRepo) -> float:
+    created_before = datetime.now(tz=timezone.utc) - RETENTION
+    started_at = time.perf_counter()
+    # the connection runs the statements of the repo as a session would
+    while await repo.delete_expired(connection, created_before, 500) == 500:
+        pass
+    await connection.execute(text("ANALYZE auth_code"))
+    return time.perf_counter() - started_at
+
+
+async def main(url: str, users: int, number: int) -> None:
+    engine = create_async_engine(url)
+    async with engine.connect() as connection:
+        await connection.execute(
+            text("CREATE TEMP TABLE auth_code (LIKE public.auth_code INCLUDING ALL)")
+        )
+        # ids are not taken from the sequence of the real table
+        await connection.execute(text("CREATE TEMP SEQUENCE auth_code_id_seq"))
+        await connection.execute(
+            text(
+                "ALTER TABLE auth_code ALTER COLUMN id "
+                "SET DEFAULT nextval('pg_temp.auth_code_id_seq')"
+            )
+        )
+        # the active codes, `get_last` finds
+        await _seed(connection, users, 1, timedelta())
+
+        repo = CodeRepo()
+        statement = repo._last(select(Code), users // 2, CodeTypeEnum.EMAIL_CONFIRM)
+        print(f"{'rows':>12}{'get_last, ms':>16}{'purge, s':>12}{'purged, ms':>14}")
+        for history in HISTORY_STEPS:
+            if history:
+                await _seed(connection, users, history, RETENTION)
+            rows = await _count(connection)
+            before_ms = await _measure(connection, statement, number)
+            purge_s = await _purge(connection, repo)
+            after_ms = await _measure(connection, statement, number)
+            print(f"{rows:>12}{before_ms:>16.3f}{purge_s:>12.3f}{after_ms:>14.3f}")
+        await connection.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            sys.argv[1],
+            int(sys.argv[2]) if len(sys.argv) > 2 else 10_000,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 1000,
+        )
+    )
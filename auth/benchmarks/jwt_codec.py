@@ -0,0 +1,46 @@
+"""
+Encode and decode cost of HS256 tokens with PyJWT and with `HS256Codec`.
+
+    python -m benchmarks.jwt_codec [number]
+"""
+
+import sys
+import time
+import timeit
+
+from services.jwt import HS256Codec, KeyRing, PyJWTCodec, TokenPurposeEnum
+
+
+def _measure(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main(number: int) -> None:
+    key_ring = KeyRing(
+        path="", algorithm="HS256", access_secret="s" * 64, refresh_secret="r" * 64
+    )
+    key = key_ring.signing_key(TokenPurposeEnum.ACCESS)
+    now = time.time()
+    payload = {"user": 1, "exp": now + 3600, "created_at": now}
+    pyjwt, fast = PyJWTCodec(), HS256Codec(fallback=PyJWTCodec())
+    token = pyjwt.encode(payload, key)
+
+    print(f"{'operation':<10}{'pyjwt, us':>12}{'hs256, us':>12}")
+    for operation, (raw, prepared) in {
+        "encode": (
+            lambda: pyjwt.encode(payload, key),
+            lambda: fast.encode(payload, key),
+        ),
+        "decode": (
+            lambda: pyjwt.decode(token, key),
+            lambda: fast.decode(token, key),
+        ),
+    }.items():
+        print(
+            f"{operation:<10}"
+            f"{_measure(raw, number):>12.1f}{_measure(prepared, number):>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,109 @@
+"""
+Encode and decode cost with raw keys passed to PyJWT on every call
+and with the keys prepared once by `KeyRing`.
+
+    python -m benchmarks.jwt_key_ring [number]
+"""
+
+import json
+import sys
+import tempfile
+import timeit
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, ec, ed25519
+
+from services.jwt import KeyRing, TokenPurposeEnum
+
+
+PAYLOAD = {"user": 1, "exp": 2**40, "created_at": 0}
+
+
+def _pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def _public_pem(private_key) -> str:
+    return (
+        private_key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+
+
+def _raw_keys():
+    secret = "s" * 32
+    keys = {"HS256": (secret, secret)}
+    for algorithm, private_key in (
+        ("RS256", rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+        ("ES256", ec.generate_private_key(ec.SECP256R1())),
+        ("EdDSA", ed25519.Ed25519PrivateKey.generate()),
+    ):
+        keys[algorithm] = (_pem(private_key), _public_pem(private_key))
+    return keys
+
+
+def _key_ring(algorithm: str, signing_key: str, verifying_key: str) -> KeyRing:
+    item = {"kid": algorithm, "algorithm": algorithm}
+    if algorithm == "HS256":
+        item["secret"] = signing_key
+    else:
+        item.update(private_key=signing_key, public_key=verifying_key)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as file:
+        json.dump({"access": {"signing_kid": algorithm, "keys": [item]}}, file)
+    return KeyRing(
+        path=file.name, algorithm="HS256", access_secret="", refresh_secret=""
+    )
+
+
+def _measure(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main(number: int) -> None:
+    print(f"{'algorithm':<10}{'operation':<10}{'raw, us':>12}{'key ring, us':>15}")
+    for algorithm, (signing_key, verifying_key) in _raw_keys().items():
+        key_ring = _key_ring(algorithm, signing_key, verifying_key)
+        token = jwt.encode(
+            PAYLOAD, signing_key, algorithm=algorithm, headers={"kid": algorithm}
+        )
+
+        def encode_raw():
+            jwt.encode(PAYLOAD, signing_key, algorithm=algorithm)
+
+        def encode_key_ring():
+            key = key_ring.signing_key(TokenPurposeEnum.ACCESS)
+            jwt.encode(
+                PAYLOAD,
+                key.signing_key,
+                algorithm=key.algorithm,
+                headers={"kid": key.kid},
+            )
+
+        def decode_raw():
+            jwt.decode(token, verifying_key, algorithms=[algorithm])
+
+        def decode_key_ring():
+            key = key_ring.token_verifying_key(TokenPurposeEnum.ACCESS, token)
+            jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+        for operation, raw, prepared in (
+            ("encode", encode_raw, encode_key_ring),
+            ("decode", decode_raw, decode_key_ring),
+        ):
+            print(
+                f"{algorithm:<10}{operation:<10}"
+                f"{_measure(raw, number):>12.1f}{_measure(prepared, number):>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
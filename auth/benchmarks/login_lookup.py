@@ -0,0 +1,79 @@
+"""
+Latency of `get_by_login` lookups with `OR` across both columns
+and with the lookups split by the login shape, over a seeded `auth_user`.
+
+The rows are seeded into a temporary `auth_user`, that shadows the real one
+for the benchmark connection only, so nothing is written to the database.
+
+    python -m benchmarks.login_lookup <database url> [rows] [number]
+"""
+
+import asyncio
+import sys
+import time
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from models.users import User
+from repo import UserRepo
+
+
+SEED = """
+INSERT INTO auth_user (id, email, username, password, is_active, email_confirmed)
+SELECT i, 'user' || i || '@example.com', 'User' || i, 'password', true, true
+FROM generate_series(1, :rows) AS i
+"""
+
+
+async def _measure(connection: AsyncConnection, statement, number: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(number):
+        (await connection.execute(statement)).first()
+    return (time.perf_counter() - started_at) / number * 1e3
+
+
+async def main(url: str, rows: int, number: int) -> None:
+    engine = create_async_engine(url)
+    async with engine.connect() as connection:
+        await connection.execute(
+            text("CREATE TEMP TABLE auth_user (LIKE public.auth_user INCLUDING ALL)")
+        )
+        await connection.execute(text(SEED), {"rows": rows})
+        await connection.execute(text("ANALYZE auth_user"))
+
+        qs = select(User).filter(User.email_confirmed == True)  # noqa: E712
+        split, union = UserRepo(username_characters=""), UserRepo()
+        login = rows // 2
+        print(f"{'login':<10}{'or, ms':>10}{'split, ms':>12}{'union, ms':>12}")
+        for name, value in {
+            "email": f"USER{login}@example.com",
+            "username": f"user{login}",
+        }.items():
+            by_or = qs.filter(
+                or_(
+                    split._lower_equals(User.username, value),
+                    split._lower_equals(User.email, value),
+                )
+            )
+            or_ms, split_ms, union_ms = [
+                await _measure(connection, statement, number)
+                for statement in (
+                    by_or,
+                    split._login_lookup(qs, value),
+                    union._login_lookup(qs, value),
+                )
+            ]
+            print(f"{name:<10}{or_ms:>10.3f}{split_ms:>12.3f}{union_ms:>12.3f}")
+        await connection.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            sys.argv[1],
+            int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 1000,
+        )
+    )
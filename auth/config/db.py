@@ -1,65 +1,419 @@
 import logging
 import asyncio
-from contextlib import asynccontextmanager, AbstractAsyncContextManager
-from typing import Callable
+import time
+from contextlib import asynccontextmanager, AbstractAsyncContextManager, AsyncExitStack
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Hashable, Sequence
 
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     create_async_engine,
     async_sessionmaker,
     async_scoped_session,
 )
+from sqlalchemy import text
 from sqlalchemy.orm import (
+    Session,
     declarative_base,
 )
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import (
+    DBAPIError,
+    InterfaceError,
+    OperationalError,
+    SQLAlchemyError,
+    TimeoutError as PoolTimeoutError,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from utils.metrics import registry
 
 
 logger = logging.getLogger("orm")
 Base = declarative_base()
 
 
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_total: float = 0
+    wait_max: float = 0
+
+
+@dataclass
+class SessionStats:
+    sessions: int = 0
+    commits: int = 0
+    rollbacks: int = 0
+    lifetime_total: float = 0
+    lifetime_max: float = 0
+
+    def add(self, lifetime: float) -> None:
+        self.sessions += 1
+        self.lifetime_total += lifetime
+        self.lifetime_max = max(self.lifetime_max, lifetime)
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        `lifetime_max` is the longest lifetime since the previous call.
+        """
+        stats = asdict(self)
+        self.lifetime_max = 0
+        return stats
+
+
+DebugHook = Callable[[str, AsyncSession], None]
+
+
+def log_session_event(event: str, session: AsyncSession) -> None:
+    logger.debug(f"Session {event}", extra={"session_id": id(session)})
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool, that measures how long the checkouts wait for a connection.
+
+    The waiting time includes opening a new connection, when the pool has none.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - started_at
+            self.stats.checkouts += 1
+            self.stats.wait_total += wait
+            self.stats.wait_max = max(self.stats.wait_max, wait)
+
+
+@dataclass
+class ReplicaStats:
+    sessions: int = 0
+    ejections: int = 0
+
+
+class ReplicaRouter:
+    """
+    Round-robin over the replicas, that are not ejected.
+
+    A replica, that failed to serve a session because of a connection error,
+    is ejected for `ejection_time` seconds and is tried again after it.
+    """
+
+    def __init__(self, engines: Sequence[AsyncEngine], ejection_time: float) -> None:
+        self.engines = list(engines)
+        self.ejection_time = ejection_time
+        self.stats = [ReplicaStats() for _ in self.engines]
+        self._ejected_until = [0.0] * len(self.engines)
+        self._next = 0
+
+    def choose(self) -> AsyncEngine | None:
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            index = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            if self._ejected_until[index] <= now:
+                self.stats[index].sessions += 1
+                return self.engines[index]
+        return None
+
+    def eject(self, engine: AsyncEngine) -> None:
+        index = self.engines.index(engine)
+        self._ejected_until[index] = time.monotonic() + self.ejection_time
+        self.stats[index].ejections += 1
+        logger.warning(
+            "Replica is ejected", extra={"replica": engine.url.render_as_string()}
+        )
+
+    def healthy(self) -> int:
+        now = time.monotonic()
+        return sum(until <= now for until in self._ejected_until)
+
+    def as_dict(self) -> Dict[str, float]:
+        stats = {"healthy": self.healthy()}
+        for index, replica_stats in enumerate(self.stats):
+            for name, value in asdict(replica_stats).items():
+                stats[f"{index}.{name}"] = value
+        return stats
+
+
+class StalenessGuard:
+    """
+    Keys (user ids), that were written in the last `window` seconds,
+    their reads go to the primary, until the replicas have caught up.
+
+    Only the writes of this instance are known to it.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self.primary_reads = 0
+        self._written: Dict[Hashable, float] = {}
+        self._prune_at = 1000
+
+    def written(self, keys: Sequence[Hashable]) -> None:
+        now = time.monotonic()
+        if len(self._written) > self._prune_at:
+            self._written = {
+                key: until for key, until in self._written.items() if until > now
+            }
+            self._prune_at = max(1000, len(self._written) * 2)
+        for key in keys:
+            self._written[key] = now + self.window
+
+    def is_stale(self, keys: Sequence[Hashable]) -> bool:
+        now = time.monotonic()
+        return any(self._written.get(key, 0) > now for key in keys)
+
+
+class RoutingSession(Session):
+    """
+    Runs the statements of a replica session on its replica,
+    unless it was pinned to the primary by `mark_read`.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica: AsyncEngine | None = self.info.get("replica")
+        if replica is not None and not self.info.get("primary"):
+            return replica.sync_engine
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+def mark_read(session: AsyncSession, *keys: Hashable) -> None:
+    """
+    Declares the keys, the next statements of the session read,
+    a replica session reads the recently written ones from the primary.
+
+    Only the statements after the call are routed to the primary,
+    so it must precede the first statement, that reads the keys.
+    A session, that has already run statements on its replica,
+    takes a second connection, to the primary, for the rest of them.
+    """
+    guard: StalenessGuard | None = session.info.get("staleness_guard")
+    if guard is not None and "replica" in session.info and guard.is_stale(keys):
+        guard.primary_reads += 1
+        session.info["primary"] = True
+
+
+def mark_written(session: AsyncSession, *keys: Hashable) -> None:
+    """
+    Declares the keys, the session writes, they are known to be written,
+    when the session is committed.
+    """
+    session.info.setdefault("written", set()).update(keys)
+
+
+def is_connection_error(e: Exception) -> bool:
+    return isinstance(e, (OSError, InterfaceError, OperationalError)) or (
+        isinstance(e, DBAPIError) and e.connection_invalidated
+    )
+
+
 class Database:
-    def __init__(self, db_url: str) -> None:
-        self._engine = create_async_engine(db_url, future=True, echo=True)
+    def __init__(
+        self,
+        db_url: str,
+        *,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_pre_ping: bool = False,
+        pool_recycle: int = -1,
+        prepared_statement_cache_size: int = 100,
+        echo: bool = False,
+        debug_hook: DebugHook | None = None,
+        replica_urls: Sequence[str] = (),
+        replica_ejection_time: float = 30,
+        staleness_window: float = 5,
+        name: str = "db",
+    ) -> None:
+        engine_kwargs = dict(
+            future=True,
+            echo=echo,
+            poolclass=TimedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_pre_ping=pool_pre_ping,
+            pool_recycle=pool_recycle,
+            connect_args={
+                "prepared_statement_cache_size": prepared_statement_cache_size
+            },
+        )
+        self._engine = create_async_engine(db_url, **engine_kwargs)
         self._session_factory = async_scoped_session(
             async_sessionmaker(
                 class_=AsyncSession,
+                sync_session_class=RoutingSession,
                 autocommit=False,
                 autoflush=True,
                 bind=self._engine,
             ),
             scopefunc=asyncio.current_task,
         )
+        self._read_only_session_factory = async_scoped_session(
+            async_sessionmaker(
+                class_=AsyncSession,
+                sync_session_class=RoutingSession,
+                autoflush=False,
+                bind=self._engine.execution_options(isolation_level="AUTOCOMMIT"),
+            ),
+            scopefunc=asyncio.current_task,
+        )
+        self.replica_router = ReplicaRouter(
+            [
+                create_async_engine(url, **engine_kwargs).execution_options(
+                    isolation_level="AUTOCOMMIT"
+                )
+                for url in replica_urls
+            ],
+            ejection_time=replica_ejection_time,
+        )
+        self.staleness_guard = StalenessGuard(staleness_window)
+        self.max_overflow = max_overflow
+        self.debug_hook = debug_hook
+        self._session_stats: Dict[str, SessionStats] = {}
+
+        # a second database of the same name would report instead of this one
+        registry.register(f"{name}_pool", self.pool_stats, unique=True)
+        if self.replica_router.engines:
+            registry.register(f"{name}_replicas", self.replica_stats, unique=True)
 
     def create_database(self) -> None:
         Base.metadata.create_all(self._engine)
 
+    async def warm_up(self, connections: int | None = None) -> None:
+        """
+        Opens `connections` (the pool size by default) connections at once
+        to the primary and every replica and returns them to the pools,
+        so the first requests do not pay for the connection setup.
+        """
+        connections = self._engine.pool.size() if connections is None else connections
+        async with AsyncExitStack() as stack:
+
+            async def checkout(engine: AsyncEngine) -> None:
+                connection = await stack.enter_async_context(engine.connect())
+                await connection.execute(text("SELECT 1"))
+
+            await asyncio.gather(
+                *(
+                    checkout(engine)
+                    for engine in (self._engine, *self.replica_router.engines)
+                    for _ in range(connections)
+                )
+            )
+
+    def pool_stats(self) -> Dict[str, float]:
+        """
+        Cumulative checkouts counters and the current pool usage,
+        `wait_max` is the longest wait since the previous call.
+        """
+        pool: TimedQueuePool = self._engine.pool
+        # a negative max overflow is not limited, the pool size is the capacity then
+        capacity = pool.size() + max(self.max_overflow, 0)
+        stats = {
+            "checkouts": pool.stats.checkouts,
+            "timeouts": pool.stats.timeouts,
+            "wait_total": pool.stats.wait_total,
+            "wait_max": pool.stats.wait_max,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "saturation": pool.checkedout() / capacity if capacity else 0,
+        }
+        pool.stats.wait_max = 0
+        return stats
+
+    def replica_stats(self) -> Dict[str, float]:
+        return {
+            **self.replica_router.as_dict(),
+            "primary_reads": self.staleness_guard.primary_reads,
+        }
+
     @asynccontextmanager
-    async def session(self) -> Callable[..., AbstractAsyncContextManager[AsyncSession]]:
-        session: AsyncSession = self._session_factory()
+    async def session(
+        self, *, read_only: bool = False, replica: bool = False, name: str = "other"
+    ) -> Callable[..., AbstractAsyncContextManager[AsyncSession]]:
+        """
+        Session, that is committed on exit, unless an exception is raised.
+
+        The connection is checked out on the first statement only,
+        so a session, that was not used, costs no round trips.
+        A `read_only` session runs on an autocommit connection
+        and is never committed, it saves BEGIN and COMMIT round trips.
+        Lifetime and commits are counted per `name` (the RPC name).
+
+        A `replica` session is read only and runs on one of the replicas,
+        unless none is configured or healthy, or it reads keys
+        written recently (see `mark_read`).
+        """
+        read_only = read_only or replica
+        session_factory = (
+            self._read_only_session_factory if read_only else self._session_factory
+        )
+        session: AsyncSession = session_factory()
+        session.info["staleness_guard"] = self.staleness_guard
+        replica_engine = self.replica_router.choose() if replica else None
+        if replica_engine is not None:
+            session.info["replica"] = replica_engine
+        stats = self._get_session_stats(name)
+        started_at = time.perf_counter()
+        self._debug("open", session)
         try:
-            print("YIELDING...")
             yield session
         except Exception as e:
-            print("ROLLBACKING... ")
+            self._debug("rollback", session)
+            if (
+                replica_engine is not None
+                and not session.info.get("primary")
+                and is_connection_error(e)
+            ):
+                self.replica_router.eject(replica_engine)
             await session.rollback()
-            print("ERROR... ", str(e))
+            stats.rollbacks += 1
             logger.error(
                 f"Session rollback because of exception - {str(e)}", exc_info=e
             )
             raise
         else:
-            print("COMMITTING... ")
-            try:
-                await session.commit()
-            except SQLAlchemyError as e:
-                print("ERROR COMMITTING...", str(e))
-                await session.rollback()
-                logger.error(
-                    f"Session rollback because of exception on commit - {str(e)}",
-                    exc_info=e,
-                )
+            if not read_only and session.in_transaction():
+                self._debug("commit", session)
+                try:
+                    await session.commit()
+                    stats.commits += 1
+                    self.staleness_guard.written(session.info.get("written", ()))
+                except SQLAlchemyError as e:
+                    await session.rollback()
+                    stats.rollbacks += 1
+                    logger.error(
+                        f"Session rollback because of exception on commit - {str(e)}",
+                        exc_info=e,
+                    )
         finally:
-            print("CLOSING... ")
-            await session.close()
+            self._debug("close", session)
+            # closes the session and drops it from the registry of the task
+            await session_factory.remove()
+            stats.add(time.perf_counter() - started_at)
+
+    def session_stats(self, name: str) -> SessionStats | None:
+        return self._session_stats.get(name)
+
+    def _get_session_stats(self, name: str) -> SessionStats:
+        stats = self._session_stats.get(name)
+        if stats is None:
+            stats = self._session_stats[name] = SessionStats()
+            registry.register(f"db_sessions.{name}", stats.as_dict)
+        return stats
+
+    def _debug(self, event: str, session: AsyncSession) -> None:
+        if self.debug_hook is not None:
+            self.debug_hook(event, session)
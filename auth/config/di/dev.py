@@ -5,15 +5,19 @@ from protobufs.compiled import publisher_pb2_grpc
 from protobufs.compiled.publisher_grpc_typed import PublisherStub
 from config import settings
 from config.celery import app as _celery_app
-from config.db import Database
-from config.mail import SendEmail
+from config.db import Database, log_session_event
+from config.executors import init_executor
+from config.mail import EmailBatcher, SendEmail
+from config.outbox import Outbox, OutboxRelay
 from config.grpc import GRPCConnection
-from repo import UserRepo, CodeRepo
+from repo import UserRepo, CodeRepo, KeyValueCodeRepo, OutboxRepo
+from utils.kv import RedisKeyValueStore
 from services.registration import (
     RegisterUser,
     ConfirmRegistration,
     RepeatRegistrationCode,
     CheckRegistration,
+    SweepRegistrations,
 )
 from services.validators import (
     Validate,
@@ -27,20 +31,44 @@ from services.validators.password import get_password_required_groups
 from services.password import (
     HashPassword,
     CheckPassword,
+    AsyncHashPassword,
+    AsyncCheckPassword,
     ChangePassword,
     ResetPassword,
     ConfirmResetPassword,
 )
-from services.jwt import CreateJWTTokens, RefreshJWTTokens, RevokeJWTTokens
+from services.jwt import (
+    CreateJWTTokens,
+    RefreshJWTTokens,
+    RevokeJWTTokens,
+    KeyRing,
+    GetJWKS,
+    PyJWTCodec,
+    HS256Codec,
+)
 from services.login import LoginUser
 from services.authenticate import Authenticate
-from services.codes import CheckCode, CreateCode, SendCode
+from services.authenticate_batch import AuthenticateBatch
+from services.user_state import UserStateCache
+from services.verified_tokens import VerifiedTokenCache
+from services.revocations import RevocationEpochs, RevocationFeed, WatchRevocations
+from services.codes import CheckCode, CreateCode, PurgeCodes, SendCode
+
+
+# seconds, revocations older than this can not affect a token, that is not expired
+TOKENS_MAX_LIFETIME = (
+    max(settings.ACCESS_TOKEN_LIFETIME, settings.REFRESH_TOKEN_LIFETIME) * 60
+)
+# seconds, codes older than this can neither be checked nor delay a new one
+CODES_MAX_LIFETIME = max(
+    settings.CONFIRM_EMAIL_CODE_DURATION, settings.RESET_PASSWORD_CODE_DURATION
+)
 
 
 class Container(containers.DeclarativeContainer):
     wiring_config = containers.WiringConfiguration(
         packages=["grpc_services"],
-        modules=["config.celery", "grpc_services.auth"],
+        modules=["config.celery", "grpc_services.auth", "utils.decorators"],
     )
 
     celery_app: Celery = providers.Object(_celery_app)
@@ -53,20 +81,143 @@ class Container(containers.DeclarativeContainer):
     )
     publisher_grpc = providers.Singleton(PublisherStub, connection=_publisher_grpc)
 
-    db = providers.Resource(Database, db_url=settings.DATABASE_URL)
+    db = providers.Resource(
+        Database,
+        db_url=settings.DATABASE_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        prepared_statement_cache_size=settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        echo=settings.DB_ECHO,
+        debug_hook=log_session_event if settings.DB_DEBUG else None,
+        replica_urls=settings.DB_REPLICA_URLS,
+        replica_ejection_time=settings.DB_REPLICA_EJECTION_TIME,
+        staleness_window=settings.DB_STALENESS_WINDOW,
+    )
+
+    _outbox_repo = providers.Factory(OutboxRepo)
+    outbox = providers.Singleton(Outbox, repo=_outbox_repo)
+    email_batcher = providers.Singleton(
+        EmailBatcher,
+        task=settings.EMAIL_BATCH_TASK,
+        max_size=settings.EMAIL_BATCH_MAX_SIZE,
+    )
+    outbox_relay = providers.Singleton(
+        OutboxRelay,
+        db=db,
+        repo=_outbox_repo,
+        celery_app=celery_app,
+        combiners=(
+            providers.List(email_batcher)
+            if settings.EMAIL_BATCH_MAX_SIZE > 1 and settings.EMAIL_BATCH_TASK
+            else providers.List()
+        ),
+        batch_size=settings.OUTBOX_RELAY_BATCH_SIZE,
+        interval=settings.OUTBOX_RELAY_INTERVAL,
+        max_backoff=settings.OUTBOX_RELAY_MAX_BACKOFF,
+        max_attempts=settings.OUTBOX_RELAY_MAX_ATTEMPTS,
+    )
+
+    send_email = providers.Singleton(SendEmail, outbox=outbox)
+
+    user_repo = providers.Factory(
+        UserRepo, username_characters=settings.USERNAME_ALLOWED_CHARACTERS
+    )
+
+    key_value_store = (
+        providers.Singleton(RedisKeyValueStore, url=settings.REDIS_URL)
+        if settings.REDIS_URL
+        else providers.Object(None)
+    )
 
-    send_email = providers.Singleton(SendEmail, celery_app=celery_app)
+    _database_code_repo = providers.Factory(CodeRepo)
+    _code_repo = (
+        providers.Singleton(
+            KeyValueCodeRepo,
+            store=key_value_store,
+            fallback=(
+                _database_code_repo
+                if settings.CODE_STORE_DATABASE_FALLBACK
+                else providers.Object(None)
+            ),
+        )
+        if settings.CODE_STORE == "key_value"
+        else _database_code_repo
+    )
 
-    user_repo = providers.Factory(UserRepo)
-    _code_repo = providers.Factory(CodeRepo)
+    user_state_cache = providers.Singleton(
+        UserStateCache,
+        max_size=settings.USER_STATE_CACHE_MAX_SIZE,
+        ttl=settings.USER_STATE_CACHE_TTL,
+        store=key_value_store,
+        shared_ttl=settings.USER_STATE_SHARED_CACHE_TTL,
+    )
+    revocation_feed = providers.Singleton(
+        RevocationFeed, max_queue_size=settings.REVOCATIONS_WATCH_QUEUE_SIZE
+    )
+    revocation_epochs = providers.Singleton(
+        RevocationEpochs,
+        repo=user_repo,
+        feed=revocation_feed,
+        enabled=settings.REVOCATION_EPOCHS_ENABLED,
+        window=TOKENS_MAX_LIFETIME,
+        sync_interval=settings.REVOCATION_EPOCHS_SYNC_INTERVAL,
+    )
+    watch_revocations = providers.Singleton(
+        WatchRevocations,
+        feed=revocation_feed,
+        repo=user_repo,
+        window=TOKENS_MAX_LIFETIME,
+    )
+    verified_token_cache = providers.Singleton(
+        VerifiedTokenCache, max_size=settings.VERIFIED_TOKEN_CACHE_MAX_SIZE
+    )
+    key_ring = providers.Singleton(
+        KeyRing,
+        path=settings.JWT_KEYS_PATH,
+        algorithm=settings.JWT_ALGORITHM,
+        access_secret=settings.ACCESS_SECRET_KEY,
+        refresh_secret=settings.REFRESH_SECRET_KEY,
+        reload_interval=settings.JWT_KEYS_RELOAD_INTERVAL,
+    )
+    get_jwks = providers.Singleton(GetJWKS, key_ring=key_ring)
+    _pyjwt_codec = providers.Singleton(PyJWTCodec)
+    jwt_codec = providers.Selector(
+        providers.Object(settings.JWT_CODEC),
+        pyjwt=_pyjwt_codec,
+        hs256=providers.Singleton(HS256Codec, fallback=_pyjwt_codec),
+    )
 
-    authenticate = providers.Singleton(Authenticate, repo=user_repo)
+    authenticate = providers.Singleton(
+        Authenticate,
+        repo=user_repo,
+        user_state_cache=user_state_cache,
+        key_ring=key_ring,
+        codec=jwt_codec,
+        verified_token_cache=verified_token_cache,
+        revocation_epochs=revocation_epochs,
+    )
+    authenticate_batch = providers.Singleton(
+        AuthenticateBatch,
+        authenticate=authenticate,
+        user_state_cache=user_state_cache,
+        repo=user_repo,
+    )
 
-    create_jwt_tokens = providers.Singleton(CreateJWTTokens)
+    create_jwt_tokens = providers.Singleton(
+        CreateJWTTokens, key_ring=key_ring, codec=jwt_codec
+    )
     refresh_jwt_tokens = providers.Singleton(
         RefreshJWTTokens, authenticate=authenticate, create_jwt_tokens=create_jwt_tokens
     )
-    revoke_jwt_tokens = providers.Singleton(RevokeJWTTokens, repo=user_repo)
+    revoke_jwt_tokens = providers.Singleton(
+        RevokeJWTTokens,
+        repo=user_repo,
+        user_state_cache=user_state_cache,
+        revocation_epochs=revocation_epochs,
+    )
 
     username_length_validator = providers.Singleton(
         UsernameLengthValidator,
@@ -102,21 +253,41 @@ class Container(containers.DeclarativeContainer):
         password_required_characters_validator,
     )
 
+    password_hashing_executor = providers.Resource(
+        init_executor,
+        kind=settings.PASSWORD_HASHING_EXECUTOR,
+        max_workers=settings.PASSWORD_HASHING_WORKERS,
+    )
     hash_password = providers.Singleton(HashPassword)
     check_password = providers.Singleton(CheckPassword)
+    async_hash_password = providers.Singleton(
+        AsyncHashPassword, executor=password_hashing_executor
+    )
+    async_check_password = providers.Singleton(
+        AsyncCheckPassword, executor=password_hashing_executor
+    )
 
     send_code = providers.Singleton(SendCode, send_email=send_email)
     create_code = providers.Singleton(CreateCode, send_code=send_code, repo=_code_repo)
     check_code = providers.Singleton(CheckCode, repo=_code_repo)
+    purge_codes = providers.Singleton(
+        PurgeCodes,
+        db=db,
+        # the codes, that are left in the database, after the store was switched
+        repo=_database_code_repo,
+        retention=CODES_MAX_LIFETIME,
+        batch_size=settings.CODE_PURGE_BATCH_SIZE,
+        interval=settings.CODE_PURGE_INTERVAL,
+    )
 
     register_user = providers.Singleton(
         RegisterUser,
-        create_code=create_code,
+        send_code=send_code,
         validate_username=validate_username,
         validate_password=validate_password,
-        hash_password=hash_password,
+        hash_password=async_hash_password,
         repo=user_repo,
-        celery_app=celery_app,
+        code_repo=_code_repo,
     )
     repeat_registration_code = providers.Singleton(
         RepeatRegistrationCode, create_code=create_code, repo=user_repo
@@ -125,23 +296,36 @@ class Container(containers.DeclarativeContainer):
         ConfirmRegistration,
         create_jwt_tokens=create_jwt_tokens,
         check_code=check_code,
+        user_state_cache=user_state_cache,
+        repo=user_repo,
+    )
+    check_registration = providers.Singleton(
+        CheckRegistration, repo=user_repo, user_state_cache=user_state_cache
+    )
+    sweep_registrations = providers.Singleton(
+        SweepRegistrations,
+        db=db,
         repo=user_repo,
+        user_state_cache=user_state_cache,
+        delay=settings.CONFIRM_EMAIL_CHECK_DELAY,
+        batch_size=settings.REGISTRATION_SWEEP_BATCH_SIZE,
+        interval=settings.REGISTRATION_SWEEP_INTERVAL,
     )
-    check_registration = providers.Singleton(CheckRegistration, repo=user_repo)
 
     login_user = providers.Singleton(
         LoginUser,
         create_jwt_tokens=create_jwt_tokens,
-        check_password=check_password,
+        check_password=async_check_password,
         repo=user_repo,
     )
 
     change_password = providers.Singleton(
         ChangePassword,
-        check_password=check_password,
-        hash_password=hash_password,
+        check_password=async_check_password,
+        hash_password=async_hash_password,
         validate_password=validate_password,
         revoke_jwt_tokens=revoke_jwt_tokens,
+        user_state_cache=user_state_cache,
         repo=user_repo,
     )
     reset_password = providers.Singleton(
@@ -151,7 +335,7 @@ class Container(containers.DeclarativeContainer):
         ConfirmResetPassword,
         check_code=check_code,
         validate_password=validate_password,
-        hash_password=hash_password,
-        check_password=check_password,
+        hash_password=async_hash_password,
+        check_password=async_check_password,
         repo=user_repo,
     )
@@ -0,0 +1,33 @@
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator
+
+
+PROCESS = "process"
+THREAD = "thread"
+
+
+def init_executor(kind: str, max_workers: int) -> Iterator[Executor]:
+    """
+    Executor for CPU-bound work, that must not be done inside the event loop.
+
+    Processes are started with `spawn`, because forking
+    a process with running gRPC server is not safe,
+    a spawned worker imports the main module again (as `__mp_main__`),
+    so it starts with the imports of the server.
+    Thread executor is fine only for code, that releases the GIL (e.g. bcrypt).
+    """
+    max_workers = max_workers or None
+    if kind == THREAD:
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="cpu-bound"
+        )
+    elif kind == PROCESS:
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    else:
+        raise ValueError(f"Unknown executor kind - {kind}")
+
+    yield executor
+    executor.shutdown(wait=False, cancel_futures=True)
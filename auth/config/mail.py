@@ -1,13 +1,25 @@
+import hashlib
 import logging
 from dataclasses import dataclass, asdict
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List, Sequence, Tuple
 
-from celery import Celery
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .outbox import (
+    IOutbox,
+    IOutboxCombiner,
+    OutboxEntry,
+    OutboxMessageEntry,
+    OutboxTaskEntry,
+)
+from utils.metrics import registry
 
 
 logger = logging.getLogger("mail")
 
+SEND_EMAIL_TASK = "config.celery.send_email"
+
 
 @dataclass
 class SendEmailEntry:
@@ -16,19 +28,112 @@ class SendEmailEntry:
     message: str = ""
 
 
+@dataclass
+class BatchedEmailEntry(SendEmailEntry):
+    """
+    An email of a batch task, the worker sends and deduplicates each on its own.
+    """
+
+    dedup_key: str = ""
+
+
 class ISendEmail(ABC):
     @abstractmethod
-    def __call__(self, entry: SendEmailEntry) -> None: ...
+    async def __call__(self, session: AsyncSession, entry: SendEmailEntry) -> None: ...
 
 
 class SendEmail(ISendEmail):
-    def __init__(self, celery_app: Celery):
-        self.celery_app = celery_app
+    def __init__(self, outbox: IOutbox):
+        self.outbox = outbox
+
+    async def __call__(self, session: AsyncSession, entry: SendEmailEntry) -> None:
+        await self._add_task(session, entry)
+
+    async def _add_task(self, session: AsyncSession, entry: SendEmailEntry) -> None:
+        await self.outbox(
+            session,
+            OutboxEntry(task=SEND_EMAIL_TASK, kwargs={"entry_dict": asdict(entry)}),
+        )
+
+
+@dataclass
+class EmailBatchStats:
+    batches: int = 0
+    emails: int = 0
+    max_batch_size: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        `max_batch_size` is the largest batch since the previous call.
+        """
+        stats = asdict(self)
+        self.max_batch_size = 0
+        return stats
+
+
+class EmailBatcher(IOutboxCombiner):
+    """
+    Combines the emails of an outbox batch with the same subject
+    into `task` tasks of up to `max_size` emails, their `entries` are
+    `BatchedEmailEntry` dicts with the recipients, message and dedup key of each.
+
+    The emails are collected over the poll interval of the relay,
+    delayed ones (with ETA) and single emails of a subject are left as they are.
+    `task` belongs to the email worker, that is not a part of this service,
+    a published batch is done for the relay, so the worker retries the emails,
+    that failed, itself and skips the sent ones by their dedup keys.
+    """
+
+    def __init__(self, task: str, max_size: int = 100) -> None:
+        self.task = task
+        self.max_size = max_size
+        self.stats = EmailBatchStats()
+
+        registry.register("email_batches", self.stats.as_dict)
+
+    def combine(
+        self, messages: Sequence[OutboxMessageEntry]
+    ) -> Tuple[List[OutboxTaskEntry], List[OutboxMessageEntry]]:
+        subjects: Dict[str, List[OutboxMessageEntry]] = {}
+        rest = []
+        for message in messages:
+            if message.task == SEND_EMAIL_TASK and message.eta is None:
+                subject = message.kwargs["entry_dict"]["subject"]
+                subjects.setdefault(subject, []).append(message)
+            else:
+                rest.append(message)
 
-    def __call__(self, entry: SendEmailEntry) -> None:
-        self._add_task(entry)
+        tasks = []
+        for emails in subjects.values():
+            for start in range(0, len(emails), self.max_size):
+                end = start + self.max_size
+                batch = emails[start:end]
+                if len(batch) == 1:
+                    rest.extend(batch)
+                else:
+                    tasks.append(self._task(batch))
+        return tasks, rest
 
-    def _add_task(self, entry: SendEmailEntry) -> None:
-        self.celery_app.send_task(
-            "config.celery.send_email", kwargs={"entry_dict": asdict(entry)}
+    def _task(self, batch: List[OutboxMessageEntry]) -> OutboxTaskEntry:
+        self.stats.batches += 1
+        self.stats.emails += len(batch)
+        self.stats.max_batch_size = max(self.stats.max_batch_size, len(batch))
+        return OutboxTaskEntry(
+            task=self.task,
+            messages=batch,
+            kwargs={
+                "entries": [
+                    asdict(
+                        BatchedEmailEntry(
+                            **message.kwargs["entry_dict"],
+                            dedup_key=message.dedup_key,
+                        )
+                    )
+                    for message in batch
+                ]
+            },
+            # the same batch published again gets the same id
+            task_id=hashlib.sha1(
+                ",".join(message.dedup_key for message in batch).encode()
+            ).hexdigest(),
         )
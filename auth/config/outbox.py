@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+from celery import Celery
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from utils.metrics import registry
+from utils.repo import IRepo
+
+
+logger = logging.getLogger("outbox")
+
+
+@dataclass
+class OutboxEntry:
+    task: str
+    args: List = field(default_factory=list)
+    kwargs: Dict = field(default_factory=dict)
+    eta: datetime | None = None
+    dedup_key: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+@dataclass
+class OutboxMessageEntry(OutboxEntry):
+    id: int = 0
+    created_at: datetime | None = None
+
+
+@dataclass
+class OutboxTaskEntry:
+    """
+    Celery task published for one or more (combined) messages.
+    """
+
+    task: str
+    messages: List[OutboxMessageEntry]
+    args: List = field(default_factory=list)
+    kwargs: Dict = field(default_factory=dict)
+    eta: datetime | None = None
+    task_id: str | None = None
+
+    @classmethod
+    def from_message(cls, message: OutboxMessageEntry) -> "OutboxTaskEntry":
+        return cls(
+            task=message.task,
+            messages=[message],
+            args=message.args,
+            kwargs=message.kwargs,
+            eta=message.eta,
+            task_id=message.dedup_key,
+        )
+
+
+@dataclass
+class OutboxStats:
+    published: int = 0
+    failed: int = 0
+    dead: int = 0
+    tasks: int = 0
+    batches: int = 0
+    # seconds the oldest message, that is due, has been waiting on the last sample
+    lag: float = 0
+    publish_lag_max: float = 0
+    throughput: float = 0
+    _published_at_snapshot: int = 0
+    _snapshot_at: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        `publish_lag_max` is the longest time from the creation
+        to the publishing of a message and `throughput` is the messages
+        published per second since the previous call.
+        """
+        now = time.monotonic()
+        elapsed = now - self._snapshot_at
+        if elapsed > 0:
+            self.throughput = (self.published - self._published_at_snapshot) / elapsed
+        self._published_at_snapshot, self._snapshot_at = self.published, now
+        stats = {
+            name: value
+            for name, value in asdict(self).items()
+            if not name.startswith("_")
+        }
+        self.publish_lag_max = 0
+        return stats
+
+
+class IOutboxRepo(IRepo):
+    @abstractmethod
+    async def add(self, session: AsyncSession, entry: OutboxEntry) -> None: ...
+
+    @abstractmethod
+    async def lock_due(
+        self, session: AsyncSession, limit: int
+    ) -> Sequence[OutboxMessageEntry]: ...
+
+    @abstractmethod
+    async def delete(self, session: AsyncSession, ids: Sequence[int]) -> None: ...
+
+    @abstractmethod
+    async def retry_later(
+        self,
+        session: AsyncSession,
+        ids: Sequence[int],
+        *,
+        backoff: float,
+        max_backoff: float,
+        max_attempts: int,
+    ) -> Sequence[int]:
+        """
+        Returns the ids of the messages, that reached `max_attempts` and are dead.
+        """
+
+    @abstractmethod
+    async def get_lag(self, session: AsyncSession) -> float: ...
+
+
+class IOutboxCombiner(ABC):
+    """
+    Combines the messages of a batch into fewer tasks before they are published.
+    """
+
+    @abstractmethod
+    def combine(
+        self, messages: Sequence[OutboxMessageEntry]
+    ) -> Tuple[List[OutboxTaskEntry], List[OutboxMessageEntry]]:
+        """
+        Returns the combined tasks and the messages, that were left as they are.
+        """
+
+
+class IOutbox(ABC):
+    @abstractmethod
+    async def __call__(self, session: AsyncSession, entry: OutboxEntry) -> None: ...
+
+
+class Outbox(IOutbox):
+    """
+    Celery tasks are written to the outbox table in the session of the request,
+    so they are published only when it is committed, and by `OutboxRelay`,
+    so a slow or unavailable broker does not hold the request.
+    """
+
+    def __init__(self, repo: IOutboxRepo) -> None:
+        self.repo = repo
+
+    async def __call__(self, session: AsyncSession, entry: OutboxEntry) -> None:
+        await self.repo.add(session, entry)
+
+
+class OutboxRelay:
+    """
+    Publishes the messages of the outbox table to the broker in batches.
+
+    A batch is locked with `SKIP LOCKED`, so instances do not publish
+    the same messages, and is deleted in the same transaction once published.
+    Messages, that failed, are retried with exponential backoff,
+    the messages of a combined task fail and are retried together,
+    after `max_attempts` a message is dead and is left in the table.
+    The lag is sampled every `lag_interval` seconds, not on every poll.
+    Publishing is at least once, the dedup key is passed as the task id,
+    so the workers can skip a message published twice.
+    """
+
+    def __init__(
+        self,
+        db,
+        repo: IOutboxRepo,
+        celery_app: Celery,
+        *,
+        combiners: Sequence[IOutboxCombiner] = (),
+        batch_size: int = 100,
+        interval: float = 1,
+        backoff: float = 1,
+        max_backoff: float = 300,
+        max_attempts: int = 50,
+        lag_interval: float = 15,
+    ) -> None:
+        self.db = db
+        self.repo = repo
+        self.celery_app = celery_app
+        self.combiners = combiners
+        self.batch_size = batch_size
+        self.interval = interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.lag_interval = lag_interval
+        self._lag_sampled_at: float | None = None
+        self.stats = OutboxStats()
+
+        registry.register("outbox", self.stats.as_dict)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                published = await self.relay()
+            except Exception as e:
+                logger.error(f"Outbox relay failed - {str(e)}", exc_info=e)
+                published = 0
+            # a full batch means, that more messages are probably due
+            if published < self.batch_size:
+                await asyncio.sleep(self.interval)
+
+    async def relay(self) -> int:
+        """
+        Publishes a batch of the due messages, returns its size.
+        """
+        async with self.db.session(name="outbox_relay") as session:
+            await self._sample_lag(session)
+            messages = await self.repo.lock_due(session, self.batch_size)
+            if not messages:
+                return 0
+
+            tasks = self._combine(messages)
+            failed = await asyncio.to_thread(self._publish, tasks)
+            published = [message.id for message in messages if message.id not in failed]
+            await self.repo.delete(session, published)
+            dead = []
+            if failed:
+                dead = await self.repo.retry_later(
+                    session,
+                    list(failed),
+                    backoff=self.backoff,
+                    max_backoff=self.max_backoff,
+                    max_attempts=self.max_attempts,
+                )
+            if dead:
+                logger.error(
+                    "Outbox messages are dead - publishing failed too many times",
+                    extra={"ids": dead},
+                )
+
+        self.stats.batches += 1
+        self.stats.tasks += len(tasks)
+        self.stats.published += len(published)
+        self.stats.failed += len(failed)
+        self.stats.dead += len(dead)
+        return len(messages)
+
+    async def _sample_lag(self, session: AsyncSession) -> None:
+        now = time.monotonic()
+        if (
+            self._lag_sampled_at is None
+            or now - self._lag_sampled_at >= self.lag_interval
+        ):
+            self.stats.lag = await self.repo.get_lag(session)
+            self._lag_sampled_at = now
+
+    def _combine(self, messages: Sequence[OutboxMessageEntry]) -> List[OutboxTaskEntry]:
+        tasks = []
+        for combiner in self.combiners:
+            combined, messages = combiner.combine(messages)
+            tasks.extend(combined)
+        tasks.extend(OutboxTaskEntry.from_message(message) for message in messages)
+        return tasks
+
+    def _publish(self, tasks: Sequence[OutboxTaskEntry]) -> Dict[int, Exception]:
+        # runs in a thread, `send_task` is a blocking round trip to the broker
+        failed = {}
+        for task in tasks:
+            try:
+                self.celery_app.send_task(
+                    task.task,
+                    args=task.args,
+                    kwargs=task.kwargs,
+                    eta=task.eta,
+                    task_id=task.task_id,
+                )
+            except Exception as e:
+                logger.error(
+                    f"Outbox task publishing failed - {str(e)}",
+                    extra={
+                        "task": task.task,
+                        "task_id": task.task_id,
+                        "dedup_keys": [message.dedup_key for message in task.messages],
+                    },
+                    exc_info=e,
+                )
+                for message in task.messages:
+                    failed[message.id] = e
+            else:
+                for message in task.messages:
+                    self._add_publish_lag(message)
+        return failed
+
+    def _add_publish_lag(self, message: OutboxMessageEntry) -> None:
+        if message.created_at is None:
+            return
+        lag = time.time() - message.created_at.timestamp()
+        self.stats.publish_lag_max = max(self.stats.publish_lag_max, lag)
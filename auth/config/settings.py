@@ -6,17 +6,52 @@ from typing import List
 JWT_ALGORITHM: str = os.environ.get("JWT_ALGORITHM", "")
 ACCESS_SECRET_KEY: str = os.environ.get("ACCESS_SECRET_KEY", "")
 REFRESH_SECRET_KEY: str = os.environ.get("REFRESH_SECRET_KEY", "")
+JWT_KEYS_PATH: str = os.environ.get(
+    "JWT_KEYS_PATH", ""
+)  # JSON file with signing keys, see services/jwt/key_ring.py
+JWT_KEYS_RELOAD_INTERVAL: int = int(
+    os.environ.get("JWT_KEYS_RELOAD_INTERVAL", 30)
+)  # seconds, 0 disables reloading of the keys file
+JWT_CODEC: str = os.environ.get(
+    "JWT_CODEC", "pyjwt"
+)  # pyjwt | hs256, see services/jwt/codec.py
 ACCESS_TOKEN_LIFETIME: int = int(
     os.environ.get("ACCESS_TOKEN_LIFETIME", 1)
 )  # in minutes
 REFRESH_TOKEN_LIFETIME: int = int(
     os.environ.get("REFRESH_TOKEN_LIFETIME", 1)
 )  # in minutes
+REVOCATION_EPOCHS_ENABLED: bool = bool(
+    int(os.environ.get("REVOCATION_EPOCHS_ENABLED", 0))
+)  # tokens with a revocation epoch are checked without the DB
+REVOCATION_EPOCHS_SYNC_INTERVAL: int = int(
+    os.environ.get("REVOCATION_EPOCHS_SYNC_INTERVAL", 5)
+)  # seconds
+REVOCATIONS_WATCH_QUEUE_SIZE: int = int(
+    os.environ.get("REVOCATIONS_WATCH_QUEUE_SIZE", 1000)
+)  # events per `watch_revocations` stream
+
+USER_STATE_CACHE_MAX_SIZE: int = int(
+    os.environ.get("USER_STATE_CACHE_MAX_SIZE", 10000)
+)  # 0 disables the cache
+USER_STATE_CACHE_TTL: int = int(os.environ.get("USER_STATE_CACHE_TTL", 30))  # seconds
+USER_STATE_SHARED_CACHE_TTL: int = int(
+    os.environ.get("USER_STATE_SHARED_CACHE_TTL", 300)
+)  # seconds, entries in Redis, used when REDIS_URL is set
+VERIFIED_TOKEN_CACHE_MAX_SIZE: int = int(
+    os.environ.get("VERIFIED_TOKEN_CACHE_MAX_SIZE", 100000)
+)  # entries, about 0.5 KB each, 0 disables the cache
 
 TIMEZONE: str = os.environ.get("TIMEZONE", "Europe/Moscow")
 
 PASSWORD_SALT_LENGTH: int = int(os.environ.get("PASSWORD_SALT_LENGTH", 20))
 PASSWORD_HASH_ITERATIONS: int = int(os.environ.get("PASSWORD_HASH_ITERATIONS", 100100))
+PASSWORD_HASHING_EXECUTOR: str = os.environ.get(
+    "PASSWORD_HASHING_EXECUTOR", "process"
+)  # process or thread
+PASSWORD_HASHING_WORKERS: int = int(
+    os.environ.get("PASSWORD_HASHING_WORKERS", 0)
+)  # 0 means number of processors
 
 DB_USER: str = os.environ.get("DB_USER", "")
 DB_PASSWORD: str = os.environ.get("DB_PASSWORD", "")
@@ -24,6 +59,51 @@ DB_NAME: str = os.environ.get("DB_NAME", "")
 DB_HOST: str = os.environ.get("DB_HOST", "")
 DB_PORT: str = os.environ.get("DB_PORT", "")
 DATABASE_URL: str = os.environ.get("DATABASE_URL", "")
+DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW: int = int(
+    os.environ.get("DB_MAX_OVERFLOW", 10)
+)  # connections above the pool size, closed when returned
+DB_POOL_TIMEOUT: int = int(os.environ.get("DB_POOL_TIMEOUT", 5))  # seconds
+DB_POOL_PRE_PING: bool = bool(int(os.environ.get("DB_POOL_PRE_PING", 1)))
+DB_POOL_RECYCLE: int = int(
+    os.environ.get("DB_POOL_RECYCLE", 1800)
+)  # seconds, -1 disables recycling
+DB_POOL_WARM_UP: bool = bool(
+    int(os.environ.get("DB_POOL_WARM_UP", 1))
+)  # open DB_POOL_SIZE connections at startup
+DB_PREPARED_STATEMENT_CACHE_SIZE: int = int(
+    os.environ.get("DB_PREPARED_STATEMENT_CACHE_SIZE", 500)
+)  # statements per connection, 0 disables the cache
+DB_ECHO: bool = bool(int(os.environ.get("DB_ECHO", 0)))  # log every SQL statement
+DB_DEBUG: bool = bool(int(os.environ.get("DB_DEBUG", 0)))  # log sessions lifecycle
+DB_REPLICA_URLS: List[str] = [
+    url for url in os.environ.get("DB_REPLICA_URLS", "").split(",") if url
+]  # read replicas for the sessions, that tolerate the replication lag
+DB_REPLICA_EJECTION_TIME: float = float(
+    os.environ.get("DB_REPLICA_EJECTION_TIME", 30)
+)  # seconds a replica is not used after a connection error
+DB_STALENESS_WINDOW: float = float(
+    os.environ.get("DB_STALENESS_WINDOW", 5)
+)  # seconds the reads of a just written user go to the primary
+
+OUTBOX_RELAY_BATCH_SIZE: int = int(
+    os.environ.get("OUTBOX_RELAY_BATCH_SIZE", 100)
+)  # messages published per transaction
+OUTBOX_RELAY_INTERVAL: float = float(
+    os.environ.get("OUTBOX_RELAY_INTERVAL", 1)
+)  # seconds between polls, when the outbox is drained
+OUTBOX_RELAY_MAX_BACKOFF: float = float(
+    os.environ.get("OUTBOX_RELAY_MAX_BACKOFF", 300)
+)  # seconds, the longest delay of a message, that failed to be published
+OUTBOX_RELAY_MAX_ATTEMPTS: int = int(
+    os.environ.get("OUTBOX_RELAY_MAX_ATTEMPTS", 50)
+)  # publishing attempts, after which a message is dead and is not published anymore
+# emails of the same subject combined into one EMAIL_BATCH_TASK task, 1 disables batching
+EMAIL_BATCH_MAX_SIZE: int = int(os.environ.get("EMAIL_BATCH_MAX_SIZE", 1))
+# the task of the email worker, that consumes the batches, empty disables batching
+EMAIL_BATCH_TASK: str = os.environ.get("EMAIL_BATCH_TASK", "")
+
+REDIS_URL: str = os.environ.get("REDIS_URL", "")  # empty disables the shared caches
 
 TEST_DB_USER: str = os.environ.get("TEST_DB_USER", "")
 TEST_DB_PASSWORD: str = os.environ.get("TEST_DB_PASSWORD", "")
@@ -53,17 +133,36 @@ CONFIRM_EMAIL_CODE_DURATION: int = int(
 )  # seconds
 CONFIRM_EMAIL_CHECK_DELAY: int = int(
     os.environ.get("CONFIRM_EMAIL_CHECK_DELAY", 0)
-)  # seconds
+)  # seconds, users, that have not confirmed the email, are deleted after
+REGISTRATION_SWEEP_INTERVAL: float = float(
+    os.environ.get("REGISTRATION_SWEEP_INTERVAL", 60)
+)  # seconds between sweeps of the expired registrations, 0 disables them
+REGISTRATION_SWEEP_BATCH_SIZE: int = int(
+    os.environ.get("REGISTRATION_SWEEP_BATCH_SIZE", 1000)
+)  # users deleted per transaction
 
 RESET_PASSWORD_CODE_DURATION: int = int(
     os.environ.get("RESET_PASSWORD_CODE_DURATION", 0)
 )  # seconds
+CODE_STORE: str = os.environ.get(
+    "CODE_STORE", "database"
+)  # "database" or "key_value", the latter needs REDIS_URL
+CODE_STORE_DATABASE_FALLBACK: bool = bool(
+    int(os.environ.get("CODE_STORE_DATABASE_FALLBACK", 1))
+)  # codes, that are not in "key_value", are looked up in the database too
+CODE_PURGE_INTERVAL: float = float(
+    os.environ.get("CODE_PURGE_INTERVAL", 300)
+)  # seconds between purges of the expired codes, 0 disables them
+CODE_PURGE_BATCH_SIZE: int = int(
+    os.environ.get("CODE_PURGE_BATCH_SIZE", 500)
+)  # codes deleted per transaction
 
 CONFIRMATION_CODE_LENGTH: int = int(os.environ.get("CONFIRMATION_CODE_LENGTH", 0))
 CONFIRMATION_CODE_CHARACTERS: str = string.digits
 
 AUTH_GRPC_SERVER_HOST: str = os.environ.get("AUTH_GRPC_SERVER_HOST", "")
 AUTH_GRPC_SERVER_PORT: str = os.environ.get("AUTH_GRPC_SERVER_PORT", "")
+AUTH_STREAM_MAX_IN_FLIGHT: int = int(os.environ.get("AUTH_STREAM_MAX_IN_FLIGHT", 64))
 
 PUBLISHER_GRPC_HOST: str = os.environ.get("PUBLISHER_GRPC_HOST", "")
 PUBLISHER_GRPC_PORT: str = os.environ.get("PUBLISHER_GRPC_PORT", "")
@@ -81,3 +180,6 @@ LOGGING_SENSITIVE_FIELDS: List[str] = os.environ.get(
     "LOGGING_AUTH_SENSITIVE_FIELDS"
 ).split(",")
 LOG_PATH: str = os.environ.get("LOGGING_AUTH_PATH", "")
+METRICS_LOG_INTERVAL: int = int(
+    os.environ.get("METRICS_LOG_INTERVAL", 0)
+)  # seconds, 0 disables metrics logging
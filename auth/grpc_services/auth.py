@@ -1,11 +1,18 @@
+import json
+from dataclasses import asdict
+
 from dependency_injector.wiring import Provide, inject
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from protobufs.compiled import auth_pb2_grpc
 from protobufs.compiled.auth_pb2 import (
     AuthResponse,
+    AuthBatchResponse,
     User,
     Empty,
+    JWKS,
+    RevocationEvent,
+    RevocationEvents,
     JWTTokens,
     CodeSentResponse,
     CheckEmailConfirmedResponse,
@@ -20,11 +27,14 @@ from schemas import (
     RepeatRegistrationCodeSchema,
     ConfirmRegistrationSchema,
 )
+from config import settings
 from config.di import Container
 from config.db import Database
-from services.jwt import IRefreshJWTTokens
+from services.jwt import IRefreshJWTTokens, IGetJWKS
 from services.login import ILoginUser
 from services.authenticate import IAuthenticate
+from services.authenticate_batch import IAuthenticateBatch
+from services.revocations import IWatchRevocations
 from services.password import IChangePassword, IResetPassword, IConfirmResetPassword
 from services.registration import (
     IRegisterUser,
@@ -34,26 +44,70 @@ from services.registration import (
 )
 from utils.decorators import handle_grpc_request_error, inject_session
 from utils.exceptions import CustomException
+from utils.streams import map_unordered
 
 
 class GRPCAuth(auth_pb2_grpc.AuthServicer):
-    @inject_session
+    @inject_session(replica=True)
+    async def auth(self, request, context, session: AsyncSession):
+        return await self._authenticate(session, request)
+
+    async def auth_stream(self, request_iterator, context):
+        async for response in map_unordered(
+            request_iterator,
+            self._authenticate_stream_request,
+            settings.AUTH_STREAM_MAX_IN_FLIGHT,
+        ):
+            yield response
+
+    async def _authenticate_stream_request(self, request) -> AuthResponse:
+        async with self._get_db().session(replica=True, name="auth_stream") as session:
+            return await self._authenticate(session, request)
+
     @inject
-    async def auth(
+    async def _authenticate(
         self,
-        request,
-        context,
         session: AsyncSession,
+        request,
         service: IAuthenticate = Provide[Container.authenticate],
-    ):
-        user = await service(session=session, token=request.token)
+    ) -> AuthResponse:
         try:
-            return AuthResponse(user=User(id=user.id))
+            user_id = await service.user_id(session=session, token=request.token)
         except CustomException as e:
-            return AuthResponse(user=User(id=-1), error_message=str(e))
+            return AuthResponse(
+                user=User(id=-1),
+                error_message=str(e),
+                correlation_id=request.correlation_id,
+            )
+        return AuthResponse(
+            user=User(id=user_id), correlation_id=request.correlation_id
+        )
+
+    @inject_session(replica=True)
+    @inject
+    async def auth_batch(
+        self,
+        request,
+        context,
+        session: AsyncSession,
+        service: IAuthenticateBatch = Provide[Container.authenticate_batch],
+    ):
+        results = await service(session=session, tokens=request.tokens)
+        return AuthBatchResponse(
+            results=[
+                (
+                    AuthResponse(user=User(id=result.user_id))
+                    if result.user_id is not None
+                    else AuthResponse(
+                        user=User(id=-1), error_message=result.error_message
+                    )
+                )
+                for result in results
+            ]
+        )
 
     @handle_grpc_request_error(JWTTokens)
-    @inject_session
+    @inject_session(read_only=True)
     @inject
     async def jwt_refresh(
         self,
@@ -67,8 +121,39 @@ class GRPCAuth(auth_pb2_grpc.AuthServicer):
         )
         return JWTTokens(access=tokens.access, refresh=tokens.refresh)
 
+    @handle_grpc_request_error(JWKS)
+    @inject
+    async def get_jwks(
+        self,
+        request,
+        context,
+        service: IGetJWKS = Provide[Container.get_jwks],
+    ):
+        return JWKS(jwks=json.dumps(service()))
+
+    async def watch_revocations(self, request, context):
+        async with self._get_db().session(
+            read_only=True, name="watch_revocations"
+        ) as session:
+            async for entry in self._get_watch_revocations()(session, request.cursor):
+                yield RevocationEvents(
+                    events=[RevocationEvent(**asdict(event)) for event in entry.events],
+                    cursor=entry.cursor,
+                )
+
+    @inject
+    def _get_db(self, db: Database = Provide[Container.db]) -> Database:
+        return db
+
+    @inject
+    def _get_watch_revocations(
+        self,
+        service: IWatchRevocations = Provide[Container.watch_revocations],
+    ) -> IWatchRevocations:
+        return service
+
     @handle_grpc_request_error(JWTTokens)
-    @inject_session
+    @inject_session(read_only=True)
     @inject
     async def login(
         self,
@@ -10,6 +10,7 @@ from config import settings
 from config.di import Container
 from grpc_services.auth import GRPCAuth
 from utils.logging import get_config
+from utils.metrics import registry
 
 
 formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
@@ -22,6 +23,8 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO if settings.DEBUG else logging.CRITICAL)
 logger.addHandler(handler)
 
+metrics_logger = logging.getLogger("metrics")
+
 
 class GRPCServer:
     async def run(self) -> None:
@@ -30,6 +33,20 @@ class GRPCServer:
         logger.info("DI Container Successfully Initialized...")
         self._init_logging()
         logger.info("Logging Successfully Initialized...")
+        self._init_metrics()
+        logger.info("Metrics Successfully Initialized...")
+        await self._init_db()
+        logger.info("DB Pool Successfully Initialized...")
+        await self._init_revocation_epochs()
+        logger.info("Revocation Epochs Successfully Initialized...")
+        self._init_user_state_invalidations()
+        logger.info("User State Invalidations Successfully Initialized...")
+        self._init_outbox_relay()
+        logger.info("Outbox Relay Successfully Initialized...")
+        self._init_registration_sweep()
+        logger.info("Registration Sweep Successfully Initialized...")
+        self._init_code_purge()
+        logger.info("Code Purge Successfully Initialized...")
         server = self._create_server()
         logger.info("gRPC Server Successfully Created...")
         self._add_services(server)
@@ -38,14 +55,77 @@ class GRPCServer:
         logger.info("Server Port Successfully Initialized...")
         await self._start_server(server)
         logger.info(f"Running at {self._get_address()}")
-        await self._wait_for_termination(server)
+        try:
+            await self._wait_for_termination(server)
+        finally:
+            await self._shutdown_resources()
+            logger.info("DI Container Resources Successfully Shut Down...")
 
     def _init_di(self) -> None:
-        Container()
+        self._container = Container()
+        # keys are parsed at startup to fail fast on a bad file
+        self._container.key_ring()
 
     def _init_logging(self) -> None:
         logging.config.dictConfig(get_config(settings.LOG_PATH))
 
+    def _init_metrics(self) -> None:
+        if settings.METRICS_LOG_INTERVAL > 0:
+            self._metrics_task = asyncio.create_task(self._log_metrics())
+
+    async def _log_metrics(self) -> None:
+        while True:
+            await asyncio.sleep(settings.METRICS_LOG_INTERVAL)
+            metrics_logger.info("Metrics snapshot", extra=registry.snapshot())
+
+    async def _init_db(self) -> None:
+        if settings.DB_POOL_WARM_UP:
+            await self._container.db().warm_up()
+
+    async def _init_revocation_epochs(self) -> None:
+        # synced even when epochs are not used for tokens checks,
+        # changes made by other instances are sent to `watch_revocations` streams
+        await self._sync_revocation_epochs()
+        self._revocation_epochs_task = asyncio.create_task(
+            self._sync_revocation_epochs_periodically()
+        )
+
+    async def _sync_revocation_epochs(self) -> None:
+        async with self._container.db().session(
+            read_only=True, name="revocation_epochs_sync"
+        ) as session:
+            await self._container.revocation_epochs().sync(session)
+
+    async def _sync_revocation_epochs_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(settings.REVOCATION_EPOCHS_SYNC_INTERVAL)
+            try:
+                await self._sync_revocation_epochs()
+            except Exception as e:
+                logger.error(f"Revocation epochs sync failed - {str(e)}", exc_info=e)
+
+    def _init_user_state_invalidations(self) -> None:
+        self._user_state_invalidations_task = asyncio.create_task(
+            self._container.user_state_cache().listen()
+        )
+
+    def _init_outbox_relay(self) -> None:
+        self._outbox_relay_task = asyncio.create_task(
+            self._container.outbox_relay().run()
+        )
+
+    def _init_registration_sweep(self) -> None:
+        if settings.REGISTRATION_SWEEP_INTERVAL > 0:
+            self._registration_sweep_task = asyncio.create_task(
+                self._container.sweep_registrations().run()
+            )
+
+    def _init_code_purge(self) -> None:
+        if settings.CODE_PURGE_INTERVAL > 0:
+            self._code_purge_task = asyncio.create_task(
+                self._container.purge_codes().run()
+            )
+
     def _create_server(self) -> grpc.aio.Server:
         return grpc.aio.server(futures.ThreadPoolExecutor(max_workers=10))
 
@@ -64,6 +144,12 @@ class GRPCServer:
     async def _wait_for_termination(self, server: grpc.aio.Server) -> None:
         await server.wait_for_termination()
 
+    async def _shutdown_resources(self) -> None:
+        # e.g. the workers of the password hashing executor
+        result = self._container.shutdown_resources()
+        if result is not None:
+            await result
+
 
 if __name__ == "__main__":
     asyncio.run(GRPCServer().run())
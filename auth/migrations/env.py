@@ -8,6 +8,7 @@ from alembic import context
 from config import settings
 from models.users import user_table
 from models.codes import code_table
+from models.outbox import outbox_table
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -37,7 +38,7 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-target_metadata = [user_table.metadata, code_table.metadata]
+target_metadata = [user_table.metadata, code_table.metadata, outbox_table.metadata]
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
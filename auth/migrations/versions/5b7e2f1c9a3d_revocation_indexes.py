@@ -0,0 +1,33 @@
+"""Revocation indexes
+
+Revision ID: 5b7e2f1c9a3d
+Revises: cd9f62befe0c
+Create Date: 2024-02-12 14:20:11.402915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2f1c9a3d'
+down_revision: Union[str, None] = 'cd9f62befe0c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # built concurrently, so users can be updated while they are built
+    with op.get_context().autocommit_block():
+        op.create_index('ix_auth_user_updated_at', 'auth_user', ['updated_at'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_auth_user_tokens_revoked_at', 'auth_user', ['tokens_revoked_at'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_auth_user_inactive', 'auth_user', ['id'], unique=False, postgresql_where=sa.text('is_active = false'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_auth_user_inactive', table_name='auth_user', postgresql_where=sa.text('is_active = false'), postgresql_concurrently=True)
+        op.drop_index('ix_auth_user_tokens_revoked_at', table_name='auth_user', postgresql_concurrently=True)
+        op.drop_index('ix_auth_user_updated_at', table_name='auth_user', postgresql_concurrently=True)
@@ -0,0 +1,31 @@
+"""Lower login indexes
+
+Revision ID: 6ecf504dd91f
+Revises: 5b7e2f1c9a3d
+Create Date: 2024-02-19 11:05:43.118604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6ecf504dd91f'
+down_revision: Union[str, None] = '5b7e2f1c9a3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # built concurrently, so logins and registrations are not blocked on a big table
+    with op.get_context().autocommit_block():
+        op.create_index('ix_auth_user_lower_email', 'auth_user', [sa.text('lower(email)')], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_auth_user_lower_username', 'auth_user', [sa.text('lower(username)')], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_auth_user_lower_username', table_name='auth_user', postgresql_concurrently=True)
+        op.drop_index('ix_auth_user_lower_email', table_name='auth_user', postgresql_concurrently=True)
@@ -0,0 +1,29 @@
+"""Code last index
+
+Revision ID: 748e94c2ff5e
+Revises: 6ecf504dd91f
+Create Date: 2024-02-21 16:32:07.524190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '748e94c2ff5e'
+down_revision: Union[str, None] = '6ecf504dd91f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # built concurrently, so codes can be created while it is built
+    with op.get_context().autocommit_block():
+        op.create_index('ix_auth_code_user_id_type_created_at', 'auth_code', ['user_id', 'type', sa.text('created_at DESC')], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_auth_code_user_id_type_created_at', table_name='auth_code', postgresql_concurrently=True)
@@ -0,0 +1,33 @@
+"""Outbox dead messages
+
+Revision ID: 9d41c7e2b5a8
+Revises: f2a8c61d4e07
+Create Date: 2024-03-04 10:12:37.204815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d41c7e2b5a8'
+down_revision: Union[str, None] = 'f2a8c61d4e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('auth_outbox', sa.Column('dead_at', sa.DateTime(timezone=True), nullable=True))
+    # the relay polls only the messages, that are not dead
+    with op.get_context().autocommit_block():
+        op.create_index('ix_auth_outbox_due', 'auth_outbox', ['available_at'], unique=False, postgresql_where=sa.text('dead_at IS NULL'), postgresql_concurrently=True)
+        op.drop_index('ix_auth_outbox_available_at', table_name='auth_outbox', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_auth_outbox_available_at', 'auth_outbox', ['available_at'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_auth_outbox_due', table_name='auth_outbox', postgresql_where=sa.text('dead_at IS NULL'), postgresql_concurrently=True)
+    op.drop_column('auth_outbox', 'dead_at')
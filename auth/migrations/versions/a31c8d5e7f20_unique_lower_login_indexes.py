@@ -0,0 +1,36 @@
+"""Unique lower login indexes
+
+Revision ID: a31c8d5e7f20
+Revises: 748e94c2ff5e
+Create Date: 2024-02-23 10:14:52.806311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a31c8d5e7f20'
+down_revision: Union[str, None] = '748e94c2ff5e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the unique ones are built before the old ones are dropped, so logins keep an index,
+    # the build fails, when usernames that differ in case only were registered concurrently
+    with op.get_context().autocommit_block():
+        op.create_index('uq_auth_user_lower_email', 'auth_user', [sa.text('lower(email)')], unique=True, postgresql_concurrently=True)
+        op.create_index('uq_auth_user_lower_username', 'auth_user', [sa.text('lower(username)')], unique=True, postgresql_concurrently=True)
+        op.drop_index('ix_auth_user_lower_username', table_name='auth_user', postgresql_concurrently=True)
+        op.drop_index('ix_auth_user_lower_email', table_name='auth_user', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_auth_user_lower_email', 'auth_user', [sa.text('lower(email)')], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_auth_user_lower_username', 'auth_user', [sa.text('lower(username)')], unique=False, postgresql_concurrently=True)
+        op.drop_index('uq_auth_user_lower_username', table_name='auth_user', postgresql_concurrently=True)
+        op.drop_index('uq_auth_user_lower_email', table_name='auth_user', postgresql_concurrently=True)
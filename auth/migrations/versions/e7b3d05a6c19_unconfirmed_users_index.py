@@ -0,0 +1,28 @@
+"""Unconfirmed users index
+
+Revision ID: e7b3d05a6c19
+Revises: c4e9a2d71b38
+Create Date: 2024-02-28 09:37:15.240876
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3d05a6c19'
+down_revision: Union[str, None] = 'c4e9a2d71b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_auth_user_unconfirmed_created_at', 'auth_user', ['created_at'], unique=False, postgresql_where=sa.text('NOT email_confirmed'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_auth_user_unconfirmed_created_at', table_name='auth_user', postgresql_where=sa.text('NOT email_confirmed'), postgresql_concurrently=True)
@@ -0,0 +1,29 @@
+"""Code created at index
+
+Revision ID: f2a8c61d4e07
+Revises: e7b3d05a6c19
+Create Date: 2024-02-29 14:05:42.918533
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a8c61d4e07'
+down_revision: Union[str, None] = 'e7b3d05a6c19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # built concurrently, so codes can be created while it is built
+    with op.get_context().autocommit_block():
+        op.create_index('ix_auth_code_created_at', 'auth_code', ['created_at'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_auth_code_created_at', table_name='auth_code', postgresql_concurrently=True)
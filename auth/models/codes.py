@@ -5,6 +5,7 @@ from sqlalchemy import (
     DateTime,
     func,
     ForeignKey,
+    Index,
     Integer,
 )
 from sqlalchemy.orm import registry
@@ -35,6 +36,17 @@ code_table = Table(
     ),
 )
 
+# the last code of a user is looked up by every code check and creation
+Index(
+    "ix_auth_code_user_id_type_created_at",
+    code_table.c.user_id,
+    code_table.c.type,
+    code_table.c.created_at.desc(),
+)
+
+# expired codes are purged by this, see services/codes/purge.py
+Index("ix_auth_code_created_at", code_table.c.created_at)
+
 
 class Code:
     pass
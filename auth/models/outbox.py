@@ -0,0 +1,54 @@
+from sqlalchemy import (
+    Table,
+    Column,
+    BigInteger,
+    Integer,
+    String,
+    DateTime,
+    Index,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import registry
+
+
+mapper_registry = registry()
+
+
+outbox_table = Table(
+    "auth_outbox",
+    mapper_registry.metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True, nullable=False),
+    Column("task", String(100), nullable=False),
+    Column("args", JSONB, server_default="[]", nullable=False),
+    Column("kwargs", JSONB, server_default="{}", nullable=False),
+    Column("eta", DateTime(timezone=True), nullable=True),
+    # the celery task id, a message is published again,
+    # when the relay fails after publishing it and before deleting it
+    Column("dedup_key", String(100), unique=True, nullable=False),
+    Column("attempts", Integer, server_default="0", nullable=False),
+    Column(
+        "available_at",
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    ),
+    Column(
+        "created_at", DateTime(timezone=True), server_default=func.now(), nullable=False
+    ),
+    # set, when the message failed to be published too many times,
+    # it is kept for inspection and is not published anymore
+    Column("dead_at", DateTime(timezone=True), nullable=True),
+    # the relay polls the messages, that are due, in the order of creation
+    Index(
+        "ix_auth_outbox_due", "available_at", postgresql_where=text("dead_at IS NULL")
+    ),
+)
+
+
+class OutboxMessage:
+    pass
+
+
+outbox_mapper = mapper_registry.map_imperatively(OutboxMessage, outbox_table)
@@ -1,4 +1,14 @@
-from sqlalchemy import Table, Column, Integer, String, Boolean, DateTime, func
+from sqlalchemy import (
+    Table,
+    Column,
+    Index,
+    Integer,
+    String,
+    Boolean,
+    DateTime,
+    func,
+    text,
+)
 from sqlalchemy.orm import registry
 
 
@@ -35,8 +45,27 @@ user_table = Table(
         server_default="false",
         nullable=False,
     ),
+    # revocation epochs are loaded and synced by these, see services/revocations.py
+    Index("ix_auth_user_updated_at", "updated_at"),
+    Index("ix_auth_user_tokens_revoked_at", "tokens_revoked_at"),
+    Index(
+        "ix_auth_user_inactive",
+        "id",
+        postgresql_where=text("is_active = false"),
+    ),
+    # expired registrations are swept by this, see services/registration/sweep.py
+    Index(
+        "ix_auth_user_unconfirmed_created_at",
+        "created_at",
+        postgresql_where=text("NOT email_confirmed"),
+    ),
 )
 
+# logins are looked up case-insensitively and registrations conflict on these,
+# see repo/user.py
+Index("uq_auth_user_lower_email", func.lower(user_table.c.email), unique=True)
+Index("uq_auth_user_lower_username", func.lower(user_table.c.username), unique=True)
+
 
 class User:
     pass
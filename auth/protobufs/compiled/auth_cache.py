@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Set
+
+import jwt
+
+from protobufs.compiled.auth_grpc_typed import (
+    IAuthStub,
+    AuthRequest,
+    AuthResponse,
+    RevocationEvents,
+    User,
+    WatchRevocationsRequest,
+)
+
+
+logger = logging.getLogger("auth")
+
+
+@dataclass
+class _CachedAuth:
+    user_id: int
+    exp: float
+    issued_at: float
+
+
+class AuthCache:
+    """
+    Cache of `Auth.auth` results, invalidated by `Auth.watch_revocations`.
+
+    Successful results are kept by the token digest until the token expires.
+    `watch` keeps the stream open and resumes it from the last cursor
+    after a failure, waiting from `reconnect_delay` up to `max_reconnect_delay`
+    seconds between the attempts. Results of a revoked user are dropped,
+    when the token was issued before the revocation, all of them are dropped,
+    when the user is deactivated. Events are applied idempotently,
+    so the ones re-sent after a reconnect are harmless.
+
+    The cache is used only while the stream is open and its replay is received,
+    otherwise every call goes to the Auth service.
+    """
+
+    def __init__(
+        self,
+        stub: IAuthStub,
+        *,
+        max_size: int = 10000,
+        reconnect_delay: float = 1,
+        max_reconnect_delay: float = 30,
+    ) -> None:
+        self.stub = stub
+        self.max_size = max_size
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.cursor: float = 0
+        self.connected = False
+        self._cache: OrderedDict[bytes, _CachedAuth] = OrderedDict()
+        self._users: Dict[int, Set[bytes]] = {}
+        # results received while events were applied might be stale already
+        self._generation = 0
+
+    async def auth(self, token: str) -> AuthResponse:
+        digest = hashlib.sha256(token.encode()).digest()
+        cached = self._get(digest)
+        if cached is not None:
+            return AuthResponse(user=User(id=cached.user_id))
+
+        generation = self._generation
+        response = await self.stub.auth(AuthRequest(token=token))
+        if (
+            self.connected
+            and generation == self._generation
+            and self._succeeded(response)
+        ):
+            self._set(digest, token, response.user.id)
+        return response
+
+    async def watch(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async for events in self.stub.watch_revocations(
+                    WatchRevocationsRequest(cursor=self.cursor)
+                ):
+                    self.apply(events)
+                    self.connected = True
+                    delay = self.reconnect_delay
+            except asyncio.CancelledError:
+                self.connected = False
+                raise
+            except Exception as e:
+                logger.warning(f"Revocations stream failed - {str(e)}")
+            self.connected = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def apply(self, events: RevocationEvents) -> None:
+        self._generation += 1
+        for event in events.events:
+            for digest in list(self._users.get(event.user_id, ())):
+                cached = self._cache[digest]
+                if not event.is_active or cached.issued_at < event.revoked_at:
+                    self._delete(digest)
+        self.cursor = max(self.cursor, events.cursor)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _get(self, digest: bytes) -> _CachedAuth | None:
+        if not self.connected:
+            return None
+        cached = self._cache.get(digest)
+        if cached is None:
+            return None
+        if cached.exp <= time.time():
+            self._delete(digest)
+            return None
+        self._cache.move_to_end(digest)
+        return cached
+
+    def _succeeded(self, response: AuthResponse) -> bool:
+        # rejected tokens are answered with the user -1 and the error message
+        return not response.error_message and response.user.id != -1
+
+    def _set(self, digest: bytes, token: str, user_id: int) -> None:
+        if self.max_size <= 0:
+            return
+        try:
+            payload = jwt.decode(token, options={"verify_signature": False})
+            cached = _CachedAuth(
+                user_id=user_id,
+                exp=payload["exp"],
+                issued_at=payload.get("rev") or payload["created_at"],
+            )
+        except (jwt.exceptions.PyJWTError, KeyError):
+            return
+
+        self._delete(digest)
+        while len(self._cache) >= self.max_size:
+            self._delete(next(iter(self._cache)))
+        self._cache[digest] = cached
+        self._users.setdefault(user_id, set()).add(digest)
+
+    def _delete(self, digest: bytes) -> None:
+        cached = self._cache.pop(digest, None)
+        if cached is None:
+            return
+        digests = self._users[cached.user_id]
+        digests.discard(digest)
+        if not digests:
+            del self._users[cached.user_id]
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, asdict
+from typing import AsyncIterable, AsyncIterator, List
 
 from config.grpc import GRPCConnection
 from utils.decorators import handle_grpc_response_error
@@ -13,6 +14,7 @@ class Empty:
 @dataclass
 class AuthRequest:
     token: str
+    correlation_id: str = ""
 
 
 @dataclass
@@ -23,6 +25,42 @@ class User:
 @dataclass
 class AuthResponse:
     user: User
+    error_message: str = ""
+    correlation_id: str = ""
+
+
+@dataclass
+class AuthBatchRequest:
+    tokens: List[str]
+
+
+@dataclass
+class AuthBatchResponse:
+    results: List[AuthResponse]
+
+
+@dataclass
+class JWKS:
+    jwks: str
+    detail: str | None
+
+
+@dataclass
+class WatchRevocationsRequest:
+    cursor: float = 0
+
+
+@dataclass
+class RevocationEvent:
+    user_id: int
+    revoked_at: float
+    is_active: bool
+
+
+@dataclass
+class RevocationEvents:
+    events: List[RevocationEvent]
+    cursor: float
 
 
 @dataclass
@@ -104,9 +142,25 @@ class IAuthStub(ABC):
     @abstractmethod
     async def auth(self, request: AuthRequest) -> AuthResponse: ...
 
+    @abstractmethod
+    async def auth_batch(self, request: AuthBatchRequest) -> AuthBatchResponse: ...
+
+    @abstractmethod
+    def auth_stream(
+        self, requests: AsyncIterable[AuthRequest]
+    ) -> AsyncIterator[AuthResponse]: ...
+
     @abstractmethod
     async def jwt_refresh(self, request: RefreshTokensRequest) -> JWTTokens: ...
 
+    @abstractmethod
+    async def get_jwks(self, request: Empty) -> JWKS: ...
+
+    @abstractmethod
+    def watch_revocations(
+        self, request: WatchRevocationsRequest
+    ) -> AsyncIterator[RevocationEvents]: ...
+
     @abstractmethod
     async def login(self, request: LoginRequest) -> JWTTokens: ...
 
@@ -151,7 +205,51 @@ class AuthStub(IAuthStub):
         )  # noqa: E501
 
         response = await self.connection.stub.auth(_AuthRequest(**asdict(request)))
-        return AuthResponse(user=User(id=response.user.id))
+        return AuthResponse(
+            user=User(id=response.user.id),
+            error_message=response.error_message,
+            correlation_id=response.correlation_id,
+        )
+
+    @handle_grpc_response_error
+    async def auth_batch(self, request: AuthBatchRequest) -> AuthBatchResponse:
+        from protobufs.compiled.auth_pb2 import (
+            AuthBatchRequest as _AuthBatchRequest,
+        )  # noqa: E501
+
+        response = await self.connection.stub.auth_batch(
+            _AuthBatchRequest(**asdict(request))
+        )
+        return AuthBatchResponse(
+            results=[
+                AuthResponse(
+                    user=User(id=result.user.id), error_message=result.error_message
+                )
+                for result in response.results
+            ]
+        )
+
+    async def auth_stream(
+        self, requests: AsyncIterable[AuthRequest]
+    ) -> AsyncIterator[AuthResponse]:
+        """
+        Responses come in the order of completion, not in the order of requests,
+        so they should be matched by `correlation_id`.
+        """
+        from protobufs.compiled.auth_pb2 import (
+            AuthRequest as _AuthRequest,
+        )  # noqa: E501
+
+        async def _requests():
+            async for request in requests:
+                yield _AuthRequest(**asdict(request))
+
+        async for response in self.connection.stub.auth_stream(_requests()):
+            yield AuthResponse(
+                user=User(id=response.user.id),
+                error_message=response.error_message,
+                correlation_id=response.correlation_id,
+            )
 
     @handle_grpc_response_error
     async def jwt_refresh(self, request: RefreshTokensRequest) -> JWTTokens:
@@ -168,6 +266,41 @@ class AuthStub(IAuthStub):
             detail=response.detail,
         )
 
+    @handle_grpc_response_error
+    async def get_jwks(self, request: Empty) -> JWKS:
+        from protobufs.compiled.auth_pb2 import (
+            Empty as _Empty,
+        )  # noqa: E501
+
+        response = await self.connection.stub.get_jwks(_Empty(**asdict(request)))
+        return JWKS(jwks=response.jwks, detail=response.detail)
+
+    async def watch_revocations(
+        self, request: WatchRevocationsRequest
+    ) -> AsyncIterator[RevocationEvents]:
+        """
+        The stream does not end by itself, it should be resumed
+        from the cursor of the last message, when the connection is lost.
+        """
+        from protobufs.compiled.auth_pb2 import (
+            WatchRevocationsRequest as _WatchRevocationsRequest,
+        )  # noqa: E501
+
+        async for response in self.connection.stub.watch_revocations(
+            _WatchRevocationsRequest(**asdict(request))
+        ):
+            yield RevocationEvents(
+                events=[
+                    RevocationEvent(
+                        user_id=event.user_id,
+                        revoked_at=event.revoked_at,
+                        is_active=event.is_active,
+                    )
+                    for event in response.events
+                ],
+                cursor=response.cursor,
+            )
+
     @handle_grpc_response_error
     async def login(self, request: LoginRequest) -> JWTTokens:
         from protobufs.compiled.auth_pb2 import (
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+import jwt
+
+from protobufs.compiled.auth_grpc_typed import IAuthStub, Empty
+from utils.exceptions import Custom401Exception
+
+
+@dataclass
+class VerifiedToken:
+    user: int
+    exp: float
+    created_at: float
+
+
+class JWKSVerifier:
+    """
+    Verification of access tokens without calling `Auth.auth`.
+
+    Public keys are fetched with `Auth.get_jwks` and refreshed every `refresh_interval`
+    seconds, or earlier, when a token is signed by an unknown key,
+    but not more often than once in `min_refresh_interval` seconds.
+
+    Only the signature and the expiration time are checked,
+    tokens revocation and user activity are known to the Auth service only.
+    """
+
+    def __init__(
+        self,
+        stub: IAuthStub,
+        *,
+        refresh_interval: float = 300,
+        min_refresh_interval: float = 30,
+        leeway: float = 0,
+    ) -> None:
+        self.stub = stub
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.leeway = leeway
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def verify(self, token: str) -> VerifiedToken:
+        try:
+            key = await self._get_key(jwt.get_unverified_header(token).get("kid"))
+            payload = jwt.decode(
+                token, key.key, algorithms=[key.algorithm_name], leeway=self.leeway
+            )
+            return VerifiedToken(
+                user=payload["user"],
+                exp=payload["exp"],
+                created_at=payload["created_at"],
+            )
+        except (jwt.exceptions.PyJWTError, KeyError):
+            raise Custom401Exception("Token is not correct.")
+
+    async def refresh(self) -> None:
+        response = await self.stub.get_jwks(Empty(detail=None))
+        self._keys = {
+            key.key_id: key for key in jwt.PyJWKSet.from_json(response.jwks).keys
+        }
+        self._fetched_at = time.monotonic()
+
+    async def _get_key(self, kid: str | None) -> jwt.PyJWK:
+        if self._is_outdated(self.refresh_interval) or (
+            kid not in self._keys and self._is_outdated(self.min_refresh_interval)
+        ):
+            async with self._lock:
+                if self._is_outdated(self.min_refresh_interval):
+                    await self.refresh()
+        return self._keys[kid]
+
+    def _is_outdated(self, interval: float) -> bool:
+        return (
+            self._fetched_at is None or time.monotonic() - self._fetched_at >= interval
+        )
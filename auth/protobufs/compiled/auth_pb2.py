@@ -14,7 +14,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nauth.proto\x12\x04\x61uth\"\'\n\x05\x45mpty\x12\x13\n\x06\x64\x65tail\x18\x01 \x01(\tH\x00\x88\x01\x01\x42\t\n\x07_detail\"\x1c\n\x0b\x41uthRequest\x12\r\n\x05token\x18\x01 \x01(\t\"\x12\n\x04User\x12\n\n\x02id\x18\x01 \x01(\x05\"?\n\x0c\x41uthResponse\x12\x18\n\x04user\x18\x01 \x01(\x0b\x32\n.auth.User\x12\x15\n\rerror_message\x18\x02 \x01(\t\"L\n\tJWTTokens\x12\x0e\n\x06\x61\x63\x63\x65ss\x18\x01 \x01(\t\x12\x0f\n\x07refresh\x18\x02 \x01(\t\x12\x13\n\x06\x64\x65tail\x18\x03 \x01(\tH\x00\x88\x01\x01\x42\t\n\x07_detail\"R\n\x10\x43odeSentResponse\x12\r\n\x05\x65mail\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x13\n\x06\x64\x65tail\x18\x03 \x01(\tH\x00\x88\x01\x01\x42\t\n\x07_detail\"\'\n\x14RefreshTokensRequest\x12\x0f\n\x07refresh\x18\x01 \x01(\t\"/\n\x0cLoginRequest\x12\r\n\x05login\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"q\n\x15\x43hangePasswordRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\x12\x18\n\x10\x63urrent_password\x18\x02 \x01(\t\x12\x14\n\x0cnew_password\x18\x03 \x01(\t\x12\x17\n\x0fre_new_password\x18\x04 \x01(\t\"%\n\x14ResetPasswordRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\"i\n\x1bResetPasswordConfirmRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\x12\x0c\n\x04\x63ode\x18\x02 \x01(\t\x12\x14\n\x0cnew_password\x18\x03 \x01(\t\x12\x17\n\x0fre_new_password\x18\x04 \x01(\t\"Y\n\x0fRegisterRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\x12\x10\n\x08username\x18\x02 \x01(\t\x12\x10\n\x08password\x18\x03 \x01(\t\x12\x13\n\x0bre_password\x18\x04 \x01(\t\"&\n\x15RepeatRegisterRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\"5\n\x16\x43onfirmRegisterRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\x12\x0c\n\x04\x63ode\x18\x02 \x01(\t\"-\n\x1a\x43heckEmailConfirmedRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\"c\n\x1b\x43heckEmailConfirmedResponse\x12\x16\n\tconfirmed\x18\x01 \x01(\x08H\x00\x88\x01\x01\x12\x13\n\x06\x64\x65tail\x18\x02 \x01(\tH\x01\x88\x01\x01\x42\x0c\n\n_confirmedB\t\n\x07_detail2\x90\x05\n\x04\x41uth\x12-\n\x04\x61uth\x12\x11.auth.AuthRequest\x1a\x12.auth.AuthResponse\x12:\n\x0bjwt_refresh\x12\x1a.auth.RefreshTokensRequest\x1a\x0f.auth.JWTTokens\x12,\n\x05login\x12\x12.auth.LoginRequest\x1a\x0f.auth.JWTTokens\x12;\n\x0fpassword_change\x12\x1b.auth.ChangePasswordRequest\x1a\x0b.auth.Empty\x12\x44\n\x0epassword_reset\x12\x1a.auth.ResetPasswordRequest\x1a\x16.auth.CodeSentResponse\x12H\n\x16password_reset_confirm\x12!.auth.ResetPasswordConfirmRequest\x1a\x0b.auth.Empty\x12\x39\n\x08register\x12\x15.auth.RegisterRequest\x1a\x16.auth.CodeSentResponse\x12\x46\n\x0fregister_repeat\x12\x1b.auth.RepeatRegisterRequest\x1a\x16.auth.CodeSentResponse\x12\x41\n\x10register_confirm\x12\x1c.auth.ConfirmRegisterRequest\x1a\x0f.auth.JWTTokens\x12\\\n\x15\x63heck_email_confirmed\x12 .auth.CheckEmailConfirmedRequest\x1a!.auth.CheckEmailConfirmedResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nauth.proto\x12\x04\x61uth\"\'\n\x05\x45mpty\x12\x13\n\x06\x64\x65tail\x18\x01 \x01(\tH\x00\x88\x01\x01\x42\t\n\x07_detail\"4\n\x0b\x41uthRequest\x12\r\n\x05token\x18\x01 \x01(\t\x12\x16\n\x0e\x63orrelation_id\x18\x02 \x01(\t\"\x12\n\x04User\x12\n\n\x02id\x18\x01 \x01(\x05\"W\n\x0c\x41uthResponse\x12\x18\n\x04user\x18\x01 \x01(\x0b\x32\n.auth.User\x12\x15\n\rerror_message\x18\x02 \x01(\t\x12\x16\n\x0e\x63orrelation_id\x18\x03 \x01(\t\"\"\n\x10\x41uthBatchRequest\x12\x0e\n\x06tokens\x18\x01 \x03(\t\"8\n\x11\x41uthBatchResponse\x12#\n\x07results\x18\x01 \x03(\x0b\x32\x12.auth.AuthResponse\"4\n\x04JWKS\x12\x0c\n\x04jwks\x18\x01 \x01(\t\x12\x13\n\x06\x64\x65tail\x18\x02 \x01(\tH\x00\x88\x01\x01\x42\t\n\x07_detail\")\n\x17WatchRevocationsRequest\x12\x0e\n\x06\x63ursor\x18\x01 \x01(\x01\"I\n\x0fRevocationEvent\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\x12\x12\n\nrevoked_at\x18\x02 \x01(\x01\x12\x11\n\tis_active\x18\x03 \x01(\x08\"I\n\x10RevocationEvents\x12%\n\x06\x65vents\x18\x01 \x03(\x0b\x32\x15.auth.RevocationEvent\x12\x0e\n\x06\x63ursor\x18\x02 \x01(\x01\"L\n\tJWTTokens\x12\x0e\n\x06\x61\x63\x63\x65ss\x18\x01 \x01(\t\x12\x0f\n\x07refresh\x18\x02 \x01(\t\x12\x13\n\x06\x64\x65tail\x18\x03 \x01(\tH\x00\x88\x01\x01\x42\t\n\x07_detail\"R\n\x10\x43odeSentResponse\x12\r\n\x05\x65mail\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x13\n\x06\x64\x65tail\x18\x03 \x01(\tH\x00\x88\x01\x01\x42\t\n\x07_detail\"\'\n\x14RefreshTokensRequest\x12\x0f\n\x07refresh\x18\x01 \x01(\t\"/\n\x0cLoginRequest\x12\r\n\x05login\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"q\n\x15\x43hangePasswordRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\x12\x18\n\x10\x63urrent_password\x18\x02 \x01(\t\x12\x14\n\x0cnew_password\x18\x03 \x01(\t\x12\x17\n\x0fre_new_password\x18\x04 \x01(\t\"%\n\x14ResetPasswordRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\"i\n\x1bResetPasswordConfirmRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\x12\x0c\n\x04\x63ode\x18\x02 \x01(\t\x12\x14\n\x0cnew_password\x18\x03 \x01(\t\x12\x17\n\x0fre_new_password\x18\x04 \x01(\t\"Y\n\x0fRegisterRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\x12\x10\n\x08username\x18\x02 \x01(\t\x12\x10\n\x08password\x18\x03 \x01(\t\x12\x13\n\x0bre_password\x18\x04 \x01(\t\"&\n\x15RepeatRegisterRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\"5\n\x16\x43onfirmRegisterRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\x12\x0c\n\x04\x63ode\x18\x02 \x01(\t\"-\n\x1a\x43heckEmailConfirmedRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x05\"c\n\x1b\x43heckEmailConfirmedResponse\x12\x16\n\tconfirmed\x18\x01 \x01(\x08H\x00\x88\x01\x01\x12\x13\n\x06\x64\x65tail\x18\x02 \x01(\tH\x01\x88\x01\x01\x42\x0c\n\n_confirmedB\t\n\x07_detail2\xfc\x06\n\x04\x41uth\x12-\n\x04\x61uth\x12\x11.auth.AuthRequest\x1a\x12.auth.AuthResponse\x12=\n\nauth_batch\x12\x16.auth.AuthBatchRequest\x1a\x17.auth.AuthBatchResponse\x12\x38\n\x0b\x61uth_stream\x12\x11.auth.AuthRequest\x1a\x12.auth.AuthResponse(\x01\x30\x01\x12:\n\x0bjwt_refresh\x12\x1a.auth.RefreshTokensRequest\x1a\x0f.auth.JWTTokens\x12#\n\x08get_jwks\x12\x0b.auth.Empty\x1a\n.auth.JWKS\x12L\n\x11watch_revocations\x12\x1d.auth.WatchRevocationsRequest\x1a\x16.auth.RevocationEvents0\x01\x12,\n\x05login\x12\x12.auth.LoginRequest\x1a\x0f.auth.JWTTokens\x12;\n\x0fpassword_change\x12\x1b.auth.ChangePasswordRequest\x1a\x0b.auth.Empty\x12\x44\n\x0epassword_reset\x12\x1a.auth.ResetPasswordRequest\x1a\x16.auth.CodeSentResponse\x12H\n\x16password_reset_confirm\x12!.auth.ResetPasswordConfirmRequest\x1a\x0b.auth.Empty\x12\x39\n\x08register\x12\x15.auth.RegisterRequest\x1a\x16.auth.CodeSentResponse\x12\x46\n\x0fregister_repeat\x12\x1b.auth.RepeatRegisterRequest\x1a\x16.auth.CodeSentResponse\x12\x41\n\x10register_confirm\x12\x1c.auth.ConfirmRegisterRequest\x1a\x0f.auth.JWTTokens\x12\\\n\x15\x63heck_email_confirmed\x12 .auth.CheckEmailConfirmedRequest\x1a!.auth.CheckEmailConfirmedResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -24,35 +24,47 @@ if _descriptor._USE_C_DESCRIPTORS == False:
   _globals['_EMPTY']._serialized_start=20
   _globals['_EMPTY']._serialized_end=59
   _globals['_AUTHREQUEST']._serialized_start=61
-  _globals['_AUTHREQUEST']._serialized_end=89
-  _globals['_USER']._serialized_start=91
-  _globals['_USER']._serialized_end=109
-  _globals['_AUTHRESPONSE']._serialized_start=111
-  _globals['_AUTHRESPONSE']._serialized_end=174
-  _globals['_JWTTOKENS']._serialized_start=176
-  _globals['_JWTTOKENS']._serialized_end=252
-  _globals['_CODESENTRESPONSE']._serialized_start=254
-  _globals['_CODESENTRESPONSE']._serialized_end=336
-  _globals['_REFRESHTOKENSREQUEST']._serialized_start=338
-  _globals['_REFRESHTOKENSREQUEST']._serialized_end=377
-  _globals['_LOGINREQUEST']._serialized_start=379
-  _globals['_LOGINREQUEST']._serialized_end=426
-  _globals['_CHANGEPASSWORDREQUEST']._serialized_start=428
-  _globals['_CHANGEPASSWORDREQUEST']._serialized_end=541
-  _globals['_RESETPASSWORDREQUEST']._serialized_start=543
-  _globals['_RESETPASSWORDREQUEST']._serialized_end=580
-  _globals['_RESETPASSWORDCONFIRMREQUEST']._serialized_start=582
-  _globals['_RESETPASSWORDCONFIRMREQUEST']._serialized_end=687
-  _globals['_REGISTERREQUEST']._serialized_start=689
-  _globals['_REGISTERREQUEST']._serialized_end=778
-  _globals['_REPEATREGISTERREQUEST']._serialized_start=780
-  _globals['_REPEATREGISTERREQUEST']._serialized_end=818
-  _globals['_CONFIRMREGISTERREQUEST']._serialized_start=820
-  _globals['_CONFIRMREGISTERREQUEST']._serialized_end=873
-  _globals['_CHECKEMAILCONFIRMEDREQUEST']._serialized_start=875
-  _globals['_CHECKEMAILCONFIRMEDREQUEST']._serialized_end=920
-  _globals['_CHECKEMAILCONFIRMEDRESPONSE']._serialized_start=922
-  _globals['_CHECKEMAILCONFIRMEDRESPONSE']._serialized_end=1021
-  _globals['_AUTH']._serialized_start=1024
-  _globals['_AUTH']._serialized_end=1680
+  _globals['_AUTHREQUEST']._serialized_end=113
+  _globals['_USER']._serialized_start=115
+  _globals['_USER']._serialized_end=133
+  _globals['_AUTHRESPONSE']._serialized_start=135
+  _globals['_AUTHRESPONSE']._serialized_end=222
+  _globals['_AUTHBATCHREQUEST']._serialized_start=224
+  _globals['_AUTHBATCHREQUEST']._serialized_end=258
+  _globals['_AUTHBATCHRESPONSE']._serialized_start=260
+  _globals['_AUTHBATCHRESPONSE']._serialized_end=316
+  _globals['_JWKS']._serialized_start=318
+  _globals['_JWKS']._serialized_end=370
+  _globals['_WATCHREVOCATIONSREQUEST']._serialized_start=372
+  _globals['_WATCHREVOCATIONSREQUEST']._serialized_end=413
+  _globals['_REVOCATIONEVENT']._serialized_start=415
+  _globals['_REVOCATIONEVENT']._serialized_end=488
+  _globals['_REVOCATIONEVENTS']._serialized_start=490
+  _globals['_REVOCATIONEVENTS']._serialized_end=563
+  _globals['_JWTTOKENS']._serialized_start=565
+  _globals['_JWTTOKENS']._serialized_end=641
+  _globals['_CODESENTRESPONSE']._serialized_start=643
+  _globals['_CODESENTRESPONSE']._serialized_end=725
+  _globals['_REFRESHTOKENSREQUEST']._serialized_start=727
+  _globals['_REFRESHTOKENSREQUEST']._serialized_end=766
+  _globals['_LOGINREQUEST']._serialized_start=768
+  _globals['_LOGINREQUEST']._serialized_end=815
+  _globals['_CHANGEPASSWORDREQUEST']._serialized_start=817
+  _globals['_CHANGEPASSWORDREQUEST']._serialized_end=930
+  _globals['_RESETPASSWORDREQUEST']._serialized_start=932
+  _globals['_RESETPASSWORDREQUEST']._serialized_end=969
+  _globals['_RESETPASSWORDCONFIRMREQUEST']._serialized_start=971
+  _globals['_RESETPASSWORDCONFIRMREQUEST']._serialized_end=1076
+  _globals['_REGISTERREQUEST']._serialized_start=1078
+  _globals['_REGISTERREQUEST']._serialized_end=1167
+  _globals['_REPEATREGISTERREQUEST']._serialized_start=1169
+  _globals['_REPEATREGISTERREQUEST']._serialized_end=1207
+  _globals['_CONFIRMREGISTERREQUEST']._serialized_start=1209
+  _globals['_CONFIRMREGISTERREQUEST']._serialized_end=1262
+  _globals['_CHECKEMAILCONFIRMEDREQUEST']._serialized_start=1264
+  _globals['_CHECKEMAILCONFIRMEDREQUEST']._serialized_end=1309
+  _globals['_CHECKEMAILCONFIRMEDRESPONSE']._serialized_start=1311
+  _globals['_CHECKEMAILCONFIRMEDRESPONSE']._serialized_end=1410
+  _globals['_AUTH']._serialized_start=1413
+  _globals['_AUTH']._serialized_end=2305
 # @@protoc_insertion_point(module_scope)
@@ -19,11 +19,31 @@ class AuthStub(object):
             request_serializer=auth__pb2.AuthRequest.SerializeToString,
             response_deserializer=auth__pb2.AuthResponse.FromString,
         )
+        self.auth_batch = channel.unary_unary(
+            "/auth.Auth/auth_batch",
+            request_serializer=auth__pb2.AuthBatchRequest.SerializeToString,
+            response_deserializer=auth__pb2.AuthBatchResponse.FromString,
+        )
+        self.auth_stream = channel.stream_stream(
+            "/auth.Auth/auth_stream",
+            request_serializer=auth__pb2.AuthRequest.SerializeToString,
+            response_deserializer=auth__pb2.AuthResponse.FromString,
+        )
         self.jwt_refresh = channel.unary_unary(
             "/auth.Auth/jwt_refresh",
             request_serializer=auth__pb2.RefreshTokensRequest.SerializeToString,
             response_deserializer=auth__pb2.JWTTokens.FromString,
         )
+        self.get_jwks = channel.unary_unary(
+            "/auth.Auth/get_jwks",
+            request_serializer=auth__pb2.Empty.SerializeToString,
+            response_deserializer=auth__pb2.JWKS.FromString,
+        )
+        self.watch_revocations = channel.unary_stream(
+            "/auth.Auth/watch_revocations",
+            request_serializer=auth__pb2.WatchRevocationsRequest.SerializeToString,
+            response_deserializer=auth__pb2.RevocationEvents.FromString,
+        )
         self.login = channel.unary_unary(
             "/auth.Auth/login",
             request_serializer=auth__pb2.LoginRequest.SerializeToString,
@@ -75,12 +95,36 @@ class AuthServicer(object):
         context.set_details("Method not implemented!")
         raise NotImplementedError("Method not implemented!")
 
+    def auth_batch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
+    def auth_stream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
     def jwt_refresh(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details("Method not implemented!")
         raise NotImplementedError("Method not implemented!")
 
+    def get_jwks(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
+    def watch_revocations(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
     def login(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -137,11 +181,31 @@ def add_AuthServicer_to_server(servicer, server):
             request_deserializer=auth__pb2.AuthRequest.FromString,
             response_serializer=auth__pb2.AuthResponse.SerializeToString,
         ),
+        "auth_batch": grpc.unary_unary_rpc_method_handler(
+            servicer.auth_batch,
+            request_deserializer=auth__pb2.AuthBatchRequest.FromString,
+            response_serializer=auth__pb2.AuthBatchResponse.SerializeToString,
+        ),
+        "auth_stream": grpc.stream_stream_rpc_method_handler(
+            servicer.auth_stream,
+            request_deserializer=auth__pb2.AuthRequest.FromString,
+            response_serializer=auth__pb2.AuthResponse.SerializeToString,
+        ),
         "jwt_refresh": grpc.unary_unary_rpc_method_handler(
             servicer.jwt_refresh,
             request_deserializer=auth__pb2.RefreshTokensRequest.FromString,
             response_serializer=auth__pb2.JWTTokens.SerializeToString,
         ),
+        "get_jwks": grpc.unary_unary_rpc_method_handler(
+            servicer.get_jwks,
+            request_deserializer=auth__pb2.Empty.FromString,
+            response_serializer=auth__pb2.JWKS.SerializeToString,
+        ),
+        "watch_revocations": grpc.unary_stream_rpc_method_handler(
+            servicer.watch_revocations,
+            request_deserializer=auth__pb2.WatchRevocationsRequest.FromString,
+            response_serializer=auth__pb2.RevocationEvents.SerializeToString,
+        ),
         "login": grpc.unary_unary_rpc_method_handler(
             servicer.login,
             request_deserializer=auth__pb2.LoginRequest.FromString,
@@ -222,6 +286,64 @@ class Auth(object):
             metadata,
         )
 
+    @staticmethod
+    def auth_batch(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            "/auth.Auth/auth_batch",
+            auth__pb2.AuthBatchRequest.SerializeToString,
+            auth__pb2.AuthBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+        )
+
+    @staticmethod
+    def auth_stream(
+        request_iterator,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            "/auth.Auth/auth_stream",
+            auth__pb2.AuthRequest.SerializeToString,
+            auth__pb2.AuthResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+        )
+
     @staticmethod
     def jwt_refresh(
         request,
@@ -251,6 +373,64 @@ class Auth(object):
             metadata,
         )
 
+    @staticmethod
+    def get_jwks(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            "/auth.Auth/get_jwks",
+            auth__pb2.Empty.SerializeToString,
+            auth__pb2.JWKS.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+        )
+
+    @staticmethod
+    def watch_revocations(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            "/auth.Auth/watch_revocations",
+            auth__pb2.WatchRevocationsRequest.SerializeToString,
+            auth__pb2.RevocationEvents.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+        )
+
     @staticmethod
     def login(
         request,
@@ -1,2 +1,4 @@
 from .user import UserRepo
 from .code import CodeRepo
+from .outbox import OutboxRepo
+from .kv_code import KeyValueCodeRepo
@@ -1,10 +1,11 @@
 from dataclasses import asdict
+from datetime import datetime
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, Select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.codes.types import CodeTypeEnum
-from services.entries import CreateCodeEntry
+from services.entries import CreateCodeEntry, LastCodeEntry
 from services.codes.repo import ICodeRepo
 from models.codes import Code
 from utils.decorators import handle_orm_error, row_to_model
@@ -17,20 +18,56 @@ class CodeRepo(ICodeRepo):
     async def create(self, session: AsyncSession, entry: CreateCodeEntry) -> Code:
         if not isinstance(entry.type, str):
             entry.type = entry.type.value
-        code = self.model(**asdict(entry))
-        session.add(code)
-        await session.flush([code])
-        await session.refresh(code)
-        return code
+        result = await session.execute(
+            insert(self.model).values(**asdict(entry)).returning(self.model)
+        )
+        return result.scalar_one()
 
     @handle_orm_error
     @row_to_model()
     async def get_last(
         self, session: AsyncSession, user_id: int, type: CodeTypeEnum
     ) -> Code | None:
+        result = await session.execute(self._last(select(self.model), user_id, type))
+        return result.first()
+
+    @handle_orm_error
+    @row_to_model(LastCodeEntry)
+    async def get_last_entry(
+        self, session: AsyncSession, user_id: int, type: CodeTypeEnum
+    ) -> LastCodeEntry | None:
         result = await session.execute(
-            select(self.model)
-            .filter(self.model.user_id == user_id, self.model.type == type.value)
-            .order_by(self.model.created_at.desc())
+            self._last(select(self.model.code, self.model.created_at), user_id, type)
         )
         return result.first()
+
+    def _last(self, qs: Select, user_id: int, type: CodeTypeEnum) -> Select:
+        # served by ix_auth_code_user_id_type_created_at without sorting
+        return (
+            qs.filter(self.model.user_id == user_id, self.model.type == type.value)
+            .order_by(self.model.created_at.desc())
+            .limit(1)
+        )
+
+    @handle_orm_error
+    async def delete_expired(
+        self, session: AsyncSession, created_before: datetime, limit: int
+    ) -> int:
+        """
+        Deletes up to `limit` codes created before `created_before`,
+        returns their count.
+
+        The batch is looked up by ix_auth_code_created_at
+        and locked with `SKIP LOCKED`, so concurrent purges do not wait for each other.
+        """
+        expired = (
+            select(self.model.id)
+            .filter(self.model.created_at < created_before)
+            .order_by(self.model.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(
+            delete(self.model).filter(self.model.id.in_(expired))
+        )
+        return result.rowcount
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Coroutine, Dict, Set
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from services.codes.types import CodeTypeEnum
+from services.entries import CreateCodeEntry, LastCodeEntry
+from services.codes.repo import ICodeRepo
+from models.codes import Code
+from utils.kv import IKeyValueStore
+from utils.time import get_current_time, timestamp_to_datetime
+
+
+logger = logging.getLogger("auth")
+
+
+KEY_PREFIX = "auth:code:"
+
+
+class KeyValueCodeRepo(ICodeRepo):
+    """
+    Keeps the last code of a user per type in the key-value store,
+    so it is a single get and it expires with the duration of the type.
+
+    The codes are written to the store, once the session is committed,
+    so a code of a rolled back request is never checked.
+    The durations must be positive, the store does not keep a key without one.
+    While the codes, created before the store was switched to, are active,
+    the ones, that are not found, are looked up by `fallback`.
+    """
+
+    transactional = False
+
+    code_duration_map = {
+        CodeTypeEnum.EMAIL_CONFIRM: settings.CONFIRM_EMAIL_CODE_DURATION,
+        CodeTypeEnum.RESET_PASSWORD: settings.RESET_PASSWORD_CODE_DURATION,
+    }
+
+    def __init__(
+        self,
+        store: IKeyValueStore,
+        fallback: ICodeRepo | None = None,
+        code_duration_map: Dict[CodeTypeEnum, int] | None = None,
+    ):
+        self.store = store
+        self.fallback = fallback
+        if code_duration_map is not None:
+            self.code_duration_map = code_duration_map
+        for type, duration in self.code_duration_map.items():
+            if duration <= 0:
+                raise ValueError(
+                    f"Duration of {type.value} codes must be positive, got {duration}"
+                )
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def create(self, session: AsyncSession, entry: CreateCodeEntry) -> Code:
+        type = CodeTypeEnum(entry.type)
+        created_at = get_current_time()
+        items = {self._key(entry.user_id, type): self._dumps(entry.code, created_at)}
+        ttl = self.code_duration_map[type]
+        if isinstance(session, AsyncSession):
+            event.listen(
+                session.sync_session,
+                "after_commit",
+                lambda _: self._spawn(self._set_committed(items, ttl)),
+                once=True,
+            )
+        else:
+            await self.store.set_many(items, ttl=ttl)
+        return Code(
+            user_id=entry.user_id,
+            code=entry.code,
+            type=type.value,
+            created_at=created_at,
+        )
+
+    async def get_last(
+        self, session: AsyncSession, user_id: int, type: CodeTypeEnum
+    ) -> Code | None:
+        entry = await self.get_last_entry(session, user_id, type)
+        if entry is None:
+            return None
+        return Code(
+            user_id=user_id,
+            code=entry.code,
+            type=type.value,
+            created_at=entry.created_at,
+        )
+
+    async def get_last_entry(
+        self, session: AsyncSession, user_id: int, type: CodeTypeEnum
+    ) -> LastCodeEntry | None:
+        (value,) = await self.store.get_many([self._key(user_id, type)])
+        if value is not None:
+            return self._loads(value)
+        if self.fallback is not None:
+            return await self.fallback.get_last_entry(session, user_id, type)
+        return None
+
+    async def delete_expired(
+        self, session: AsyncSession, created_before: datetime, limit: int
+    ) -> int:
+        # the store expires the codes itself
+        return 0
+
+    async def _set_committed(self, items: Dict[str, bytes], ttl: float) -> None:
+        try:
+            await self.store.set_many(items, ttl=ttl)
+        except Exception as e:
+            # the user has to request a new code
+            logger.error(f"Code writing to the key-value store failed - {str(e)}")
+
+    def _spawn(self, coroutine: Coroutine) -> None:
+        # the tasks must be referenced until they are done
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _key(self, user_id: int, type: CodeTypeEnum) -> str:
+        return f"{KEY_PREFIX}{user_id}:{type.value}"
+
+    def _dumps(self, code: str, created_at: datetime) -> bytes:
+        return orjson.dumps([code, created_at.timestamp()])
+
+    def _loads(self, value: bytes) -> LastCodeEntry:
+        code, created_at = orjson.loads(value)
+        return LastCodeEntry(code=code, created_at=timestamp_to_datetime(created_at))
@@ -0,0 +1,99 @@
+from dataclasses import asdict
+from typing import Sequence
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.outbox import IOutboxRepo, OutboxEntry, OutboxMessageEntry
+from models.outbox import OutboxMessage
+from utils.decorators import handle_orm_error
+
+
+# 2 ** 20 seconds are far beyond any backoff
+MAX_EXPONENT = 20
+
+
+class OutboxRepo(IOutboxRepo):
+    model = OutboxMessage
+
+    @handle_orm_error
+    async def add(self, session: AsyncSession, entry: OutboxEntry) -> None:
+        # the message with the same dedup key is already waiting
+        await session.execute(
+            insert(self.model)
+            .values(**asdict(entry))
+            .on_conflict_do_nothing(index_elements=[self.model.dedup_key])
+        )
+
+    @handle_orm_error
+    async def lock_due(
+        self, session: AsyncSession, limit: int
+    ) -> Sequence[OutboxMessageEntry]:
+        result = await session.execute(
+            select(
+                self.model.id,
+                self.model.task,
+                self.model.args,
+                self.model.kwargs,
+                self.model.eta,
+                self.model.dedup_key,
+                self.model.created_at,
+            )
+            .filter(self.model.available_at <= func.now(), self.model.dead_at.is_(None))
+            .order_by(self.model.available_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return [OutboxMessageEntry(**row._mapping) for row in result]
+
+    @handle_orm_error
+    async def delete(self, session: AsyncSession, ids: Sequence[int]) -> None:
+        if ids:
+            await session.execute(delete(self.model).filter(self.model.id.in_(ids)))
+
+    @handle_orm_error
+    async def retry_later(
+        self,
+        session: AsyncSession,
+        ids: Sequence[int],
+        *,
+        backoff: float,
+        max_backoff: float,
+        max_attempts: int,
+    ) -> Sequence[int]:
+        # the exponent is capped, so the power does not overflow
+        delay = func.least(
+            max_backoff,
+            backoff * func.power(2, func.least(self.model.attempts, MAX_EXPONENT)),
+        )
+        result = await session.execute(
+            update(self.model)
+            .filter(self.model.id.in_(ids))
+            .values(
+                attempts=self.model.attempts + 1,
+                available_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, delay),
+                dead_at=case(
+                    (self.model.attempts + 1 >= max_attempts, func.now()), else_=None
+                ),
+            )
+            .returning(self.model.id, self.model.dead_at)
+        )
+        return [row.id for row in result if row.dead_at is not None]
+
+    @handle_orm_error
+    async def get_lag(self, session: AsyncSession) -> float:
+        # the oldest due message is the first one of ix_auth_outbox_due
+        result = await session.execute(
+            select(
+                func.coalesce(
+                    func.extract(
+                        "epoch", func.now() - func.min(self.model.available_at)
+                    ),
+                    0,
+                )
+            ).filter(
+                self.model.available_at <= func.now(), self.model.dead_at.is_(None)
+            )
+        )
+        return float(result.scalar())
@@ -1,17 +1,51 @@
-from typing import Dict
+from datetime import datetime
+from typing import Dict, Iterable, Sequence
 
-from sqlalchemy import func, or_, select, update, delete, exists, Select, Result
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    func,
+    or_,
+    select,
+    insert,
+    update,
+    delete,
+    exists,
+    Select,
+    Result,
+    Row,
+    literal,
+    not_,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
+from config.db import mark_read, mark_written
 from schemas import RegistrationSchema
-from services.repo import IUserRepo
+from services.codes.types import CodeTypeEnum
+from services.entries import RegistrationEntry
+from services.repo import IUserRepo, UNIQUE_EMAIL_INDEX, UNIQUE_USERNAME_INDEX
+from models.codes import Code
 from models.users import User
 from utils.decorators import handle_orm_error, row_to_model
 
 
+LOGIN_EMAIL_MARK = "@"
+# statements of a registration, that races with the rows being inserted and deleted
+REGISTER_ATTEMPTS = 3
+
+
 class UserRepo(IUserRepo):
     model = User
 
+    def __init__(self, username_characters: str | None = None) -> None:
+        # unknown allowed characters are treated as the ones with "@"
+        self.usernames_may_be_emails = (
+            username_characters is None or LOGIN_EMAIL_MARK in username_characters
+        )
+
     @handle_orm_error
     async def all(
         self,
@@ -29,29 +63,149 @@ class UserRepo(IUserRepo):
 
     @handle_orm_error
     async def create(self, session: AsyncSession, entry: RegistrationSchema) -> User:
-        user = self.model(
-            email=entry.email.lower(), username=entry.username, password=entry.password
+        result = await session.execute(
+            insert(self.model)
+            .values(
+                email=entry.email.lower(),
+                username=entry.username,
+                password=entry.password,
+            )
+            .returning(self.model)
         )
-        session.add(user)
-        await session.flush([user])
-        await session.refresh(user)
-        return user
+        return result.scalar_one()
 
     @handle_orm_error
-    async def update(self, session: AsyncSession, user: User, values: Dict) -> None:
-        await session.execute(
-            update(self.model).filter(self.model.id == user.id).values(**values)
+    async def register(
+        self,
+        session: AsyncSession,
+        entry: RegistrationSchema,
+        code: str | None,
+        code_type: CodeTypeEnum,
+    ) -> RegistrationEntry:
+        """
+        The user and the code (unless it is `None`) are inserted by a single statement,
+        uniqueness is enforced by the unique indexes instead of lookups before it,
+        so there is no window for a concurrent registration between them.
+
+        On conflict nothing is inserted and the unique indexes,
+        the entry collides with, are returned.
+        """
+        new_user = (
+            pg_insert(self.model)
+            .values(
+                email=entry.email.lower(),
+                username=entry.username,
+                password=entry.password,
+                # python side defaults are not applied to the statements of a CTE
+                is_active=True,
+                email_confirmed=False,
+            )
+            .on_conflict_do_nothing()
+            .returning(self.model.id)
+            .cte("new_user")
+        )
+        statement = select(
+            select(new_user.c.id).scalar_subquery(), *self._conflicts(entry)
+        )
+        if code is not None:
+            new_code = (
+                insert(Code)
+                .from_select(
+                    ["user_id", "code", "type"],
+                    select(new_user.c.id, literal(code), literal(code_type.value)),
+                )
+                .cte("new_code")
+            )
+            statement = statement.add_cte(new_code)
+        # neither is returned, when the conflicting row was committed concurrently
+        # after the statement had started, it is visible to the next one only,
+        # unless it is deleted in between again
+        for _ in range(REGISTER_ATTEMPTS):
+            result = await session.execute(statement)
+            user_id, *conflicts = result.one()
+            if user_id is not None or any(conflicts):
+                break
+        else:
+            raise RuntimeError(
+                f"Registration neither inserted nor conflicted "
+                f"in {REGISTER_ATTEMPTS} attempts"
+            )
+        return RegistrationEntry(
+            user_id=user_id,
+            conflicts=[
+                name
+                for name, conflict in zip(
+                    (UNIQUE_EMAIL_INDEX, UNIQUE_USERNAME_INDEX), conflicts
+                )
+                if conflict
+            ],
         )
 
+    def _conflicts(self, entry: RegistrationSchema) -> Sequence[ColumnElement[bool]]:
+        return [
+            exists().where(self._lower_equals(self.model.email, entry.email)),
+            exists().where(self._lower_equals(self.model.username, entry.username)),
+        ]
+
+    @handle_orm_error
+    async def update(
+        self,
+        session: AsyncSession,
+        user: User,
+        values: Dict,
+        *,
+        returning: bool = False,
+    ) -> User | None:
+        mark_written(session, user.id)
+        qs = update(self.model).filter(self.model.id == user.id).values(**values)
+        if not returning:
+            await session.execute(qs)
+            return None
+        # server side values (`updated_at`) are loaded by the same statement
+        result = await session.execute(qs.returning(self.model))
+        return result.scalar_one()
+
     @handle_orm_error
     async def delete(self, session: AsyncSession, user: User) -> None:
+        mark_written(session, user.id)
         await session.execute(delete(self.model).filter(self.model.id == user.id))
 
+    @handle_orm_error
+    async def delete_unconfirmed(
+        self, session: AsyncSession, created_before: datetime, limit: int
+    ) -> Sequence[int]:
+        """
+        Deletes up to `limit` users, that have not confirmed the email
+        and were created before `created_before`, returns their ids.
+
+        The batch is looked up by ix_auth_user_unconfirmed_created_at
+        and locked with `SKIP LOCKED`, so a confirmation in progress
+        and the concurrent sweeps are not waited for.
+        """
+        expired = (
+            select(self.model.id)
+            .filter(
+                not_(self.model.email_confirmed),
+                self.model.created_at < created_before,
+            )
+            .order_by(self.model.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(
+            delete(self.model)
+            .filter(self.model.id.in_(expired))
+            .returning(self.model.id)
+        )
+        ids = result.scalars().all()
+        mark_written(session, *ids)
+        return ids
+
     @handle_orm_error
     async def email_exists(self, session: AsyncSession, email: str) -> bool:
         qs = await self.all(session, include_not_confirmed_email=True, as_select=True)
         result = await session.execute(
-            exists(qs).where(func.lower(self.model.email) == func.lower(email)).select()
+            exists(qs).where(self._lower_equals(self.model.email, email)).select()
         )
         return bool(result.scalar())
 
@@ -59,9 +213,7 @@ class UserRepo(IUserRepo):
     async def username_exists(self, session: AsyncSession, username: str) -> bool:
         qs = await self.all(session, include_not_confirmed_email=True, as_select=True)
         result = await session.execute(
-            exists(qs)
-            .where(func.lower(self.model.username) == func.lower(username))
-            .select()
+            exists(qs).where(self._lower_equals(self.model.username, username)).select()
         )
         return bool(result.scalar())
 
@@ -69,23 +221,83 @@ class UserRepo(IUserRepo):
     @row_to_model()
     async def get_by_login(self, session: AsyncSession, login: str) -> User | None:
         qs = await self.all(session, as_select=True)
-        result = await session.execute(
-            qs.filter(
-                or_(
-                    func.lower(self.model.username) == func.lower(login),
-                    func.lower(self.model.email) == func.lower(login),
-                )
-            )
-        )
+        result = await session.execute(self._login_lookup(qs, login))
         return result.first()
 
+    def _login_lookup(self, qs: Select[User], login: str) -> Select[User]:
+        """
+        Lookup by the column, the login can be, instead of `OR` across both,
+        that is rarely served by the indexes.
+
+        Emails always contain "@", so without it the login is a username.
+        With it the login is an email, unless usernames may contain "@" too,
+        then both are looked up with `UNION ALL`, the email first.
+        """
+        by_username = qs.filter(self._lower_equals(self.model.username, login))
+        if LOGIN_EMAIL_MARK not in login:
+            return by_username
+
+        by_email = qs.filter(self._lower_equals(self.model.email, login))
+        if not self.usernames_may_be_emails:
+            return by_email
+
+        logins = union_all(
+            by_email.add_columns(literal(0).label("priority")),
+            by_username.add_columns(literal(1).label("priority")),
+        ).subquery()
+        return select(aliased(self.model, logins)).order_by(logins.c.priority).limit(1)
+
     @handle_orm_error
     @row_to_model()
     async def get_by_id(self, session: AsyncSession, id: int) -> User | None:
+        mark_read(session, id)
         qs = await self.all(session, include_not_confirmed_email=True, as_select=True)
         result = await session.execute(qs.filter(self.model.id == id))
         return result.first()
 
+    @handle_orm_error
+    async def get_many_by_ids(
+        self, session: AsyncSession, ids: Iterable[int]
+    ) -> Sequence[User]:
+        ids = set(ids)
+        if not ids:
+            return []
+        mark_read(session, *ids)
+        qs = await self.all(session, include_not_confirmed_email=True, as_select=True)
+        result = await session.execute(qs.filter(self.model.id.in_(ids)))
+        return result.scalars().all()
+
+    @handle_orm_error
+    async def get_revoked_since(
+        self, session: AsyncSession, since: datetime
+    ) -> Sequence[Row]:
+        result = await session.execute(
+            self._revocation_states().filter(
+                or_(
+                    self.model.tokens_revoked_at > since,
+                    self.model.is_active == False,  # noqa: E712
+                )
+            )
+        )
+        return result.all()
+
+    @handle_orm_error
+    async def get_updated_since(
+        self, session: AsyncSession, since: datetime
+    ) -> Sequence[Row]:
+        result = await session.execute(
+            self._revocation_states().filter(self.model.updated_at > since)
+        )
+        return result.all()
+
+    def _lower_equals(self, column: Column, value: str) -> ColumnElement[bool]:
+        # must match the expression of uq_auth_user_lower_email
+        # and uq_auth_user_lower_username exactly to be looked up by them
+        return func.lower(column) == func.lower(value)
+
+    def _revocation_states(self) -> Select:
+        return select(self.model.id, self.model.is_active, self.model.tokens_revoked_at)
+
     @handle_orm_error
     @row_to_model()
     async def get_by_email(
@@ -101,8 +313,6 @@ class UserRepo(IUserRepo):
             as_select=True,
         )
         result = await session.execute(
-            qs.filter(
-                func.lower(self.model.email) == func.lower(email),
-            )
+            qs.filter(self._lower_equals(self.model.email, email))
         )
         return result.first()
@@ -0,0 +1,2 @@
+# `codes` must be imported before `entries` to avoid an import cycle
+from . import codes  # noqa: F401
@@ -5,12 +5,17 @@ from typing import Dict
 import jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from config import settings
 from config.i18n import _
 from services.repo import IUserRepo
-from services.entries import JWTPayload
+from services.jwt.codec import IJWTCodec
+from services.jwt.key_ring import IKeyRing, JWTKey
+from services.jwt.types import TokenPurposeEnum
+from services.entries import JWTPayload, UserStateEntry
+from services.revocations import IRevocationEpochs, INACTIVE
+from services.user_state import IUserStateCache
+from services.verified_tokens import IVerifiedTokenCache
+from utils.single_flight import SingleFlight
 from utils.time import timestamp_to_datetime
-from utils.types import UserType
 from utils.exceptions import Custom401Exception, Custom403Exception
 
 
@@ -21,32 +26,107 @@ class IAuthenticate(ABC):
     @abstractmethod
     async def __call__(
         self, session: AsyncSession, token: str | bytes, *, access: bool = True
-    ) -> UserType: ...
+    ) -> UserStateEntry: ...
+
+    @abstractmethod
+    async def user_id(self, session: AsyncSession, token: str | bytes) -> int: ...
+
+    @abstractmethod
+    def decode(self, token: str | bytes, *, access: bool = True) -> JWTPayload: ...
+
+    @abstractmethod
+    def check(self, user: UserStateEntry, payload: JWTPayload) -> UserStateEntry: ...
+
+    @abstractmethod
+    def check_epoch(self, payload: JWTPayload) -> bool: ...
 
 
 class Authenticate(IAuthenticate):
-    def __init__(self, repo: IUserRepo):
+    def __init__(
+        self,
+        repo: IUserRepo,
+        user_state_cache: IUserStateCache,
+        key_ring: IKeyRing,
+        codec: IJWTCodec,
+        verified_token_cache: IVerifiedTokenCache,
+        revocation_epochs: IRevocationEpochs,
+    ):
         self.repo = repo
+        self.user_state_cache = user_state_cache
+        self.key_ring = key_ring
+        self.codec = codec
+        self.verified_token_cache = verified_token_cache
+        self.revocation_epochs = revocation_epochs
+        self._user_lookups: SingleFlight[int, UserStateEntry | None] = SingleFlight(
+            name="authenticate_user_lookups"
+        )
 
     async def __call__(
         self, session: AsyncSession, token: str | bytes, *, access: bool = True
-    ) -> UserType:
-        payload = self._decode_payload(token, access)
-        payload = self._payload_to_dataclass(payload)
+    ) -> UserStateEntry:
+        payload = self.decode(token, access=access)
+        # the epoch only rejects here, the state of the user is always loaded
+        self.check_epoch(payload)
+        user = await self._get_user(session, payload.user)
+        return self.check(user, payload)
+
+    async def user_id(self, session: AsyncSession, token: str | bytes) -> int:
+        """
+        Id of the user of the access token,
+        the user is not loaded, when the token is vouched for by its epoch.
+        """
+        payload = self.decode(token)
+        if self.check_epoch(payload):
+            return payload.user
         user = await self._get_user(session, payload.user)
+        return self.check(user, payload).id
+
+    def decode(self, token: str | bytes, *, access: bool = True) -> JWTPayload:
+        key = self._get_key(token, access)
+        payload = self.verified_token_cache.get(token, key)
+        if payload is None:
+            payload = self._payload_to_dataclass(self._decode_payload(token, key))
+            self.verified_token_cache.set(token, key, payload)
+        return payload
+
+    def check(self, user: UserStateEntry, payload: JWTPayload) -> UserStateEntry:
         self._check_tokens_revoked(user, payload)
         self._check_user_active(user)
         return user
 
-    def _decode_payload(self, token: str | bytes, access: bool) -> Dict:
+    def check_epoch(self, payload: JWTPayload) -> bool:
+        """
+        Check of the token by the revocation epoch, that does not need the DB.
+
+        Returns False, when the epochs map is not ready or the token has no epoch,
+        then the token must be checked against the user loaded from the DB.
+        """
+        if payload.rev is None or not self.revocation_epochs.ready:
+            return False
+
+        epoch = self.revocation_epochs.get(payload.user)
+        if epoch is not None and epoch > payload.rev:
+            if epoch == INACTIVE:
+                raise Custom403Exception(_("User is not active."))
+            raise Custom401Exception(_("Token is not correct."))
+        return True
+
+    def _decode_payload(self, token: str | bytes, key: JWTKey) -> Dict:
+        try:
+            return self.codec.decode(token, key)
+        except jwt.exceptions.PyJWTError:
+            raise Custom401Exception(_("Token is not correct."))
+
+    def _get_key(self, token: str | bytes, access: bool) -> JWTKey:
         try:
-            return jwt.decode(
-                token,
-                settings.ACCESS_SECRET_KEY if access else settings.REFRESH_SECRET_KEY,
-                algorithms=[settings.JWT_ALGORITHM],
+            key = self.key_ring.token_verifying_key(
+                TokenPurposeEnum.ACCESS if access else TokenPurposeEnum.REFRESH, token
             )
         except jwt.exceptions.PyJWTError:
+            key = None
+        if key is None:
             raise Custom401Exception(_("Token is not correct."))
+        return key
 
     def _payload_to_dataclass(self, payload: Dict) -> JWTPayload:
         try:
@@ -59,18 +139,33 @@ class Authenticate(IAuthenticate):
             )
             raise Custom401Exception(_("Token is not correct."))
 
-    async def _get_user(self, session: AsyncSession, user_id: int) -> UserType:
-        user: UserType = await self.repo.get_by_id(session, user_id)
-        if not user:
+    async def _get_user(self, session: AsyncSession, user_id: int) -> UserStateEntry:
+        state = (await self.user_state_cache.get_many([user_id])).get(user_id)
+        if state is not None:
+            return state
+
+        # concurrent requests of the same user share one query
+        state = await self._user_lookups(
+            user_id, lambda: self._load_user(session, user_id)
+        )
+        if state is None:
             raise Custom401Exception(_("Token is not correct."))
-        return user
+        return state
+
+    async def _load_user(
+        self, session: AsyncSession, user_id: int
+    ) -> UserStateEntry | None:
+        user = await self.repo.get_by_id(session, user_id)
+        if not user:
+            return None
+        return (await self.user_state_cache.set_many([user]))[user.id]
 
-    def _check_tokens_revoked(self, user: UserType, payload: JWTPayload) -> None:
+    def _check_tokens_revoked(self, user: UserStateEntry, payload: JWTPayload) -> None:
         if user.tokens_revoked_at and user.tokens_revoked_at > timestamp_to_datetime(
             payload.created_at
         ):
             raise Custom401Exception(_("Token is not correct."))
 
-    def _check_user_active(self, user: UserType) -> None:
+    def _check_user_active(self, user: UserStateEntry) -> None:
         if not user.is_active:
             raise Custom403Exception(_("User is not active."))
@@ -0,0 +1,105 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.i18n import _
+from services.authenticate import IAuthenticate
+from services.entries import AuthResultEntry, JWTPayload, UserStateEntry
+from services.repo import IUserRepo
+from services.user_state import IUserStateCache
+from utils.exceptions import CustomException, Custom401Exception
+
+
+class IAuthenticateBatch(ABC):
+    @abstractmethod
+    async def __call__(
+        self, session: AsyncSession, tokens: Sequence[str], *, access: bool = True
+    ) -> List[AuthResultEntry]: ...
+
+
+class AuthenticateBatch(IAuthenticateBatch):
+    """
+    Authentication of several tokens at once.
+
+    Tokens, that can be checked by the revocation epoch, do not need the users,
+    users, that are not in the user-state cache, are loaded with a single query,
+    the rest of the checks are the same as for a single token.
+    Results are returned in the order of the given tokens.
+    """
+
+    def __init__(
+        self,
+        authenticate: IAuthenticate,
+        user_state_cache: IUserStateCache,
+        repo: IUserRepo,
+    ) -> None:
+        self.authenticate = authenticate
+        self.user_state_cache = user_state_cache
+        self.repo = repo
+
+    async def __call__(
+        self, session: AsyncSession, tokens: Sequence[str], *, access: bool = True
+    ) -> List[AuthResultEntry]:
+        payloads = [self._decode(token, access) for token in tokens]
+        results = [self._check_epoch(payload) for payload in payloads]
+        users = await self._get_users(
+            session,
+            {
+                payload.user
+                for payload, result in zip(payloads, results)
+                if result is None
+            },
+        )
+        return [
+            result or self._check(users, payload)
+            for payload, result in zip(payloads, results)
+        ]
+
+    def _decode(self, token: str, access: bool) -> JWTPayload | AuthResultEntry:
+        try:
+            return self.authenticate.decode(token, access=access)
+        except CustomException as e:
+            return AuthResultEntry(error_message=str(e.detail))
+
+    def _check_epoch(
+        self, payload: JWTPayload | AuthResultEntry
+    ) -> AuthResultEntry | None:
+        if isinstance(payload, AuthResultEntry):
+            return payload
+
+        try:
+            checked = self.authenticate.check_epoch(payload)
+        except CustomException as e:
+            return AuthResultEntry(error_message=str(e.detail))
+        return AuthResultEntry(user_id=payload.user) if checked else None
+
+    async def _get_users(
+        self, session: AsyncSession, user_ids: Iterable[int]
+    ) -> Dict[int, UserStateEntry]:
+        user_ids = set(user_ids)
+        users = await self.user_state_cache.get_many(user_ids)
+        missing = [user_id for user_id in user_ids if user_id not in users]
+        if missing:
+            users.update(
+                await self.user_state_cache.set_many(
+                    await self.repo.get_many_by_ids(session, missing)
+                )
+            )
+        return users
+
+    def _check(
+        self,
+        users: Dict[int, UserStateEntry],
+        payload: JWTPayload | AuthResultEntry,
+    ) -> AuthResultEntry:
+        if isinstance(payload, AuthResultEntry):
+            return payload
+
+        try:
+            user = users.get(payload.user)
+            if user is None:
+                raise Custom401Exception(_("Token is not correct."))
+            return AuthResultEntry(user_id=self.authenticate.check(user, payload).id)
+        except CustomException as e:
+            return AuthResultEntry(error_message=str(e.detail))
@@ -1,3 +1,4 @@
 from .check import ICheckCode, CheckCode
-from .create import ICreateCode, CreateCode
+from .create import ICreateCode, CreateCode, generate_code
 from .send import ISendCode, SendCode
+from .purge import IPurgeCodes, PurgeCodes
@@ -2,8 +2,9 @@ from abc import ABC, abstractmethod
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .types import CodeType, CodeTypeEnum
+from .types import CodeTypeEnum
 from .repo import ICodeRepo
+from ..entries import LastCodeEntry
 from config import settings
 from config.i18n import _
 from utils.types import UserType
@@ -46,12 +47,12 @@ class CheckCode(ICheckCode):
 
     async def _get_last_code(
         self, session: AsyncSession, user: UserType, type: CodeTypeEnum
-    ) -> CodeType | None:
-        return await self.repo.get_last(session, user.id, type)
+    ) -> LastCodeEntry | None:
+        return await self.repo.get_last_entry(session, user.id, type)
 
     def _is_valid(
         self,
-        last_code: CodeType | None,
+        last_code: LastCodeEntry | None,
         code: str,
         type: CodeTypeEnum,
         raise_exception: bool,
@@ -15,6 +15,13 @@ from utils.exceptions import Custom400Exception
 from utils.random import get_random_string
 
 
+def generate_code() -> str:
+    return get_random_string(
+        length=settings.CONFIRMATION_CODE_LENGTH,
+        allowed_characters=settings.CONFIRMATION_CODE_CHARACTERS,
+    )
+
+
 class ICreateCode(ABC):
     @abstractmethod
     async def __call__(
@@ -48,13 +55,13 @@ class CreateCode(ICreateCode):
         await self._check_has_active(session, user, type)
         code = await self._create_code(session, user, type)
         if send:
-            return self._send_code(user.email, code)
+            return await self._send_code(session, user.email, code)
         return code.code
 
     async def _check_has_active(
         self, session: AsyncSession, user: UserType, type: CodeTypeEnum
     ) -> None:
-        last_code = await self.repo.get_last(session, user.id, type)
+        last_code = await self.repo.get_last_entry(session, user.id, type)
         if not last_code:
             return
 
@@ -72,15 +79,14 @@ class CreateCode(ICreateCode):
             session,
             entry=CreateCodeEntry(
                 user_id=user.id,
-                code=get_random_string(
-                    length=settings.CONFIRMATION_CODE_LENGTH,
-                    allowed_characters=settings.CONFIRMATION_CODE_CHARACTERS,
-                ),
+                code=generate_code(),
                 type=type,
             ),
         )
 
-    def _send_code(self, email: str, code: CodeType) -> CodeSentSchema:
-        return self.send_code(
-            entry=SendCodeEntry(email=email, code=code.code, type=code.type)
+    async def _send_code(
+        self, session: AsyncSession, email: str, code: CodeType
+    ) -> CodeSentSchema:
+        return await self.send_code(
+            session, entry=SendCodeEntry(email=email, code=code.code, type=code.type)
         )
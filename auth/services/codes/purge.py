@@ -0,0 +1,49 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .repo import ICodeRepo
+from utils.batched_delete import PeriodicBatchedDelete
+
+
+class IPurgeCodes(ABC):
+    @abstractmethod
+    async def run(self) -> None: ...
+
+    @abstractmethod
+    async def purge(self) -> int: ...
+
+
+class PurgeCodes(PeriodicBatchedDelete, IPurgeCodes):
+    """
+    Deletes the codes older than `retention` seconds every `interval` seconds,
+    a code can neither be checked nor delay a new one after its duration,
+    so `retention` is the longest duration of the code types.
+    """
+
+    name = "code_purge"
+    title = "Codes purge"
+
+    def __init__(
+        self,
+        db,
+        repo: ICodeRepo,
+        *,
+        retention: float,
+        batch_size: int = 500,
+        interval: float = 300,
+    ) -> None:
+        super().__init__(db, age=retention, batch_size=batch_size, interval=interval)
+        self.repo = repo
+
+    async def purge(self) -> int:
+        """
+        Deletes all the expired codes, returns their count.
+        """
+        return await self.delete()
+
+    async def _delete_batch(
+        self, session: AsyncSession, created_before: datetime
+    ) -> int:
+        return await self.repo.delete_expired(session, created_before, self.batch_size)
@@ -1,14 +1,18 @@
 from abc import abstractmethod
+from datetime import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .types import CodeTypeEnum
-from ..entries import CreateCodeEntry
+from ..entries import CreateCodeEntry, LastCodeEntry
 from models.codes import Code
 from utils.repo import IRepo
 
 
 class ICodeRepo(IRepo):
+    # the codes are written by the statements of the session
+    transactional: bool = True
+
     @abstractmethod
     async def create(self, session: AsyncSession, entry: CreateCodeEntry) -> Code: ...
 
@@ -16,3 +20,13 @@ class ICodeRepo(IRepo):
     async def get_last(
         self, session: AsyncSession, user_id: int, type: CodeTypeEnum
     ) -> Code | None: ...
+
+    @abstractmethod
+    async def get_last_entry(
+        self, session: AsyncSession, user_id: int, type: CodeTypeEnum
+    ) -> LastCodeEntry | None: ...
+
+    @abstractmethod
+    async def delete_expired(
+        self, session: AsyncSession, created_before: datetime, limit: int
+    ) -> int: ...
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from ..entries import SendCodeEntry
 from .types import CodeTypeEnum
 from config.mail import ISendEmail, SendEmailEntry
@@ -10,7 +12,9 @@ from utils.email import safe_email_str
 
 class ISendCode(ABC):
     @abstractmethod
-    def __call__(self, entry: SendCodeEntry) -> CodeSentSchema:
+    async def __call__(
+        self, session: AsyncSession, entry: SendCodeEntry
+    ) -> CodeSentSchema:
         ...
 
 
@@ -31,17 +35,20 @@ class SendCode(ISendCode):
     def __init__(self, send_email: ISendEmail) -> None:
         self.send_email = send_email
 
-    def __call__(self, entry: SendCodeEntry) -> CodeSentSchema:
-        self._send_email(entry)
+    async def __call__(
+        self, session: AsyncSession, entry: SendCodeEntry
+    ) -> CodeSentSchema:
+        await self._send_email(session, entry)
         return self._result(entry)
 
-    def _send_email(self, entry: SendCodeEntry) -> None:
-        self.send_email(
+    async def _send_email(self, session: AsyncSession, entry: SendCodeEntry) -> None:
+        await self.send_email(
+            session,
             entry=SendEmailEntry(
                 emails=[entry.email],
                 subject=self.subject_map[entry.type],
                 message=self.message_map[entry.type] % {"code": entry.code},
-            )
+            ),
         )
 
     def _result(self, entry: SendCodeEntry) -> CodeSentSchema:
@@ -1,5 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import List
 
 from .codes.types import CodeTypeEnum
 
@@ -16,6 +17,34 @@ class JWTPayload:
     user: int
     exp: datetime
     created_at: datetime
+    rev: float | None = None
+
+
+@dataclass
+class UserStateEntry:
+    id: int
+    is_active: bool
+    tokens_revoked_at: datetime | None
+    email_confirmed: bool
+
+
+@dataclass
+class RevocationEventEntry:
+    user_id: int
+    revoked_at: float
+    is_active: bool
+
+
+@dataclass
+class RevocationEventsEntry:
+    events: List[RevocationEventEntry]
+    cursor: float
+
+
+@dataclass
+class AuthResultEntry:
+    user_id: int | None = None
+    error_message: str | None = None
 
 
 @dataclass
@@ -25,6 +54,19 @@ class CreateCodeEntry:
     type: CodeTypeEnum
 
 
+@dataclass
+class LastCodeEntry:
+    code: str
+    created_at: datetime
+
+
+@dataclass
+class RegistrationEntry:
+    user_id: int | None = None
+    # names of the unique indexes, the registration conflicts with
+    conflicts: List[str] = field(default_factory=list)
+
+
 @dataclass
 class SendCodeEntry:
     email: str
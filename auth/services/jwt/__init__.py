@@ -1,3 +1,7 @@
 from .create import ICreateJWTTokens, CreateJWTTokens
 from .refresh import IRefreshJWTTokens, RefreshJWTTokens
 from .revoke import IRevokeJWTTokens, RevokeJWTTokens
+from .key_ring import IKeyRing, KeyRing, JWTKey
+from .codec import IJWTCodec, PyJWTCodec, HS256Codec
+from .jwks import IGetJWKS, GetJWKS
+from .types import TokenPurposeEnum
@@ -0,0 +1,152 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import jwt
+import orjson
+
+from .key_ring import JWTKey
+
+
+HS256 = "HS256"
+CLAIMS_TYPES = {"user": int, "exp": (int, float), "created_at": (int, float)}
+OPTIONAL_CLAIMS_TYPES = {"rev": (int, float)}
+PREPARED_KEYS_MAX_SIZE = 64
+
+
+class IJWTCodec(ABC):
+    @abstractmethod
+    def encode(self, payload: Dict, key: JWTKey) -> str: ...
+
+    @abstractmethod
+    def decode(self, token: str | bytes, key: JWTKey) -> Dict: ...
+
+
+class PyJWTCodec(IJWTCodec):
+    def encode(self, payload: Dict, key: JWTKey) -> str:
+        return jwt.encode(
+            payload=payload,
+            key=key.signing_key,
+            algorithm=key.algorithm,
+            headers={"kid": key.kid} if key.kid else None,
+        )
+
+    def decode(self, token: str | bytes, key: JWTKey) -> Dict:
+        return jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+
+@dataclass
+class _HS256Key:
+    mac: "hmac.HMAC"
+    header_segment: bytes
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(segment: bytes) -> bytes | None:
+    try:
+        data = base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+    except (binascii.Error, ValueError):
+        return None
+    # only canonical encoding is accepted, as PyJWT does
+    return data if _b64encode(data) == segment else None
+
+
+class HS256Codec(IJWTCodec):
+    """
+    HS256 tokens with our claims set, without the generic PyJWT machinery.
+
+    HMAC state with the key is computed once and copied for every token,
+    the header segment is built once per key and JSON is handled by orjson.
+    Issued tokens are byte-for-byte the same as the ones of PyJWT.
+
+    Only tokens, that look exactly like the issued ones, are decoded here:
+    the header segment is the one of the key and the payload has only
+    `user`, `exp`, `created_at` and optional `rev` of the expected types.
+    Anything else, including tokens with a bad signature, is given to `fallback`,
+    so the result never differs from the one of PyJWT.
+    """
+
+    def __init__(self, fallback: IJWTCodec) -> None:
+        self.fallback = fallback
+        self._keys: Dict[Tuple[str | None, bytes], _HS256Key] = {}
+
+    def encode(self, payload: Dict, key: JWTKey) -> str:
+        if key.algorithm != HS256:
+            return self.fallback.encode(payload, key)
+
+        prepared = self._prepare(key)
+        signing_input = (
+            prepared.header_segment + b"." + _b64encode(orjson.dumps(payload))
+        )
+        return (signing_input + b"." + self._sign(prepared, signing_input)).decode()
+
+    def decode(self, token: str | bytes, key: JWTKey) -> Dict:
+        if key.algorithm != HS256:
+            return self.fallback.decode(token, key)
+
+        payload = self._decode(token, self._prepare(key))
+        if payload is None:
+            return self.fallback.decode(token, key)
+        if int(payload["exp"]) <= time.time():
+            raise jwt.exceptions.ExpiredSignatureError("Signature has expired")
+        return payload
+
+    def _decode(self, token: str | bytes, prepared: _HS256Key) -> Dict | None:
+        if isinstance(token, str):
+            token = token.encode()
+        signing_input, _, signature = token.rpartition(b".")
+        header_segment, _, payload_segment = signing_input.partition(b".")
+        if header_segment != prepared.header_segment:
+            return None
+        if not hmac.compare_digest(self._sign(prepared, signing_input), signature):
+            return None
+
+        data = _b64decode(payload_segment)
+        if data is None:
+            return None
+        try:
+            payload = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return None
+        if type(payload) is not dict or not CLAIMS_TYPES.keys() <= payload.keys():
+            return None
+        for claim, value in payload.items():
+            types = CLAIMS_TYPES.get(claim) or OPTIONAL_CLAIMS_TYPES.get(claim)
+            if types is None or not isinstance(value, types):
+                return None
+        return payload
+
+    def _sign(self, prepared: _HS256Key, signing_input: bytes) -> bytes:
+        mac = prepared.mac.copy()
+        mac.update(signing_input)
+        return _b64encode(mac.digest())
+
+    def _prepare(self, key: JWTKey) -> _HS256Key:
+        cache_key = (key.kid, key.signing_key)
+        try:
+            return self._keys[cache_key]
+        except KeyError:
+            pass
+
+        header = {"alg": HS256, "typ": "JWT"}
+        if key.kid:
+            header["kid"] = key.kid
+        prepared = _HS256Key(
+            mac=hmac.new(key.signing_key, digestmod=hashlib.sha256),
+            header_segment=_b64encode(
+                orjson.dumps(header, option=orjson.OPT_SORT_KEYS)
+            ),
+        )
+        # keys of the reloaded files must not pile up
+        if len(self._keys) >= PREPARED_KEYS_MAX_SIZE:
+            self._keys.clear()
+        self._keys[cache_key] = prepared
+        return prepared
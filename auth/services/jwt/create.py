@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
 from datetime import timedelta
+from typing import Dict
 
-import jwt
-
+from .codec import IJWTCodec
+from .key_ring import IKeyRing
+from .types import TokenPurposeEnum
+from ..revocations import get_revocation_epoch
 from schemas import JWTTokensSchema
 from config import settings
 from utils.types import UserType
@@ -15,6 +18,10 @@ class ICreateJWTTokens(ABC):
 
 
 class CreateJWTTokens(ICreateJWTTokens):
+    def __init__(self, key_ring: IKeyRing, codec: IJWTCodec) -> None:
+        self.key_ring = key_ring
+        self.codec = codec
+
     def __call__(self, user: UserType) -> JWTTokensSchema:
         return JWTTokensSchema(
             access=self._make_access(user), refresh=self._make_refresh(user)
@@ -28,12 +35,9 @@ class CreateJWTTokens(ICreateJWTTokens):
                 current_time + timedelta(minutes=settings.ACCESS_TOKEN_LIFETIME)
             ).timestamp(),
             "created_at": current_time.timestamp(),
+            "rev": get_revocation_epoch(user.tokens_revoked_at),
         }
-        return jwt.encode(
-            payload=payload,
-            key=settings.ACCESS_SECRET_KEY,
-            algorithm=settings.JWT_ALGORITHM,
-        )
+        return self._encode(payload, TokenPurposeEnum.ACCESS)
 
     def _make_refresh(self, user: UserType) -> str:
         current_time = get_current_time()
@@ -43,9 +47,9 @@ class CreateJWTTokens(ICreateJWTTokens):
                 current_time + timedelta(minutes=settings.REFRESH_TOKEN_LIFETIME)
             ).timestamp(),
             "created_at": current_time.timestamp(),
+            "rev": get_revocation_epoch(user.tokens_revoked_at),
         }
-        return jwt.encode(
-            payload=payload,
-            key=settings.REFRESH_SECRET_KEY,
-            algorithm=settings.JWT_ALGORITHM,
-        )
+        return self._encode(payload, TokenPurposeEnum.REFRESH)
+
+    def _encode(self, payload: Dict, purpose: TokenPurposeEnum) -> str:
+        return self.codec.encode(payload, self.key_ring.signing_key(purpose))
@@ -0,0 +1,33 @@
+from abc import ABC, abstractmethod
+from typing import Dict
+
+from .key_ring import IKeyRing, JWTKey
+from .types import TokenPurposeEnum
+
+
+class IGetJWKS(ABC):
+    @abstractmethod
+    def __call__(self) -> Dict: ...
+
+
+class GetJWKS(IGetJWKS):
+    """
+    JSON Web Key Set with the public keys of access tokens.
+
+    Refresh tokens are verified by this service only, so their keys are not published.
+    """
+
+    def __init__(self, key_ring: IKeyRing) -> None:
+        self.key_ring = key_ring
+
+    def __call__(self) -> Dict:
+        return {
+            "keys": [
+                self._to_jwk(key)
+                for key in self.key_ring.public_keys(TokenPurposeEnum.ACCESS)
+            ]
+        }
+
+    def _to_jwk(self, key: JWTKey) -> Dict:
+        jwk = key.algorithm_obj.to_jwk(key.verifying_key, as_dict=True)
+        return {**jwk, "kid": key.kid, "alg": key.algorithm, "use": "sig"}
@@ -0,0 +1,237 @@
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import jwt
+from jwt.algorithms import Algorithm, get_default_algorithms
+
+from .types import TokenPurposeEnum
+
+
+logger = logging.getLogger("auth")
+
+HMAC_ALGORITHMS = ("HS256", "HS384", "HS512")
+HEADERS_CACHE_MAX_SIZE = 1024
+
+
+@dataclass
+class JWTKey:
+    kid: str | None
+    algorithm: str
+    algorithm_obj: Algorithm
+    signing_key: Any
+    verifying_key: Any
+
+    @property
+    def is_public(self) -> bool:
+        return self.algorithm not in HMAC_ALGORITHMS
+
+
+@dataclass
+class JWTKeySet:
+    signing_kid: str | None
+    keys: Dict[str | None, JWTKey]
+
+
+class IKeyRing(ABC):
+    @abstractmethod
+    def signing_key(self, purpose: TokenPurposeEnum) -> JWTKey: ...
+
+    @abstractmethod
+    def verifying_key(
+        self, purpose: TokenPurposeEnum, kid: str | None
+    ) -> JWTKey | None: ...
+
+    @abstractmethod
+    def token_verifying_key(
+        self, purpose: TokenPurposeEnum, token: str | bytes
+    ) -> JWTKey | None: ...
+
+    @abstractmethod
+    def public_keys(self, purpose: TokenPurposeEnum) -> List[JWTKey]: ...
+
+
+class KeyRing(IKeyRing):
+    """
+    Keys for signing and verifying tokens of each purpose.
+
+    Keys are read from the JSON file at `path` of the following structure:
+
+        {
+            "access": {
+                "signing_kid": "2024-02",
+                "keys": [
+                    {"kid": "2024-02", "algorithm": "ES256", "private_key": "<PEM>"},
+                    {"kid": "2024-01", "algorithm": "RS256", "public_key": "<PEM>"}
+                ]
+            },
+            "refresh": {...}
+        }
+
+    Every listed key is accepted for verification, so a new key can be added
+    and made the signing one while tokens signed by the old one are still valid.
+    Keys without a private part are used for verification only.
+    HMAC keys are given by `secret` instead of the PEM keys.
+
+    Shared secrets from the settings are kept as keys without `kid`,
+    they sign tokens of the purpose, that is missing in the file,
+    and verify tokens, that were issued before the keys file was introduced.
+
+    PEM keys are parsed once, when the file is loaded, and PyJWT gets ready key objects.
+    All tokens signed by a key share the same header segment,
+    so `kid` of a known header segment is taken from a dictionary without parsing.
+    The file is checked for changes every `reload_interval` seconds,
+    a changed file replaces all the keys at once, a broken one is logged and ignored.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        algorithm: str,
+        access_secret: str,
+        refresh_secret: str,
+        reload_interval: int = 0,
+    ) -> None:
+        self.path = path
+        self.algorithm = algorithm
+        self.access_secret = access_secret
+        self.refresh_secret = refresh_secret
+        self.reload_interval = reload_interval
+        self._algorithms = get_default_algorithms()
+        self._mtime: float | None = None
+        self._checked_at = time.monotonic()
+        self._header_kids: Dict[str | bytes, str | None] = {}
+        self._key_sets = self._load()
+
+    def signing_key(self, purpose: TokenPurposeEnum) -> JWTKey:
+        self._reload_if_changed()
+        key_set = self._key_sets[purpose]
+        return key_set.keys[key_set.signing_kid]
+
+    def verifying_key(
+        self, purpose: TokenPurposeEnum, kid: str | None
+    ) -> JWTKey | None:
+        self._reload_if_changed()
+        return self._key_sets[purpose].keys.get(kid)
+
+    def token_verifying_key(
+        self, purpose: TokenPurposeEnum, token: str | bytes
+    ) -> JWTKey | None:
+        return self.verifying_key(purpose, self._get_kid(token))
+
+    def public_keys(self, purpose: TokenPurposeEnum) -> List[JWTKey]:
+        self._reload_if_changed()
+        return [key for key in self._key_sets[purpose].keys.values() if key.is_public]
+
+    def reload(self) -> None:
+        try:
+            self._key_sets = self._load()
+        except Exception as e:
+            logger.error(
+                f"JWT keys file can not be loaded - {str(e)}",
+                extra={"path": self.path},
+                exc_info=e,
+            )
+        else:
+            logger.info("JWT keys are reloaded.", extra={"path": self.path})
+
+    def _get_kid(self, token: str | bytes) -> str | None:
+        header = token[: token.find("." if isinstance(token, str) else b".")]
+        try:
+            return self._header_kids[header]
+        except KeyError:
+            pass
+
+        kid = jwt.get_unverified_header(token).get("kid")
+        if len(self._header_kids) < HEADERS_CACHE_MAX_SIZE:
+            self._header_kids[header] = kid
+        return kid
+
+    def _reload_if_changed(self) -> None:
+        if not self.path or self.reload_interval <= 0:
+            return
+
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            logger.error(
+                f"JWT keys file is not available - {str(e)}", extra={"path": self.path}
+            )
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    def _load(self) -> Dict[TokenPurposeEnum, JWTKeySet]:
+        key_sets = {
+            TokenPurposeEnum.ACCESS: self._legacy_key_set(self.access_secret),
+            TokenPurposeEnum.REFRESH: self._legacy_key_set(self.refresh_secret),
+        }
+        if not self.path:
+            return key_sets
+
+        mtime = os.stat(self.path).st_mtime
+        with open(self.path) as file:
+            data = json.load(file)
+
+        for purpose in TokenPurposeEnum:
+            if purpose.value not in data:
+                continue
+
+            key_set = key_sets[purpose]
+            for item in data[purpose.value]["keys"]:
+                key = self._parse_key(item)
+                key_set.keys[key.kid] = key
+            key_set.signing_kid = data[purpose.value]["signing_kid"]
+            if key_set.keys[key_set.signing_kid].signing_key is None:
+                raise ValueError(
+                    f"Signing key `{key_set.signing_kid}` has no private part."
+                )
+
+        self._mtime = mtime
+        return key_sets
+
+    def _legacy_key_set(self, secret: str) -> JWTKeySet:
+        if not secret:
+            return JWTKeySet(signing_kid=None, keys={})
+        return JWTKeySet(
+            signing_kid=None,
+            keys={None: self._make_key(None, self.algorithm, secret, secret)},
+        )
+
+    def _parse_key(self, item: Dict) -> JWTKey:
+        algorithm = item["algorithm"]
+        if algorithm in HMAC_ALGORITHMS:
+            return self._make_key(
+                item["kid"], algorithm, item["secret"], item["secret"]
+            )
+
+        private_key = item.get("private_key")
+        return self._make_key(
+            item["kid"], algorithm, private_key, item.get("public_key")
+        )
+
+    def _make_key(
+        self,
+        kid: str | None,
+        algorithm: str,
+        signing_key: str | None,
+        verifying_key: str | None,
+    ) -> JWTKey:
+        algorithm_obj = self._algorithms[algorithm]
+        signing_key = signing_key and algorithm_obj.prepare_key(signing_key)
+        if verifying_key:
+            verifying_key = algorithm_obj.prepare_key(verifying_key)
+        elif algorithm in HMAC_ALGORITHMS:
+            verifying_key = signing_key
+        else:
+            verifying_key = signing_key.public_key()
+        return JWTKey(kid, algorithm, algorithm_obj, signing_key, verifying_key)
@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..repo import IUserRepo
+from ..revocations import IRevocationEpochs, get_revocation_epoch
+from ..user_state import IUserStateCache
 from utils.types import UserType
 from utils.time import get_current_time
 
@@ -13,13 +17,43 @@ class IRevokeJWTTokens(ABC):
 
 
 class RevokeJWTTokens(IRevokeJWTTokens):
-    def __init__(self, repo: IUserRepo) -> None:
+    def __init__(
+        self,
+        repo: IUserRepo,
+        user_state_cache: IUserStateCache,
+        revocation_epochs: IRevocationEpochs,
+    ) -> None:
         self.repo = repo
+        self.user_state_cache = user_state_cache
+        self.revocation_epochs = revocation_epochs
 
     async def __call__(self, session: AsyncSession, user: UserType) -> None:
-        await self._update_revokation_time(session, user)
+        revoked_at = await self._update_revokation_time(session, user)
+        self._invalidate_user_state(session, user)
+        self._update_revocation_epoch(session, user, revoked_at)
 
     async def _update_revokation_time(
         self, session: AsyncSession, user: UserType
+    ) -> datetime:
+        revoked_at = get_current_time()
+        await self.repo.update(session, user, {"tokens_revoked_at": revoked_at})
+        return revoked_at
+
+    def _update_revocation_epoch(
+        self, session: AsyncSession, user: UserType, revoked_at: datetime
     ) -> None:
-        await self.repo.update(session, user, {"tokens_revoked_at": get_current_time()})
+        epoch = get_revocation_epoch(revoked_at)
+        # the epoch rejects tokens without the DB, so it waits for the commit,
+        # a rolled back revocation must not reject the tokens of the user
+        if isinstance(session, AsyncSession):
+            event.listen(
+                session.sync_session,
+                "after_commit",
+                lambda _: self.revocation_epochs.revoke(user.id, epoch),
+                once=True,
+            )
+        else:
+            self.revocation_epochs.revoke(user.id, epoch)
+
+    def _invalidate_user_state(self, session: AsyncSession, user: UserType) -> None:
+        self.user_state_cache.invalidate(session, user.id)
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class TokenPurposeEnum(Enum):
+    ACCESS = "access"
+    REFRESH = "refresh"
@@ -6,7 +6,8 @@ from config.i18n import _
 from schemas import LoginSchema, JWTTokensSchema
 from .jwt import CreateJWTTokens
 from .repo import IUserRepo
-from .password import ICheckPassword
+from .password import IAsyncCheckPassword
+from utils.single_flight import SingleFlight
 from utils.types import UserType
 from utils.exceptions import Custom401Exception
 from utils.shortcuts import get_object_or_404
@@ -23,27 +24,40 @@ class LoginUser(ILoginUser):
     def __init__(
         self,
         create_jwt_tokens: CreateJWTTokens,
-        check_password: ICheckPassword,
+        check_password: IAsyncCheckPassword,
         repo: IUserRepo,
     ) -> None:
         self.create_jwt_tokens = create_jwt_tokens
         self.check_password = check_password
         self.repo = repo
+        self._user_lookups: SingleFlight[str, UserType | None] = SingleFlight(
+            name="login_user_lookups"
+        )
 
     async def __call__(
         self, session: AsyncSession, entry: LoginSchema
     ) -> JWTTokensSchema:
         user = await self._get_user_by_login(session, entry.login)
-        self._check_password(user, entry.password)
+        await self._check_password(user, entry.password)
         return self._make_tokens(user)
 
     async def _get_user_by_login(self, session: AsyncSession, login: str) -> UserType:
+        # concurrent logins with the same login share one query
         return get_object_or_404(
-            await self.repo.get_by_login(session, login), msg="User not found."
+            await self._user_lookups(login, lambda: self._load_user(session, login)),
+            msg="User not found.",
         )
 
-    def _check_password(self, user: UserType, password: str) -> None:
-        if not self.check_password(password, user.password):
+    async def _load_user(self, session: AsyncSession, login: str) -> UserType | None:
+        user = await self.repo.get_by_login(session, login)
+        if user is not None:
+            # the user is shared with the requests of other sessions,
+            # it must stay loaded after this session is committed
+            session.expunge(user)
+        return user
+
+    async def _check_password(self, user: UserType, password: str) -> None:
+        if not await self.check_password(password, user.password):
             raise Custom401Exception(_("Wrong password."))
 
     def _make_tokens(self, user: UserType) -> JWTTokensSchema:
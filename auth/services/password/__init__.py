@@ -1,5 +1,10 @@
 from .change import IChangePassword, ChangePassword
-from .check import ICheckPassword, CheckPassword
-from .hash import IHashPassword, HashPassword
+from .check import (
+    ICheckPassword,
+    CheckPassword,
+    IAsyncCheckPassword,
+    AsyncCheckPassword,
+)
+from .hash import IHashPassword, HashPassword, IAsyncHashPassword, AsyncHashPassword
 from .reset import IResetPassword, ResetPassword
 from .confirm_reset import IConfirmResetPassword, ConfirmResetPassword
@@ -2,11 +2,12 @@ from abc import ABC, abstractmethod
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .check import ICheckPassword
-from .hash import IHashPassword
+from .check import IAsyncCheckPassword
+from .hash import IAsyncHashPassword
 from ..jwt import IRevokeJWTTokens
 from ..validators import IValidate
 from ..repo import IUserRepo
+from ..user_state import IUserStateCache
 from schemas import ChangePasswordSchema
 from utils.types import UserType
 from utils.exceptions import Custom400Exception
@@ -24,32 +25,35 @@ class IChangePassword(ABC):
 class ChangePassword(IChangePassword):
     def __init__(
         self,
-        check_password: ICheckPassword,
+        check_password: IAsyncCheckPassword,
         validate_password: IValidate,
-        hash_password: IHashPassword,
+        hash_password: IAsyncHashPassword,
         revoke_jwt_tokens: IRevokeJWTTokens,
+        user_state_cache: IUserStateCache,
         repo: IUserRepo,
     ) -> None:
         self.check_password = check_password
         self.validate_password = validate_password
         self.hash_password = hash_password
         self.revoke_jwt_tokens = revoke_jwt_tokens
+        self.user_state_cache = user_state_cache
         self.repo = repo
 
     async def __call__(
         self, session: AsyncSession, user_id: int, entry: ChangePasswordSchema
     ) -> None:
         user = await self._get_user(session, user_id)
-        self._chech_current_password(user, entry.current_password)
+        await self._chech_current_password(user, entry.current_password)
         self._validate_new_password(entry)
         await self._set_password(session, user, entry.new_password)
         await self._revoke_jwt_tokens(session, user)
+        self._invalidate_user_state(session, user)
 
     async def _get_user(self, session: AsyncSession, user_id: int) -> UserType:
         return get_object_or_404(await self.repo.get_by_id(session, id=user_id))
 
-    def _chech_current_password(self, user: UserType, password: str) -> None:
-        if not self.check_password(password, user.password):
+    async def _chech_current_password(self, user: UserType, password: str) -> None:
+        if not await self.check_password(password, user.password):
             raise Custom400Exception(_("Wrong password."))
 
     def _validate_new_password(self, entry: ChangePasswordSchema) -> None:
@@ -65,8 +69,11 @@ class ChangePassword(IChangePassword):
         self, session: AsyncSession, user: UserType, password: str
     ) -> None:
         await self.repo.update(
-            session, user, {"password": self.hash_password(password)}
+            session, user, {"password": await self.hash_password(password)}
         )
 
     async def _revoke_jwt_tokens(self, session: AsyncSession, user: UserType) -> None:
         await self.revoke_jwt_tokens(session, user)
+
+    def _invalidate_user_state(self, session: AsyncSession, user: UserType) -> None:
+        self.user_state_cache.invalidate(session, user.id)
@@ -1,9 +1,8 @@
+import asyncio
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
 
-import bcrypt
-
-
-ENCODING = "utf-8"
+from utils.password import bcrypt_check
 
 
 class ICheckPassword(ABC):
@@ -14,4 +13,20 @@ class ICheckPassword(ABC):
 
 class CheckPassword(ICheckPassword):
     def __call__(self, plain_pwd: str, hashed_pwd: str) -> bool:
-        return bcrypt.checkpw(plain_pwd.encode(ENCODING), hashed_pwd.encode(ENCODING))
+        return bcrypt_check(plain_pwd, hashed_pwd)
+
+
+class IAsyncCheckPassword(ABC):
+    @abstractmethod
+    async def __call__(self, plain_pwd: str, hashed_pwd: str) -> bool:
+        ...
+
+
+class AsyncCheckPassword(IAsyncCheckPassword):
+    def __init__(self, executor: Executor) -> None:
+        self.executor = executor
+
+    async def __call__(self, plain_pwd: str, hashed_pwd: str) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, bcrypt_check, plain_pwd, hashed_pwd
+        )
@@ -6,7 +6,7 @@ from ..codes import ICheckCode
 from ..repo import IUserRepo
 from ..validators import IValidate
 from ..entries import CodeTypeEnum
-from ..password import IHashPassword, ICheckPassword
+from ..password import IAsyncHashPassword, IAsyncCheckPassword
 from config.i18n import _
 from schemas import ResetPasswordConfirmSchema
 from utils.types import UserType
@@ -26,8 +26,8 @@ class ConfirmResetPassword(IConfirmResetPassword):
         self,
         check_code: ICheckCode,
         validate_password: IValidate,
-        hash_password: IHashPassword,
-        check_password: ICheckPassword,
+        hash_password: IAsyncHashPassword,
+        check_password: IAsyncCheckPassword,
         repo: IUserRepo,
     ) -> None:
         self.check_code = check_code
@@ -41,7 +41,7 @@ class ConfirmResetPassword(IConfirmResetPassword):
     ) -> None:
         user = await self._get_user(session, entry)
         await self._check_code(session, user, entry.code)
-        self._validate_password(user, entry)
+        await self._validate_password(user, entry)
         await self._set_password(session, user, entry.new_password)
 
     async def _get_user(
@@ -56,12 +56,12 @@ class ConfirmResetPassword(IConfirmResetPassword):
     ) -> None:
         await self.check_code(session, user, CodeTypeEnum.RESET_PASSWORD, code)
 
-    def _validate_password(
+    async def _validate_password(
         self, user: UserType, entry: ResetPasswordConfirmSchema
     ) -> None:
         if entry.new_password != entry.re_new_password:
             raise Custom400Exception(_("Password mismatch."))
-        if self.check_password(entry.new_password, user.password):
+        if await self.check_password(entry.new_password, user.password):
             raise Custom400Exception(_("New pasword must be different from old one."))
         self.validate_password(entry.new_password, raise_exception=True)
 
@@ -69,8 +69,8 @@ class ConfirmResetPassword(IConfirmResetPassword):
         self, session: AsyncSession, user: UserType, password: str
     ) -> None:
         await self.repo.update(
-            session, user=user, values={"password": self._hash_password(password)}
+            session, user=user, values={"password": await self._hash_password(password)}
         )
 
-    def _hash_password(self, password: str) -> str:
-        return self.hash_password(password)
+    async def _hash_password(self, password: str) -> str:
+        return await self.hash_password(password)
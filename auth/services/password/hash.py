@@ -1,9 +1,8 @@
+import asyncio
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
 
-import bcrypt
-
-
-ENCODING = "utf-8"
+from utils.password import bcrypt_hash
 
 
 class IHashPassword(ABC):
@@ -14,6 +13,28 @@ class IHashPassword(ABC):
 
 class HashPassword(IHashPassword):
     def __call__(self, password: str) -> str:
-        return bcrypt.hashpw(password.encode(ENCODING), bcrypt.gensalt()).decode(
-            ENCODING
+        return bcrypt_hash(password)
+
+
+class IAsyncHashPassword(ABC):
+    @abstractmethod
+    async def __call__(self, password: str) -> str:
+        ...
+
+
+class AsyncHashPassword(IAsyncHashPassword):
+    """
+    Hashing in a separate executor, so that bcrypt
+    does not block the event loop for the whole hashing time.
+
+    Hashing function is a module level function of `utils`,
+    so it can be pickled for a process executor.
+    """
+
+    def __init__(self, executor: Executor) -> None:
+        self.executor = executor
+
+    async def __call__(self, password: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, bcrypt_hash, password
         )
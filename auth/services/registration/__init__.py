@@ -2,3 +2,4 @@ from .create import IRegisterUser, RegisterUser
 from .confirm import IConfirmRegistration, ConfirmRegistration
 from .repeat import IRepeatRegistrationCode, RepeatRegistrationCode
 from .check import ICheckRegistration, CheckRegistration
+from .sweep import ISweepRegistrations, SweepRegistrations
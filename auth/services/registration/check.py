@@ -4,6 +4,7 @@ from abc import ABC, abstractmethod
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..repo import IUserRepo
+from ..user_state import IUserStateCache
 from utils.types import UserType
 
 
@@ -16,8 +17,9 @@ class ICheckRegistration(ABC):
 
 
 class CheckRegistration(ICheckRegistration):
-    def __init__(self, repo: IUserRepo) -> None:
+    def __init__(self, repo: IUserRepo, user_state_cache: IUserStateCache) -> None:
         self.repo = repo
+        self.user_state_cache = user_state_cache
 
     async def __call__(self, session: AsyncSession, user_id: int) -> bool | None:
         user = await self._get_user(session, user_id)
@@ -29,7 +31,8 @@ class CheckRegistration(ICheckRegistration):
             return None
 
         if not self._email_confirmed(user):
-            await self._delete_user(user)
+            await self._delete_user(session, user)
+            self._invalidate_user_state(session, user)
             logger.info(
                 "Registration checking ended up with user deletion.",
                 extra={"user_id": user_id},
@@ -47,5 +50,8 @@ class CheckRegistration(ICheckRegistration):
     def _email_confirmed(self, user: UserType) -> bool:
         return user.email_confirmed
 
-    async def _delete_user(self, user: UserType) -> None:
-        await self.repo.delete(user)
+    async def _delete_user(self, session: AsyncSession, user: UserType) -> None:
+        await self.repo.delete(session, user)
+
+    def _invalidate_user_state(self, session: AsyncSession, user: UserType) -> None:
+        self.user_state_cache.invalidate(session, user.id)
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..jwt import ICreateJWTTokens
 from ..codes import ICheckCode
 from ..repo import IUserRepo
+from ..user_state import IUserStateCache
 from ..entries import CodeTypeEnum
 from config.i18n import _
 from schemas import ConfirmRegistrationSchema, JWTTokensSchema
@@ -23,10 +24,12 @@ class ConfirmRegistration(IConfirmRegistration):
         self,
         create_jwt_tokens: ICreateJWTTokens,
         check_code: ICheckCode,
+        user_state_cache: IUserStateCache,
         repo: IUserRepo,
     ) -> None:
         self.create_jwt_tokens = create_jwt_tokens
         self.check_code = check_code
+        self.user_state_cache = user_state_cache
         self.repo = repo
 
     async def __call__(self, session: AsyncSession, entry: ConfirmRegistrationSchema) -> JWTTokensSchema:
@@ -34,7 +37,8 @@ class ConfirmRegistration(IConfirmRegistration):
         if user.email_confirmed:
             raise Custom400Exception(_("Email is already confirmed"))
         await self._check_code(session, user, entry.code)
-        await self._update_user(session, user)
+        user = await self._update_user(session, user)
+        self._invalidate_user_state(session, user)
         return self._create_tokens(user)
 
     async def _get_user(self, session: AsyncSession, email: str) -> UserType:
@@ -46,8 +50,16 @@ class ConfirmRegistration(IConfirmRegistration):
     async def _check_code(self, session: AsyncSession, user: UserType, code: str) -> None:
         await self.check_code(session, user=user, type=CodeTypeEnum.EMAIL_CONFIRM, code=code)
 
-    async def _update_user(self, session: AsyncSession, user: UserType) -> None:
-        await self.repo.update(session, user, values={"email_confirmed": True})
+    async def _update_user(self, session: AsyncSession, user: UserType) -> UserType:
+        return await self.repo.update(
+            session,
+            user,
+            values={"email_confirmed": True},
+            returning=True,
+        )
+
+    def _invalidate_user_state(self, session: AsyncSession, user: UserType) -> None:
+        self.user_state_cache.invalidate(session, user.id)
 
     def _create_tokens(self, user: UserType) -> JWTTokensSchema:
         return self.create_jwt_tokens(user)
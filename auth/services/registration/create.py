@@ -1,67 +1,69 @@
 from abc import ABC, abstractmethod
 
-from celery import Celery
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..validators import IValidate
-from ..password import IHashPassword
-from ..repo import IUserRepo
-from ..codes import ICreateCode
+from ..password import IAsyncHashPassword
+from ..repo import IUserRepo, UNIQUE_EMAIL_INDEX, UNIQUE_USERNAME_INDEX
+from ..codes import ISendCode, generate_code
+from ..codes.repo import ICodeRepo
 from ..codes.types import CodeTypeEnum
+from ..entries import CreateCodeEntry, RegistrationEntry, SendCodeEntry
 from config.i18n import _
-from config.settings import CONFIRM_EMAIL_CHECK_DELAY
 from schemas import RegistrationSchema, CodeSentSchema
-from utils.types import UserType
 from utils.exceptions import Custom400Exception
-from utils.time import get_current_time_with_delta
 
 
 class IRegisterUser(ABC):
     @abstractmethod
     async def __call__(
         self, session: AsyncSession, entry: RegistrationSchema
-    ) -> CodeSentSchema | str: ...
+    ) -> CodeSentSchema: ...
 
 
 class RegisterUser(IRegisterUser):
+    """
+    The user and the confirmation code are inserted by a single statement,
+    taken emails and usernames are told by the unique index, the entry conflicts with.
+    The code is created separately, when the codes are kept out of the database.
+    Users, that do not confirm the email in time, are deleted by `SweepRegistrations`.
+    """
+
+    conflict_messages = {
+        UNIQUE_EMAIL_INDEX: _("Email is already taken."),
+        UNIQUE_USERNAME_INDEX: _("Username is already taken."),
+    }
+
     def __init__(
         self,
-        create_code: ICreateCode,
+        send_code: ISendCode,
         validate_username: IValidate,
         validate_password: IValidate,
-        hash_password: IHashPassword,
+        hash_password: IAsyncHashPassword,
         repo: IUserRepo,
-        celery_app: Celery,
+        code_repo: ICodeRepo,
     ) -> None:
-        self.create_code = create_code
+        self.send_code = send_code
         self.validate_username = validate_username
         self.validate_password = validate_password
         self.hash_password = hash_password
         self.repo = repo
-        self.celery_app = celery_app
+        self.code_repo = code_repo
 
     async def __call__(
         self, session: AsyncSession, entry: RegistrationSchema
-    ) -> CodeSentSchema | str:
-        await self._validate_email(session, entry)
-        await self._validate_username(session, entry)
+    ) -> CodeSentSchema:
+        self._validate_username(entry)
         self._validate_password(entry)
-        entry.password = self._hash_password(entry)
-        user = await self._create_user(session, entry)
-        self._send_registration_check_task(user)
-        return await self._create_code(session, user)
+        entry.password = await self._hash_password(entry)
+        code = generate_code()
+        registration = await self._register(session, entry, code)
+        self._check_conflicts(registration)
+        if not self.code_repo.transactional:
+            await self._create_code(session, registration.user_id, code)
+        return await self._send_code(session, entry.email, code)
 
-    async def _validate_email(
-        self, session: AsyncSession, entry: RegistrationSchema
-    ) -> None:
-        if await self.repo.email_exists(session, entry.email):
-            raise Custom400Exception(_("Email is already taken."))
-
-    async def _validate_username(
-        self, session: AsyncSession, entry: RegistrationSchema
-    ) -> None:
-        if await self.repo.username_exists(session, entry.username):
-            raise Custom400Exception(_("Username is already taken."))
+    def _validate_username(self, entry: RegistrationSchema) -> None:
         self.validate_username(entry.username, raise_exception=True)
 
     def _validate_password(self, entry: RegistrationSchema) -> None:
@@ -69,24 +71,41 @@ class RegisterUser(IRegisterUser):
             raise Custom400Exception(_("Password mismatch."))
         self.validate_password(entry.password, raise_exception=True)
 
-    async def _create_user(
-        self, session: AsyncSession, entry: RegistrationSchema
-    ) -> UserType:
-        return await self.repo.create(session, entry)
-
-    def _hash_password(self, entry: RegistrationSchema) -> str:
-        return self.hash_password(entry.password)
+    async def _hash_password(self, entry: RegistrationSchema) -> str:
+        return await self.hash_password(entry.password)
 
-    def _send_registration_check_task(self, user: UserType) -> None:
-        self.celery_app.send_task(
-            "config.celery.check_email_confirmed",
-            args=(user.id,),
-            eta=get_current_time_with_delta(seconds=CONFIRM_EMAIL_CHECK_DELAY),
+    async def _register(
+        self, session: AsyncSession, entry: RegistrationSchema, code: str
+    ) -> RegistrationEntry:
+        return await self.repo.register(
+            session,
+            entry,
+            code=code if self.code_repo.transactional else None,
+            code_type=CodeTypeEnum.EMAIL_CONFIRM,
         )
 
+    def _check_conflicts(self, registration: RegistrationEntry) -> None:
+        # the email is reported first, when both are taken
+        for name, message in self.conflict_messages.items():
+            if name in registration.conflicts:
+                raise Custom400Exception(message)
+
     async def _create_code(
-        self, session: AsyncSession, user: UserType
-    ) -> CodeSentSchema | str:
-        return await self.create_code(
-            session, user, CodeTypeEnum.EMAIL_CONFIRM, send=True
+        self, session: AsyncSession, user_id: int, code: str
+    ) -> None:
+        await self.code_repo.create(
+            session,
+            entry=CreateCodeEntry(
+                user_id=user_id, code=code, type=CodeTypeEnum.EMAIL_CONFIRM
+            ),
+        )
+
+    async def _send_code(
+        self, session: AsyncSession, email: str, code: str
+    ) -> CodeSentSchema:
+        return await self.send_code(
+            session,
+            entry=SendCodeEntry(
+                email=email, code=code, type=CodeTypeEnum.EMAIL_CONFIRM.value
+            ),
         )
@@ -0,0 +1,58 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..repo import IUserRepo
+from ..user_state import IUserStateCache
+from utils.batched_delete import PeriodicBatchedDelete
+
+
+class ISweepRegistrations(ABC):
+    @abstractmethod
+    async def run(self) -> None: ...
+
+    @abstractmethod
+    async def sweep(self) -> int: ...
+
+
+class SweepRegistrations(PeriodicBatchedDelete, ISweepRegistrations):
+    """
+    Deletes the users, that have not confirmed the email in `delay` seconds
+    since the registration, every `interval` seconds.
+
+    Instances may sweep concurrently, see `IUserRepo.delete_unconfirmed`.
+    """
+
+    name = "registration_sweep"
+    title = "Registrations sweep"
+
+    def __init__(
+        self,
+        db,
+        repo: IUserRepo,
+        user_state_cache: IUserStateCache,
+        *,
+        delay: float,
+        batch_size: int = 1000,
+        interval: float = 60,
+    ) -> None:
+        super().__init__(db, age=delay, batch_size=batch_size, interval=interval)
+        self.repo = repo
+        self.user_state_cache = user_state_cache
+
+    async def sweep(self) -> int:
+        """
+        Deletes all the expired registrations, returns their count.
+        """
+        return await self.delete()
+
+    async def _delete_batch(
+        self, session: AsyncSession, created_before: datetime
+    ) -> int:
+        ids = await self.repo.delete_unconfirmed(
+            session, created_before, self.batch_size
+        )
+        for user_id in ids:
+            self.user_state_cache.invalidate(session, user_id)
+        return len(ids)
@@ -1,14 +1,22 @@
 from abc import abstractmethod
-from typing import Dict
+from datetime import datetime
+from typing import Dict, Iterable, Sequence
 
-from sqlalchemy import Select, Result
+from sqlalchemy import Select, Result, Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .codes.types import CodeTypeEnum
+from .entries import RegistrationEntry
 from schemas import RegistrationSchema
 from models.users import User
 from utils.repo import IRepo
 
 
+# registrations conflict on these, see `IUserRepo.register`
+UNIQUE_EMAIL_INDEX = "uq_auth_user_lower_email"
+UNIQUE_USERNAME_INDEX = "uq_auth_user_lower_username"
+
+
 class IUserRepo(IRepo):
     @abstractmethod
     async def all(
@@ -25,11 +33,32 @@ class IUserRepo(IRepo):
     ) -> User: ...
 
     @abstractmethod
-    async def update(self, session: AsyncSession, user: User, values: Dict) -> None: ...
+    async def register(
+        self,
+        session: AsyncSession,
+        entry: RegistrationSchema,
+        code: str | None,
+        code_type: CodeTypeEnum,
+    ) -> RegistrationEntry: ...
+
+    @abstractmethod
+    async def update(
+        self,
+        session: AsyncSession,
+        user: User,
+        values: Dict,
+        *,
+        returning: bool = False,
+    ) -> User | None: ...
 
     @abstractmethod
     async def delete(self, session: AsyncSession, user: User) -> None: ...
 
+    @abstractmethod
+    async def delete_unconfirmed(
+        self, session: AsyncSession, created_before: datetime, limit: int
+    ) -> Sequence[int]: ...
+
     @abstractmethod
     async def email_exists(self, session: AsyncSession, email: str) -> bool: ...
 
@@ -42,6 +71,21 @@ class IUserRepo(IRepo):
     @abstractmethod
     async def get_by_id(self, session: AsyncSession, id: int) -> User | None: ...
 
+    @abstractmethod
+    async def get_many_by_ids(
+        self, session: AsyncSession, ids: Iterable[int]
+    ) -> Sequence[User]: ...
+
+    @abstractmethod
+    async def get_revoked_since(
+        self, session: AsyncSession, since: datetime
+    ) -> Sequence[Row]: ...
+
+    @abstractmethod
+    async def get_updated_since(
+        self, session: AsyncSession, since: datetime
+    ) -> Sequence[Row]: ...
+
     @abstractmethod
     async def get_by_email(
         self,
@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .entries import RevocationEventEntry, RevocationEventsEntry
+from .repo import IUserRepo
+from utils.metrics import registry
+from utils.time import timestamp_to_datetime
+
+
+logger = logging.getLogger("auth")
+
+INACTIVE = float("inf")
+STALE_SYNCS = 3
+
+
+def get_revocation_epoch(tokens_revoked_at: datetime | None) -> float:
+    return tokens_revoked_at.timestamp() if tokens_revoked_at else 0
+
+
+class RevocationSubscription:
+    def __init__(self, max_size: int) -> None:
+        self.queue: asyncio.Queue[RevocationEventEntry] = asyncio.Queue(max_size)
+        self.overflowed = False
+
+    def put(self, event: RevocationEventEntry) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class IRevocationFeed(ABC):
+    @abstractmethod
+    def publish(self, event: RevocationEventEntry) -> None: ...
+
+    @abstractmethod
+    def subscribe(self) -> Iterator[RevocationSubscription]: ...
+
+
+class RevocationFeed(IRevocationFeed):
+    """
+    In-process fan-out of revocation events to the `watch_revocations` streams.
+
+    Every subscriber has its own queue of `max_queue_size` events,
+    a subscriber, that can not keep up, is marked as overflowed
+    and its stream is closed, the client resumes it from its cursor.
+    """
+
+    def __init__(self, max_queue_size: int) -> None:
+        self.max_queue_size = max_queue_size
+        self._subscriptions: Set[RevocationSubscription] = set()
+        registry.register(
+            "revocation_feed", lambda: {"subscribers": len(self._subscriptions)}
+        )
+
+    def publish(self, event: RevocationEventEntry) -> None:
+        for subscription in self._subscriptions:
+            subscription.put(event)
+
+    @contextmanager
+    def subscribe(self) -> Iterator[RevocationSubscription]:
+        subscription = RevocationSubscription(self.max_queue_size)
+        self._subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._subscriptions.discard(subscription)
+
+
+class IRevocationEpochs(ABC):
+    @property
+    @abstractmethod
+    def ready(self) -> bool: ...
+
+    @abstractmethod
+    def get(self, user_id: int) -> float | None: ...
+
+    @abstractmethod
+    def revoke(self, user_id: int, epoch: float) -> None: ...
+
+    @abstractmethod
+    async def sync(self, session: AsyncSession) -> None: ...
+
+
+class RevocationEpochs(IRevocationEpochs):
+    """
+    Revocation epochs of the users, whose tokens were revoked recently.
+
+    Epoch of a user is the timestamp of `tokens_revoked_at`, it is put into
+    the `rev` claim of issued tokens, and a token is revoked, when its `rev`
+    is lower than the current epoch of the user. A revocation older than `window`
+    seconds (the longest token lifetime) can not affect a token, that is not expired,
+    so only the users revoked within the window and inactive users are kept,
+    tokens of everyone else are valid without asking the DB.
+
+    The map is loaded from the DB by the first `sync`, updated right away
+    by `RevokeJWTTokens` of this instance and with the changes made elsewhere
+    by the following syncs. Every sync re-reads `overlap` seconds of the previous one
+    to catch transactions committed late and clock skew.
+    The map is not `ready` before the first sync and after `STALE_SYNCS`
+    sync intervals without a successful sync, then tokens are checked against the DB.
+    """
+
+    def __init__(
+        self,
+        repo: IUserRepo,
+        feed: IRevocationFeed,
+        *,
+        enabled: bool,
+        window: float,
+        sync_interval: float,
+        overlap: float = 60,
+    ) -> None:
+        self.repo = repo
+        self.feed = feed
+        self.enabled = enabled
+        self.window = window
+        self.sync_interval = sync_interval
+        self.overlap = overlap
+        self._epochs: Dict[int, float] = {}
+        self._synced_at: float | None = None
+        registry.register(
+            "revocation_epochs", lambda: {"size": len(self), "ready": self.ready}
+        )
+
+    @property
+    def ready(self) -> bool:
+        return (
+            self.enabled
+            and self._synced_at is not None
+            and time.time() - self._synced_at < self.sync_interval * STALE_SYNCS
+        )
+
+    def get(self, user_id: int) -> float | None:
+        return self._epochs.get(user_id)
+
+    def revoke(self, user_id: int, epoch: float) -> None:
+        if epoch > self._epochs.get(user_id, 0):
+            self._epochs[user_id] = epoch
+            self.feed.publish(
+                RevocationEventEntry(user_id=user_id, revoked_at=epoch, is_active=True)
+            )
+
+    async def sync(self, session: AsyncSession) -> None:
+        started_at = time.time()
+        oldest = started_at - self.window
+        if self._synced_at is None:
+            rows = await self.repo.get_revoked_since(
+                session, timestamp_to_datetime(oldest)
+            )
+        else:
+            rows = await self.repo.get_updated_since(
+                session, timestamp_to_datetime(self._synced_at - self.overlap)
+            )
+
+        for row in rows:
+            self._apply(row.id, row.is_active, row.tokens_revoked_at, oldest)
+        self._epochs = {
+            user_id: epoch for user_id, epoch in self._epochs.items() if epoch > oldest
+        }
+        self._synced_at = started_at
+
+    def __len__(self) -> int:
+        return len(self._epochs)
+
+    def _apply(
+        self,
+        user_id: int,
+        is_active: bool,
+        tokens_revoked_at: datetime | None,
+        oldest: float,
+    ) -> None:
+        epoch = get_revocation_epoch(tokens_revoked_at)
+        if not is_active:
+            if self._epochs.get(user_id) != INACTIVE:
+                self._epochs[user_id] = INACTIVE
+                self.feed.publish(
+                    RevocationEventEntry(
+                        user_id=user_id, revoked_at=epoch, is_active=False
+                    )
+                )
+            return
+
+        # the user might be activated again
+        if self._epochs.get(user_id) == INACTIVE:
+            del self._epochs[user_id]
+        if epoch > oldest:
+            self.revoke(user_id, epoch)
+
+
+class IWatchRevocations(ABC):
+    @abstractmethod
+    def __call__(
+        self, session: AsyncSession, cursor: float
+    ) -> AsyncIterator[RevocationEventsEntry]: ...
+
+
+class WatchRevocations(IWatchRevocations):
+    """
+    Stream of revocation events for the caches of other services.
+
+    The first message replays the revocations after `cursor` from the DB,
+    the following ones carry the events published by this instance.
+    Every message has the cursor, the stream should be resumed from,
+    events are re-sent with `overlap` seconds margin, so applying them
+    must be idempotent. Revocations older than `window` seconds
+    (the longest token lifetime) are not replayed, inactive users always are.
+
+    The session is used for the replay only and closed right after it,
+    so an open stream does not hold a DB connection.
+    """
+
+    def __init__(
+        self,
+        feed: IRevocationFeed,
+        repo: IUserRepo,
+        *,
+        window: float,
+        overlap: float = 60,
+    ) -> None:
+        self.feed = feed
+        self.repo = repo
+        self.window = window
+        self.overlap = overlap
+
+    async def __call__(
+        self, session: AsyncSession, cursor: float
+    ) -> AsyncIterator[RevocationEventsEntry]:
+        with self.feed.subscribe() as subscription:
+            replay = await self._replay(session, cursor)
+            await session.close()
+            yield replay
+
+            while not subscription.overflowed:
+                event = await subscription.queue.get()
+                cursor = max(cursor, event.revoked_at if event.is_active else 0)
+                yield RevocationEventsEntry(events=[event], cursor=cursor)
+
+            logger.warning("Revocations watcher can not keep up, stream is closed.")
+
+    async def _replay(
+        self, session: AsyncSession, cursor: float
+    ) -> RevocationEventsEntry:
+        started_at = time.time()
+        since = max(cursor - self.overlap, started_at - self.window)
+        rows = await self.repo.get_revoked_since(session, timestamp_to_datetime(since))
+        events = sorted(
+            (
+                RevocationEventEntry(
+                    user_id=row.id,
+                    revoked_at=get_revocation_epoch(row.tokens_revoked_at),
+                    is_active=row.is_active,
+                )
+                for row in rows
+            ),
+            key=lambda event: event.revoked_at,
+        )
+        return RevocationEventsEntry(events=events, cursor=max(cursor, started_at))
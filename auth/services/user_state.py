@@ -0,0 +1,249 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict
+from typing import Collection, Coroutine, Dict, Iterable, Set
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .entries import UserStateEntry
+from utils.cache import TTLCache, CacheStats
+from utils.kv import IKeyValueStore
+from utils.metrics import registry
+from utils.time import timestamp_to_datetime
+from utils.types import UserType
+
+
+logger = logging.getLogger("auth")
+
+KEY_PREFIX = "auth:user_state:"
+INVALIDATION_CHANNEL = "auth:user_state:invalidate"
+# replaces the shared entry of an invalidated user, see `UserStateCache`
+TOMBSTONE = b""
+
+
+class IUserStateCache(ABC):
+    @abstractmethod
+    def get(self, user_id: int) -> UserStateEntry | None: ...
+
+    @abstractmethod
+    async def get_many(self, user_ids: Iterable[int]) -> Dict[int, UserStateEntry]: ...
+
+    @abstractmethod
+    def set(self, user: UserType) -> UserStateEntry: ...
+
+    @abstractmethod
+    async def set_many(
+        self, users: Iterable[UserType]
+    ) -> Dict[int, UserStateEntry]: ...
+
+    @abstractmethod
+    def invalidate(self, session: AsyncSession | None, user_id: int) -> None: ...
+
+    @abstractmethod
+    async def listen(self) -> None: ...
+
+    @property
+    @abstractmethod
+    def stats(self) -> CacheStats: ...
+
+
+@dataclass
+class SharedCacheStats:
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+    invalidations_sent: int = 0
+    invalidations_received: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+class UserStateCache(IUserStateCache):
+    """
+    Cache of the user fields, that are needed to authenticate a user by token.
+
+    Entries are dropped by the services, that change these fields,
+    both right away and after the session commit, so that a concurrent
+    request can not put the state, that was read before the commit, back.
+    Changes made by other instances of the service are seen after `ttl` seconds.
+
+    With a shared `store` the local cache is backed by the second tier,
+    that is shared by all instances: local misses are read from the store
+    in one round trip, states loaded from the DB are written there
+    for `shared_ttl` seconds, unless the entry is set. Invalidation replaces
+    the shared entry with a tombstone for `shared_ttl` seconds and is published
+    to the other instances, which drop their local entries in `listen`.
+    A state, that another instance read before the commit and writes back
+    after the invalidation, is not written over the tombstone,
+    so the shared tier is bypassed for the user until it expires.
+    Failures of the store are logged and treated as misses,
+    so the DB is the fallback.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: int,
+        *,
+        store: IKeyValueStore | None = None,
+        shared_ttl: int = 0,
+        reconnect_delay: float = 1,
+    ) -> None:
+        self._cache: TTLCache[int, UserStateEntry] = TTLCache(
+            max_size, ttl, name="user_state_cache"
+        )
+        self.store = store
+        self.shared_ttl = shared_ttl
+        self.reconnect_delay = reconnect_delay
+        self.shared_stats = SharedCacheStats()
+        self._tasks: Set[asyncio.Task] = set()
+        if store is not None:
+            registry.register(
+                "user_state_shared_cache", lambda: self.shared_stats.as_dict()
+            )
+
+    def get(self, user_id: int) -> UserStateEntry | None:
+        return self._cache.get(user_id)
+
+    async def get_many(self, user_ids: Iterable[int]) -> Dict[int, UserStateEntry]:
+        states, missing = {}, []
+        for user_id in user_ids:
+            state = self._cache.get(user_id)
+            if state is None:
+                missing.append(user_id)
+            else:
+                states[user_id] = state
+
+        if missing and self.store is not None:
+            for state in await self._get_shared(missing):
+                self._cache.set(state.id, state)
+                states[state.id] = state
+        return states
+
+    def set(self, user: UserType) -> UserStateEntry:
+        state = UserStateEntry(
+            id=user.id,
+            is_active=user.is_active,
+            tokens_revoked_at=user.tokens_revoked_at,
+            email_confirmed=user.email_confirmed,
+        )
+        self._cache.set(user.id, state)
+        return state
+
+    async def set_many(self, users: Iterable[UserType]) -> Dict[int, UserStateEntry]:
+        states = {user.id: self.set(user) for user in users}
+        if states and self.store is not None:
+            await self._set_shared(states.values())
+        return states
+
+    def invalidate(self, session: AsyncSession | None, user_id: int) -> None:
+        self._invalidate(user_id)
+        if isinstance(session, AsyncSession):
+            event.listen(
+                session.sync_session,
+                "after_commit",
+                lambda _: self._invalidate(user_id),
+                once=True,
+            )
+
+    async def listen(self) -> None:
+        if self.store is None:
+            return
+
+        while True:
+            try:
+                async for message in self.store.subscribe(INVALIDATION_CHANNEL):
+                    self.shared_stats.invalidations_received += 1
+                    self._cache.delete(int(message))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"User state invalidations stream failed - {str(e)}")
+            await asyncio.sleep(self.reconnect_delay)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._cache.stats
+
+    def _invalidate(self, user_id: int) -> None:
+        self._cache.delete(user_id)
+        if self.store is not None:
+            self._spawn(self._invalidate_shared(user_id))
+
+    async def _get_shared(self, user_ids: Collection[int]) -> Iterable[UserStateEntry]:
+        try:
+            values = await self.store.get_many(
+                [self._key(user_id) for user_id in user_ids]
+            )
+        except Exception as e:
+            self.shared_stats.errors += 1
+            logger.warning(f"Shared user state cache read failed - {str(e)}")
+            return []
+
+        states = [
+            self._loads(user_id, value)
+            for user_id, value in zip(user_ids, values)
+            if value  # neither a miss nor a tombstone
+        ]
+        self.shared_stats.hits += len(states)
+        self.shared_stats.misses += len(user_ids) - len(states)
+        return states
+
+    async def _set_shared(self, states: Iterable[UserStateEntry]) -> None:
+        try:
+            await self.store.set_many(
+                {self._key(state.id): self._dumps(state) for state in states},
+                self.shared_ttl,
+                only_absent=True,
+            )
+        except Exception as e:
+            self.shared_stats.errors += 1
+            logger.warning(f"Shared user state cache write failed - {str(e)}")
+
+    async def _invalidate_shared(self, user_id: int) -> None:
+        try:
+            await self.store.set_many({self._key(user_id): TOMBSTONE}, self.shared_ttl)
+            await self.store.publish(INVALIDATION_CHANNEL, str(user_id).encode())
+            self.shared_stats.invalidations_sent += 1
+        except Exception as e:
+            self.shared_stats.errors += 1
+            logger.warning(f"Shared user state cache invalidation failed - {str(e)}")
+
+    def _spawn(self, coroutine: Coroutine) -> None:
+        # the tasks must be referenced until they are done
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _key(self, user_id: int) -> str:
+        return f"{KEY_PREFIX}{user_id}"
+
+    def _dumps(self, state: UserStateEntry) -> bytes:
+        return orjson.dumps(
+            [
+                state.is_active,
+                (
+                    state.tokens_revoked_at.timestamp()
+                    if state.tokens_revoked_at
+                    else None
+                ),
+                state.email_confirmed,
+            ]
+        )
+
+    def _loads(self, user_id: int, value: bytes) -> UserStateEntry:
+        is_active, tokens_revoked_at, email_confirmed = orjson.loads(value)
+        return UserStateEntry(
+            id=user_id,
+            is_active=is_active,
+            tokens_revoked_at=(
+                timestamp_to_datetime(tokens_revoked_at)
+                if tokens_revoked_at is not None
+                else None
+            ),
+            email_confirmed=email_confirmed,
+        )
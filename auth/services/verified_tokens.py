@@ -0,0 +1,60 @@
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from typing import Tuple
+
+from .entries import JWTPayload
+from .jwt.key_ring import JWTKey
+from utils.cache import TTLCache, CacheStats
+
+
+class IVerifiedTokenCache(ABC):
+    @abstractmethod
+    def get(self, token: str | bytes, key: JWTKey) -> JWTPayload | None: ...
+
+    @abstractmethod
+    def set(self, token: str | bytes, key: JWTKey, payload: JWTPayload) -> None: ...
+
+    @property
+    @abstractmethod
+    def stats(self) -> CacheStats: ...
+
+
+class VerifiedTokenCache(IVerifiedTokenCache):
+    """
+    Cache of payloads of tokens, that passed signature verification.
+
+    Entries are keyed by SHA-256 digest of the token, so the memory taken by an entry
+    does not depend on the token length, and expire at the token `exp`.
+    An entry is valid only for the key, the token was verified with,
+    so tokens of a key, that was removed from the keys file, are not accepted.
+
+    Only the signature and the payload structure are cached,
+    revocation and user activity are checked on every request.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._cache: TTLCache[bytes, Tuple[JWTKey, JWTPayload]] = TTLCache(
+            max_size, 0, name="verified_token_cache"
+        )
+
+    def get(self, token: str | bytes, key: JWTKey) -> JWTPayload | None:
+        item = self._cache.get(self._digest(token))
+        if item is None or item[0] is not key:
+            return None
+        return item[1]
+
+    def set(self, token: str | bytes, key: JWTKey, payload: JWTPayload) -> None:
+        # PyJWT treats a token as expired once the integer part of `exp` is reached
+        ttl = int(payload.exp) - time.time()
+        if ttl > 0:
+            self._cache.set(self._digest(token), (key, payload), ttl=ttl)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._cache.stats
+
+    def _digest(self, token: str | bytes) -> bytes:
+        if isinstance(token, str):
+            token = token.encode()
+        return hashlib.sha256(token).digest()
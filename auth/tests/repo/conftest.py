@@ -5,6 +5,7 @@ from sqlalchemy.sql import text
 from config.di import get_di_test_container
 from models.users import mapper_registry as user_mapper_registry
 from models.codes import mapper_registry as code_mapper_registry
+from models.outbox import mapper_registry as outbox_mapper_registry
 
 
 container = get_di_test_container()
@@ -30,4 +31,7 @@ def pytest_unconfigure(config):
         for table in reversed(code_mapper_registry.metadata.sorted_tables):
             session.execute(text(f"TRUNCATE {table.name} RESTART IDENTITY CASCADE;"))
 
+        for table in reversed(outbox_mapper_registry.metadata.sorted_tables):
+            session.execute(text(f"TRUNCATE {table.name} RESTART IDENTITY CASCADE;"))
+
         session.commit()
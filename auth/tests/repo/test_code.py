@@ -1,9 +1,12 @@
+import asyncio
+from datetime import datetime, timezone
+
 from config.di import get_di_test_container
 from models.codes import Code
 from models.users import User
 from services.codes.repo import ICodeRepo
 from services.codes.types import CodeTypeEnum
-from services.entries import CreateCodeEntry
+from services.entries import CreateCodeEntry, LastCodeEntry
 from schemas import RegistrationSchema
 from utils.test import RepoTestMixin
 
@@ -12,7 +15,7 @@ container = get_di_test_container()
 
 
 class TestCodeRepo(RepoTestMixin):
-    repo: ICodeRepo = container._code_repo()
+    repo: ICodeRepo = container._database_code_repo()
 
     def setup_method(self):
         self.user = self._create_user()
@@ -44,6 +47,18 @@ class TestCodeRepo(RepoTestMixin):
         assert code.user_id == self.entry.user_id
         assert code.code == self.entry.code
 
+    def test_create_single_statement(self):
+        async def create():
+            async with container.db().session() as session:
+                with self.assertStatementCount(container.db()._engine, 1):
+                    return await self.repo.create(session, self.entry)
+
+        code = asyncio.run(create())
+
+        assert code.id is not None
+        assert code.created_at is not None
+        assert code.code == self.entry.code
+
     def test_get_last_not_exist(self):
         assert (
             self.repo.get_last(self.user.id, type=CodeTypeEnum.RESET_PASSWORD) is None
@@ -95,3 +110,49 @@ class TestCodeRepo(RepoTestMixin):
             self.repo.get_last(self.user.id, type=CodeTypeEnum.EMAIL_CONFIRM).id
             == code2.id
         )
+
+    def test_get_last_entry(self):
+        assert (
+            self.repo.get_last_entry(self.user.id, type=CodeTypeEnum.EMAIL_CONFIRM)
+            is None
+        )
+
+        self.repo.create(self.entry)
+        self.entry.code = "2222"
+        code = self.repo.create(self.entry)
+        entry = self.repo.get_last_entry(self.user.id, type=CodeTypeEnum.EMAIL_CONFIRM)
+
+        assert isinstance(entry, LastCodeEntry)
+        assert entry.code == "2222"
+        assert entry.created_at == code.created_at
+        assert (
+            self.repo.get_last_entry(self.user.id, type=CodeTypeEnum.RESET_PASSWORD)
+            is None
+        )
+
+    def _delete_expired(self, created_before: datetime, limit: int = 10) -> int:
+        async def delete_expired():
+            async with container.db().session() as session:
+                with self.assertStatementCount(container.db()._engine, 1):
+                    return await self.repo.delete_expired(
+                        session, created_before, limit
+                    )
+
+        return asyncio.run(delete_expired())
+
+    def test_delete_expired(self):
+        self.repo.create(self.entry)
+
+        assert self._delete_expired(datetime(10, 10, 10, tzinfo=timezone.utc)) == 0
+        assert self._delete_expired(datetime.now(tz=timezone.utc)) == 1
+        assert self.repo.get_last(self.user.id, type=CodeTypeEnum.EMAIL_CONFIRM) is None
+
+    def test_delete_expired_limit(self):
+        codes = [self.repo.create(self.entry) for _ in range(3)]
+
+        assert self._delete_expired(datetime.now(tz=timezone.utc), limit=2) == 2
+        # the oldest ones first
+        assert (
+            self.repo.get_last(self.user.id, type=CodeTypeEnum.EMAIL_CONFIRM).id
+            == codes[2].id
+        )
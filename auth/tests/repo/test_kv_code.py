@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest import mock
+
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.codes import Code
+from repo import KeyValueCodeRepo
+from services.codes.types import CodeTypeEnum
+from services.entries import CreateCodeEntry, LastCodeEntry
+from utils.kv import InMemoryKeyValueStore
+
+
+class TestKeyValueCodeRepo:
+    def setup_method(self):
+        self.session = mock.Mock()
+        self.store = InMemoryKeyValueStore()
+        self.fallback = mock.AsyncMock()
+        self.fallback.get_last_entry.return_value = None
+        self.repo = KeyValueCodeRepo(
+            self.store,
+            fallback=self.fallback,
+            code_duration_map={type: 60 for type in CodeTypeEnum},
+        )
+        self.entry = CreateCodeEntry(
+            user_id=1, code="1111", type=CodeTypeEnum.EMAIL_CONFIRM
+        )
+
+    def _get_last_entry(self, type: CodeTypeEnum = CodeTypeEnum.EMAIL_CONFIRM):
+        return asyncio.run(self.repo.get_last_entry(self.session, 1, type))
+
+    def test_create(self):
+        code = asyncio.run(self.repo.create(self.session, self.entry))
+
+        assert isinstance(code, Code)
+        assert code.user_id == self.entry.user_id
+        assert code.code == self.entry.code
+        assert code.type == CodeTypeEnum.EMAIL_CONFIRM.value
+        assert code.created_at is not None
+        assert self._get_last_entry() == LastCodeEntry(
+            code=code.code, created_at=code.created_at
+        )
+        assert self._get_last_entry(CodeTypeEnum.RESET_PASSWORD) is None
+
+    def test_created_after_commit(self):
+        async def create(commit: bool) -> None:
+            session = AsyncSession()
+            await self.repo.create(session, self.entry)
+            assert len(self.store) == 0
+            await (session.commit() if commit else session.rollback())
+            await asyncio.gather(*self.repo._tasks)
+
+        asyncio.run(create(commit=False))
+        assert len(self.store) == 0
+
+        asyncio.run(create(commit=True))
+        assert len(self.store) == 1
+
+    def test_durations_must_be_positive(self):
+        with pytest.raises(ValueError):
+            KeyValueCodeRepo(
+                self.store,
+                code_duration_map={
+                    CodeTypeEnum.EMAIL_CONFIRM: 60,
+                    CodeTypeEnum.RESET_PASSWORD: 0,
+                },
+            )
+
+    def test_get_last_replaced(self):
+        asyncio.run(self.repo.create(self.session, self.entry))
+        self.entry.code = "2222"
+        asyncio.run(self.repo.create(self.session, self.entry))
+
+        code = asyncio.run(
+            self.repo.get_last(self.session, 1, CodeTypeEnum.EMAIL_CONFIRM)
+        )
+
+        assert code.code == "2222"
+        assert len(self.store) == 1
+
+    def test_expiration(self, mocker: MockerFixture):
+        monotonic = mocker.patch("utils.kv.time.monotonic", return_value=100)
+        asyncio.run(self.repo.create(self.session, self.entry))
+
+        monotonic.return_value = 159
+        assert self._get_last_entry() is not None
+        monotonic.return_value = 160
+        assert self._get_last_entry() is None
+
+    def test_fallback(self):
+        entry = LastCodeEntry(
+            code="1111", created_at=datetime(10, 10, 10, tzinfo=timezone.utc)
+        )
+        self.fallback.get_last_entry.return_value = entry
+
+        assert self._get_last_entry() == entry
+        self.fallback.get_last_entry.assert_awaited_once_with(
+            self.session, 1, CodeTypeEnum.EMAIL_CONFIRM
+        )
+
+        asyncio.run(self.repo.create(self.session, self.entry))
+        assert self._get_last_entry() != entry
+        self.fallback.get_last_entry.assert_awaited_once()
+
+    def test_no_fallback(self):
+        self.repo.fallback = None
+
+        assert self._get_last_entry() is None
+
+    def test_delete_expired(self):
+        assert (
+            asyncio.run(self.repo.delete_expired(self.session, datetime.now(), 10)) == 0
+        )
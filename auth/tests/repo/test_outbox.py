@@ -0,0 +1,121 @@
+import asyncio
+from typing import Sequence
+
+from sqlalchemy import delete, select, update
+
+from config.di import get_di_test_container
+from config.outbox import IOutboxRepo, OutboxEntry, OutboxMessageEntry
+from models.outbox import OutboxMessage
+from utils.test import RepoTestMixin
+
+
+container = get_di_test_container()
+
+
+class TestOutboxRepo(RepoTestMixin):
+    repo: IOutboxRepo = container._outbox_repo()
+
+    def teardown_method(self):
+        async def clear():
+            async with container.db().session() as session:
+                await session.execute(delete(OutboxMessage))
+
+        asyncio.run(clear())
+
+    def _run(self, method: str, *args, **kwargs):
+        async def run():
+            async with container.db().session() as session:
+                return await getattr(self.repo, method)(session, *args, **kwargs)
+
+        return asyncio.run(run())
+
+    def _lock_due(self, limit: int = 10) -> Sequence[OutboxMessageEntry]:
+        return self._run("lock_due", limit)
+
+    def test_add(self):
+        with self.assertStatementCount(container.db()._engine, 1):
+            self._run("add", OutboxEntry(task="task", args=[1], kwargs={"a": "b"}))
+
+        (message,) = self._lock_due()
+        assert message.task == "task"
+        assert message.args == [1]
+        assert message.kwargs == {"a": "b"}
+        assert message.created_at is not None
+
+    def test_add_dedup(self):
+        self._run("add", OutboxEntry(task="task", dedup_key="key"))
+        self._run("add", OutboxEntry(task="task", dedup_key="key"))
+
+        assert len(self._lock_due()) == 1
+
+    def test_lock_due_limit_and_order(self):
+        for id in range(3):
+            self._run("add", OutboxEntry(task=f"task{id}"))
+
+        assert [message.task for message in self._lock_due(2)] == ["task0", "task1"]
+
+    def test_delete(self):
+        self._run("add", OutboxEntry(task="task"))
+        (message,) = self._lock_due()
+
+        self._run("delete", [message.id])
+
+        assert self._lock_due() == []
+
+    def test_retry_later(self):
+        self._run("add", OutboxEntry(task="task"))
+        (message,) = self._lock_due()
+
+        dead = self._run(
+            "retry_later", [message.id], backoff=60, max_backoff=300, max_attempts=2
+        )
+
+        assert dead == []
+        assert self._lock_due() == []
+        assert asyncio.run(self._attempts()) == 1
+
+    def test_retry_later_dead(self):
+        self._run("add", OutboxEntry(task="task"))
+        (message,) = self._lock_due()
+
+        dead = self._run(
+            "retry_later", [message.id], backoff=0, max_backoff=0, max_attempts=1
+        )
+
+        assert dead == [message.id]
+        assert self._lock_due() == []
+        assert self._run("get_lag") == 0
+
+    def test_retry_later_many_attempts(self):
+        self._run("add", OutboxEntry(task="task"))
+        (message,) = self._lock_due()
+
+        async def set_attempts():
+            async with container.db().session() as session:
+                await session.execute(update(OutboxMessage).values(attempts=5000))
+
+        asyncio.run(set_attempts())
+
+        assert (
+            self._run(
+                "retry_later",
+                [message.id],
+                backoff=60,
+                max_backoff=300,
+                max_attempts=10_000,
+            )
+            == []
+        )
+        assert asyncio.run(self._attempts()) == 5001
+
+    async def _attempts(self) -> int:
+        async with container.db().session() as session:
+            result = await session.execute(select(OutboxMessage.attempts))
+            return result.scalar()
+
+    def test_get_lag(self):
+        assert self._run("get_lag") == 0
+
+        self._run("add", OutboxEntry(task="task"))
+
+        assert self._run("get_lag") >= 0
@@ -1,8 +1,20 @@
+import asyncio
+import json
 from datetime import datetime, timezone
+from typing import Dict, Iterator
+from unittest import mock
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
 
 from config.di import get_di_test_container
 from models.users import User
-from services.repo import IUserRepo
+from repo import UserRepo
+from repo.user import REGISTER_ATTEMPTS
+from services.codes.types import CodeTypeEnum
+from services.entries import RegistrationEntry
+from services.repo import IUserRepo, UNIQUE_EMAIL_INDEX, UNIQUE_USERNAME_INDEX
 from schemas import RegistrationSchema
 from utils.test import RepoTestMixin
 
@@ -91,6 +103,85 @@ class TestUserRepo(RepoTestMixin):
         assert user.tokens_revoked_at is None
         assert user.email_confirmed == False
 
+    def _register(self, code: str | None = "1111", **values) -> RegistrationEntry:
+        entry = self.entry.model_copy(update=values)
+
+        async def register():
+            async with container.db().session() as session:
+                with self.assertStatementCount(container.db()._engine, 1):
+                    return await self.repo.register(
+                        session,
+                        entry,
+                        code=code,
+                        code_type=CodeTypeEnum.EMAIL_CONFIRM,
+                    )
+
+        return asyncio.run(register())
+
+    def test_register(self):
+        registration = self._register()
+
+        assert registration.conflicts == []
+        user = self.repo.get_by_id(registration.user_id)
+        assert user.email == self.entry.email
+        assert not user.email_confirmed
+        code = container._database_code_repo().get_last(
+            registration.user_id, type=CodeTypeEnum.EMAIL_CONFIRM
+        )
+        assert code.code == "1111"
+
+    def test_register_without_code(self):
+        registration = self._register(code=None)
+
+        assert self.repo.get_by_id(registration.user_id) is not None
+        assert (
+            container._database_code_repo().get_last(
+                registration.user_id, type=CodeTypeEnum.EMAIL_CONFIRM
+            )
+            is None
+        )
+
+    @pytest.mark.parametrize(
+        "values, conflicts",
+        [
+            ({"username": "other"}, [UNIQUE_EMAIL_INDEX]),
+            (
+                {"email": "TestUser1@Email.com", "username": "other"},
+                [UNIQUE_EMAIL_INDEX],
+            ),
+            ({"email": "other@email.com"}, [UNIQUE_USERNAME_INDEX]),
+            (
+                {"email": "other@email.com", "username": "TESTUSER1"},
+                [UNIQUE_USERNAME_INDEX],
+            ),
+            ({}, [UNIQUE_EMAIL_INDEX, UNIQUE_USERNAME_INDEX]),
+        ],
+    )
+    def test_register_conflict(self, values, conflicts):
+        self._register()
+
+        registration = self._register(**values)
+
+        assert registration.user_id is None
+        assert registration.conflicts == conflicts
+
+    def test_register_attempts_are_limited(self):
+        result = mock.Mock()
+        result.one.return_value = (None, False, False)
+        session = mock.Mock()
+        session.execute = mock.AsyncMock(return_value=result)
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(
+                self.repo.register(
+                    session,
+                    self.entry,
+                    code="1111",
+                    code_type=CodeTypeEnum.EMAIL_CONFIRM,
+                )
+            )
+        assert session.execute.await_count == REGISTER_ATTEMPTS
+
     def test_update(self):
         user = self._create()
 
@@ -105,12 +196,68 @@ class TestUserRepo(RepoTestMixin):
         assert user.email_confirmed
         assert user.tokens_revoked_at == self.now
 
+    def test_create_single_statement(self):
+        async def create():
+            async with container.db().session() as session:
+                with self.assertStatementCount(container.db()._engine, 1):
+                    return await self.repo.create(session, self.entry)
+
+        user = asyncio.run(create())
+
+        assert user.id is not None
+        assert user.created_at is not None
+        assert user.email_confirmed == False
+
+    def test_update_returning_single_statement(self):
+        user = self._create()
+
+        async def update():
+            async with container.db().session() as session:
+                with self.assertStatementCount(container.db()._engine, 1):
+                    return await self.repo.update(
+                        session, user, {"email_confirmed": True}, returning=True
+                    )
+
+        updated = asyncio.run(update())
+
+        assert updated.id == user.id
+        assert updated.email_confirmed
+        assert updated.updated_at is not None
+
     def test_delete(self):
         user = self._create()
         assert self.repo.get_by_id(user.id) is not None
         self.repo.delete(user)
         assert self.repo.get_by_id(user.id) is None
 
+    def _delete_unconfirmed(self, created_before: datetime, limit: int = 10):
+        async def delete_unconfirmed():
+            async with container.db().session() as session:
+                with self.assertStatementCount(container.db()._engine, 1):
+                    return await self.repo.delete_unconfirmed(
+                        session, created_before, limit
+                    )
+
+        return asyncio.run(delete_unconfirmed())
+
+    def test_delete_unconfirmed(self):
+        user = self._create()
+        confirmed = self._create(unique_fields_suffix="2", confirm_email=True)
+
+        assert self._delete_unconfirmed(self.now) == []
+        assert self._delete_unconfirmed(datetime.now(tz=timezone.utc)) == [user.id]
+        assert self.repo.get_by_id(user.id) is None
+        assert self.repo.get_by_id(confirmed.id) is not None
+
+    def test_delete_unconfirmed_limit(self):
+        users = [self._create(unique_fields_suffix=str(i)) for i in range(3)]
+
+        deleted = self._delete_unconfirmed(datetime.now(tz=timezone.utc), limit=2)
+
+        # the oldest ones first
+        assert deleted == [user.id for user in users[:2]]
+        assert self.repo.get_by_id(users[2].id) is not None
+
     def test_email_exists(self):
         assert self.repo.email_exists(self.entry.email) == False
         assert self.repo.email_exists(self.entry.email.upper()) == False
@@ -224,6 +371,43 @@ class TestUserRepo(RepoTestMixin):
         self.repo.update(user, {"email_confirmed": True})
         assert self.repo.get_by_id(user.id).id == user.id
 
+    def test_many_by_ids(self):
+        assert list(self.repo.get_many_by_ids([1, 2])) == []
+        first = self._create()
+        second = self._create(unique_fields_suffix="2", confirm_email=True)
+        assert sorted(
+            user.id for user in self.repo.get_many_by_ids([first.id, second.id, 0])
+        ) == sorted([first.id, second.id])
+        assert [user.id for user in self.repo.get_many_by_ids([second.id])] == [
+            second.id
+        ]
+        assert list(self.repo.get_many_by_ids([])) == []
+
+    def test_revoked_since(self):
+        revoked = self._create()
+        inactive = self._create(unique_fields_suffix="2")
+        self._create(unique_fields_suffix="3")
+        self.repo.update(revoked, {"tokens_revoked_at": self.now})
+        self.repo.update(inactive, {"is_active": False})
+
+        assert sorted(
+            row.id for row in self.repo.get_revoked_since(datetime.min)
+        ) == sorted([revoked.id, inactive.id])
+        assert [row.id for row in self.repo.get_revoked_since(self.now)] == [
+            inactive.id
+        ]
+
+    def test_updated_since(self):
+        user = self._create()
+        since = datetime.now(tz=timezone.utc)
+        assert list(self.repo.get_updated_since(since)) == []
+        self.repo.update(user, {"tokens_revoked_at": self.now})
+
+        rows = list(self.repo.get_updated_since(since))
+        assert [(row.id, row.tokens_revoked_at) for row in rows] == [
+            (user.id, self.now)
+        ]
+
     def test_by_email(self):
         assert self.repo.get_by_email(self.entry.email) is None
         assert self.repo.get_by_email(self.entry.email.upper()) is None
@@ -248,3 +432,77 @@ class TestUserRepo(RepoTestMixin):
             ).id
             == user.id
         )
+
+
+class TestUserRepoQueryPlans:
+    """
+    Hot lookups must be served by indexes, the table is small in tests,
+    so sequential scans are discouraged and still chosen,
+    when no index can be used.
+    """
+
+    repo: IUserRepo = container.user_repo()
+
+    def _statement(self, method: str, *args, repo: IUserRepo | None = None) -> str:
+        result = mock.Mock()
+        result.first.return_value = None
+        result.scalar.return_value = False
+        result.scalars.return_value.all.return_value = []
+        session = mock.Mock(info={})
+        session.execute = mock.AsyncMock(return_value=result)
+        asyncio.run(getattr(repo or self.repo, method)(session, *args))
+
+        statement = session.execute.await_args.args[0]
+        return str(
+            statement.compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        )
+
+    def _plan(self, statement: str) -> Dict:
+        async def explain():
+            async with container.db().session() as session:
+                await session.execute(text("SET LOCAL enable_seqscan = off"))
+                result = await session.execute(
+                    text(f"EXPLAIN (FORMAT JSON) {statement}")
+                )
+                plan = result.scalar()
+                return json.loads(plan) if isinstance(plan, str) else plan
+
+        return asyncio.run(explain())[0]["Plan"]
+
+    def _nodes(self, plan: Dict) -> Iterator[Dict]:
+        yield plan
+        for child in plan.get("Plans", []):
+            yield from self._nodes(child)
+
+    @pytest.mark.parametrize(
+        "method, args",
+        [
+            ("get_by_login", ("TestUser@Email.com",)),
+            ("get_by_login", ("TestUser",)),
+            ("get_by_email", ("TestUser@Email.com",)),
+            ("email_exists", ("TestUser@Email.com",)),
+            ("username_exists", ("TestUser",)),
+            ("get_by_id", (1,)),
+            ("delete_unconfirmed", (datetime(10, 10, 10, tzinfo=timezone.utc), 100)),
+        ],
+    )
+    def test_no_seq_scan(self, method, args):
+        self._assert_no_seq_scan(self._statement(method, *args))
+
+    def test_login_union_no_seq_scan(self):
+        # usernames with "@" make an email-like login ambiguous
+        repo = UserRepo(username_characters="@abc")
+        statement = self._statement("get_by_login", "TestUser@Email.com", repo=repo)
+
+        assert "UNION ALL" in statement
+        self._assert_no_seq_scan(statement)
+
+    def _assert_no_seq_scan(self, statement: str) -> None:
+        seq_scans = [
+            node
+            for node in self._nodes(self._plan(statement))
+            if node["Node Type"] == "Seq Scan" and node["Relation Name"] == "auth_user"
+        ]
+        assert not seq_scans, f"{statement} scans auth_user sequentially"
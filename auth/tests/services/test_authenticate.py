@@ -1,3 +1,4 @@
+import asyncio
 from unittest import mock
 from datetime import datetime, timedelta
 
@@ -8,6 +9,11 @@ from jwt.exceptions import PyJWTError
 from config import settings
 from config.di import get_di_test_container
 from services.authenticate import Authenticate
+from services.entries import JWTPayload
+from services.jwt import PyJWTCodec
+from services.revocations import RevocationEpochs, RevocationFeed
+from services.user_state import UserStateCache
+from services.verified_tokens import VerifiedTokenCache
 from utils.test import ServiceTestMixin
 from utils.exceptions import Custom401Exception, Custom403Exception
 
@@ -30,10 +36,25 @@ class TestAuthenticateByToken(ServiceTestMixin):
         self.repo = mock.Mock()
         self.repo.get_by_id.return_value = self.user
 
-        self.context = container.authenticate.override(Authenticate(repo=self.repo))
+        self.context = container.authenticate.override(
+            Authenticate(
+                repo=self.repo,
+                user_state_cache=mock.Mock(),
+                key_ring=mock.Mock(),
+                codec=PyJWTCodec(),
+                verified_token_cache=VerifiedTokenCache(max_size=0),
+                revocation_epochs=RevocationEpochs(
+                    repo=mock.Mock(),
+                    feed=RevocationFeed(max_queue_size=0),
+                    enabled=False,
+                    window=0,
+                    sync_interval=0,
+                ),
+            )
+        )
 
     def test_access_jwt_error(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         jwt.exceptions.PyJWTError = PyJWTError
         jwt.decode.side_effect = PyJWTError
         timestamp_to_datetime = mocker.patch(
@@ -51,7 +72,7 @@ class TestAuthenticateByToken(ServiceTestMixin):
             timestamp_to_datetime.assert_not_called()
 
     def test_access_payload_error(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         self.payload.pop("created_at")
         jwt.decode.return_value = self.payload
         timestamp_to_datetime = mocker.patch(
@@ -69,7 +90,7 @@ class TestAuthenticateByToken(ServiceTestMixin):
             timestamp_to_datetime.assert_not_called()
 
     def test_access_user_not_found(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         jwt.decode.return_value = self.payload
         timestamp_to_datetime = mocker.patch(
             "services.authenticate.timestamp_to_datetime"
@@ -88,7 +109,7 @@ class TestAuthenticateByToken(ServiceTestMixin):
             timestamp_to_datetime.assert_not_called()
 
     def test_access_token_revoked(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         jwt.decode.return_value = self.payload
         timestamp_to_datetime = mocker.patch(
             "services.authenticate.timestamp_to_datetime"
@@ -109,7 +130,7 @@ class TestAuthenticateByToken(ServiceTestMixin):
         self.user.tokens_revoked_at = None
 
     def test_access_user_not_active(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         jwt.decode.return_value = self.payload
         timestamp_to_datetime = mocker.patch(
             "services.authenticate.timestamp_to_datetime"
@@ -129,7 +150,7 @@ class TestAuthenticateByToken(ServiceTestMixin):
         self.user.is_active = True
 
     def test_refresh_jwt_error(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         jwt.exceptions.PyJWTError = PyJWTError
         jwt.decode.side_effect = PyJWTError
         timestamp_to_datetime = mocker.patch(
@@ -147,7 +168,7 @@ class TestAuthenticateByToken(ServiceTestMixin):
             timestamp_to_datetime.assert_not_called()
 
     def test_refresh_payload_error(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         self.payload.pop("created_at")
         jwt.decode.return_value = self.payload
         timestamp_to_datetime = mocker.patch(
@@ -165,7 +186,7 @@ class TestAuthenticateByToken(ServiceTestMixin):
             timestamp_to_datetime.assert_not_called()
 
     def test_refresh_user_not_found(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         jwt.decode.return_value = self.payload
         timestamp_to_datetime = mocker.patch(
             "services.authenticate.timestamp_to_datetime"
@@ -184,7 +205,7 @@ class TestAuthenticateByToken(ServiceTestMixin):
             timestamp_to_datetime.assert_not_called()
 
     def test_refresh_token_revoked(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         jwt.decode.return_value = self.payload
         timestamp_to_datetime = mocker.patch(
             "services.authenticate.timestamp_to_datetime"
@@ -205,7 +226,7 @@ class TestAuthenticateByToken(ServiceTestMixin):
         self.user.tokens_revoked_at = None
 
     def test_refresh_user_not_active(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         jwt.decode.return_value = self.payload
         timestamp_to_datetime = mocker.patch(
             "services.authenticate.timestamp_to_datetime"
@@ -225,7 +246,7 @@ class TestAuthenticateByToken(ServiceTestMixin):
         self.user.is_active = True
 
     def test_authenticate_by_access(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         jwt.decode.return_value = self.payload
         timestamp_to_datetime = mocker.patch(
             "services.authenticate.timestamp_to_datetime"
@@ -243,7 +264,7 @@ class TestAuthenticateByToken(ServiceTestMixin):
             timestamp_to_datetime.assert_not_called()
 
     def test_authenticate_by_refresh(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.authenticate.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         jwt.decode.return_value = self.payload
         timestamp_to_datetime = mocker.patch(
             "services.authenticate.timestamp_to_datetime"
@@ -259,3 +280,35 @@ class TestAuthenticateByToken(ServiceTestMixin):
             )
             self.repo.get_by_id.assert_called_once_with(self.payload["user"])
             timestamp_to_datetime.assert_not_called()
+
+
+class TestAuthenticateSingleFlight(ServiceTestMixin):
+    def test_concurrent_lookups_share_query(self):
+        async def get_by_id(session, id):
+            await asyncio.sleep(0.01)
+            return user
+
+        user = mock.Mock(id=1, is_active=True, tokens_revoked_at=None)
+        repo = mock.Mock()
+        repo.get_by_id = mock.AsyncMock(side_effect=get_by_id)
+        authenticate = Authenticate(
+            repo=repo,
+            user_state_cache=UserStateCache(max_size=0, ttl=0),
+            key_ring=mock.Mock(),
+            codec=PyJWTCodec(),
+            verified_token_cache=VerifiedTokenCache(max_size=0),
+            revocation_epochs=mock.Mock(),
+        )
+        authenticate.decode = mock.Mock(
+            return_value=JWTPayload(user=1, exp=0, created_at=0)
+        )
+        authenticate.check_epoch = mock.Mock(return_value=False)
+
+        async def auth():
+            return await asyncio.gather(
+                *(authenticate(mock.Mock(), "token") for _ in range(5))
+            )
+
+        assert [state.id for state in asyncio.run(auth())] == [1] * 5
+        repo.get_by_id.assert_awaited_once()
+        assert authenticate._user_lookups.stats.collapsed == 4
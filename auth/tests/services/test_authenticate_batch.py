@@ -0,0 +1,124 @@
+import asyncio
+from unittest import mock
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+
+from pytest_mock import MockerFixture
+from jwt.exceptions import PyJWTError
+
+from config.di import get_di_test_container
+from services.authenticate import Authenticate
+from services.jwt import PyJWTCodec
+from services.revocations import RevocationEpochs, RevocationFeed
+from services.verified_tokens import VerifiedTokenCache
+from services.authenticate_batch import AuthenticateBatch
+from services.user_state import UserStateCache
+from utils.test import ServiceTestMixin
+
+
+container = get_di_test_container()
+
+
+class TestAuthenticateBatch(ServiceTestMixin):
+    def setup_method(self):
+        self.now = datetime(2020, 10, 10, tzinfo=timezone.utc)
+        self.users = {
+            1: SimpleNamespace(
+                **{
+                    **vars(ServiceTestMixin.user),
+                    "id": 1,
+                    "is_active": True,
+                    "tokens_revoked_at": None,
+                }
+            ),
+            2: SimpleNamespace(
+                **{
+                    **vars(ServiceTestMixin.user),
+                    "id": 2,
+                    "is_active": False,
+                    "tokens_revoked_at": None,
+                }
+            ),
+            3: SimpleNamespace(
+                **{
+                    **vars(ServiceTestMixin.user),
+                    "id": 3,
+                    "is_active": True,
+                    "tokens_revoked_at": self.now + timedelta(days=1),
+                }
+            ),
+        }
+        self.payloads = {
+            f"token{user_id}": {
+                "user": user_id,
+                "exp": self.now.timestamp(),
+                "created_at": self.now.timestamp(),
+            }
+            for user_id in (1, 2, 3, 4)
+        }
+
+        self.repo = mock.Mock()
+        self.repo.get_many_by_ids = mock.AsyncMock(
+            side_effect=lambda session, ids: [
+                self.users[id] for id in ids if id in self.users
+            ]
+        )
+        self.cache = UserStateCache(max_size=10, ttl=60)
+        authenticate = Authenticate(
+            repo=self.repo,
+            user_state_cache=self.cache,
+            key_ring=mock.Mock(),
+            codec=PyJWTCodec(),
+            verified_token_cache=VerifiedTokenCache(max_size=0),
+            revocation_epochs=RevocationEpochs(
+                repo=mock.Mock(),
+                feed=RevocationFeed(max_queue_size=0),
+                enabled=False,
+                window=0,
+                sync_interval=0,
+            ),
+        )
+
+        self.context = container.authenticate_batch.override(
+            AuthenticateBatch(
+                authenticate=authenticate,
+                user_state_cache=self.cache,
+                repo=self.repo,
+            )
+        )
+
+    def _decode(self, token, *args, **kwargs):
+        if token not in self.payloads:
+            raise PyJWTError
+        return self.payloads[token]
+
+    def test_batch(self, mocker: MockerFixture):
+        jwt = mocker.patch("services.jwt.codec.jwt")
+        jwt.decode.side_effect = self._decode
+        jwt.exceptions.PyJWTError = PyJWTError
+        tokens = ["token1", "bad", "token2", "token3", "token4", "token1"]
+        with self.context:
+            results = asyncio.run(container.authenticate_batch()(mock.Mock(), tokens))
+
+            assert len(results) == len(tokens)
+            assert results[0].user_id == 1 and results[0].error_message is None
+            assert results[1].user_id is None and results[1].error_message
+            assert results[2].user_id is None and results[2].error_message
+            assert results[3].user_id is None and results[3].error_message
+            assert results[4].user_id is None and results[4].error_message
+            assert results[5].user_id == 1
+            self.repo.get_many_by_ids.assert_awaited_once()
+            assert sorted(self.repo.get_many_by_ids.await_args.args[1]) == [1, 2, 3, 4]
+
+    def test_cached_users_not_loaded(self, mocker: MockerFixture):
+        jwt = mocker.patch("services.jwt.codec.jwt")
+        jwt.decode.side_effect = self._decode
+        jwt.exceptions.PyJWTError = PyJWTError
+        self.cache.set(self.users[1])
+        with self.context:
+            results = asyncio.run(
+                container.authenticate_batch()(mock.Mock(), ["token1", "token1"])
+            )
+
+            assert [result.user_id for result in results] == [1, 1]
+            self.repo.get_many_by_ids.assert_not_awaited()
@@ -24,7 +24,7 @@ class TestCheckCode(ServiceTestMixin):
         )
 
         self.repo = mock.Mock()
-        self.repo.get_last.return_value = self.last_code
+        self.repo.get_last_entry.return_value = self.last_code
 
         self.context = container.check_code.override(CheckCode(repo=self.repo))
 
@@ -40,7 +40,7 @@ class TestCheckCode(ServiceTestMixin):
             )
 
             assert is_valid
-            self.repo.get_last.assert_called_once_with(
+            self.repo.get_last_entry.assert_called_once_with(
                 self.user.id, CodeTypeEnum.EMAIL_CONFIRM
             )
             get_current_time.assert_called_once_with()
@@ -60,7 +60,7 @@ class TestCheckCode(ServiceTestMixin):
             )
 
             assert not is_valid
-            self.repo.get_last.assert_called_once_with(
+            self.repo.get_last_entry.assert_called_once_with(
                 self.user.id, CodeTypeEnum.EMAIL_CONFIRM
             )
             get_current_time.assert_called_once_with()
@@ -91,7 +91,7 @@ class TestCheckCode(ServiceTestMixin):
             )
 
             assert not is_valid
-            self.repo.get_last.assert_called_once_with(
+            self.repo.get_last_entry.assert_called_once_with(
                 self.user.id, CodeTypeEnum.EMAIL_CONFIRM
             )
             get_current_time.assert_called_once_with()
@@ -110,7 +110,7 @@ class TestCheckCode(ServiceTestMixin):
     def test_check_no_last(self, mocker: MockerFixture):
         get_current_time = mocker.patch("services.codes.check.get_current_time")
         get_current_time.return_value = self.now
-        self.repo.get_last.return_value = None
+        self.repo.get_last_entry.return_value = None
         with self.context:
             is_valid = container.check_code()(
                 user=self.user,
@@ -120,7 +120,7 @@ class TestCheckCode(ServiceTestMixin):
             )
 
             assert not is_valid
-            self.repo.get_last.assert_called_once_with(
+            self.repo.get_last_entry.assert_called_once_with(
                 self.user.id, CodeTypeEnum.EMAIL_CONFIRM
             )
             get_current_time.assert_not_called()
@@ -128,7 +128,7 @@ class TestCheckCode(ServiceTestMixin):
     def test_check_no_last_raise_exc(self, mocker: MockerFixture):
         get_current_time = mocker.patch("services.codes.check.get_current_time")
         get_current_time.return_value = self.now
-        self.repo.get_last.return_value = None
+        self.repo.get_last_entry.return_value = None
         with self.context, pytest.raises(Custom400Exception):
             container.check_code()(
                 user=self.user,
@@ -137,7 +137,7 @@ class TestCheckCode(ServiceTestMixin):
                 raise_exception=True,
             )
 
-            self.repo.get_last.assert_called_once_with(
+            self.repo.get_last_entry.assert_called_once_with(
                 self.user.id, CodeTypeEnum.EMAIL_CONFIRM
             )
             get_current_time.assert_not_called()
@@ -46,7 +46,7 @@ class TestCreateCode(ServiceTestMixin):
         self.send_code.return_value = self.code_sent
 
         self.repo = mock.Mock()
-        self.repo.get_last.return_value = self.last_code
+        self.repo.get_last_entry.return_value = self.last_code
         self.repo.create.return_value = self.new_code
 
         self.context = container.create_code.override(
@@ -58,7 +58,7 @@ class TestCreateCode(ServiceTestMixin):
         get_current_time.return_value = self.now
         get_random_string = mocker.patch("services.codes.create.get_random_string")
         get_random_string.return_value = self.code
-        self.repo.get_last.return_value = None
+        self.repo.get_last_entry.return_value = None
         with self.context:
             code = container.create_code()(
                 user=self.user, type=CodeTypeEnum.EMAIL_CONFIRM, send=True
@@ -79,11 +79,12 @@ class TestCreateCode(ServiceTestMixin):
                 )
             )
             self.send_code.assert_called_once_with(
+                mock.ANY,
                 entry=SendCodeEntry(
                     email=self.user.email,
                     code=self.code,
                     type=CodeTypeEnum.EMAIL_CONFIRM,
-                )
+                ),
             )
 
     def test_create_last_code_not_active(self, mocker: MockerFixture):
@@ -114,11 +115,12 @@ class TestCreateCode(ServiceTestMixin):
                 )
             )
             self.send_code.assert_called_once_with(
+                mock.ANY,
                 entry=SendCodeEntry(
                     email=self.user.email,
                     code=self.code,
                     type=CodeTypeEnum.EMAIL_CONFIRM,
-                )
+                ),
             )
 
     def test_create_active_last_code(self, mocker: MockerFixture):
@@ -144,7 +146,7 @@ class TestCreateCode(ServiceTestMixin):
         get_current_time.return_value = self.now
         get_random_string = mocker.patch("services.codes.create.get_random_string")
         get_random_string.return_value = self.code
-        self.repo.get_last.return_value = None
+        self.repo.get_last_entry.return_value = None
         with self.context:
             code = container.create_code()(
                 user=self.user, type=CodeTypeEnum.EMAIL_CONFIRM, send=False
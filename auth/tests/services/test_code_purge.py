@@ -0,0 +1,74 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest import mock
+
+from pytest_mock import MockerFixture
+
+from services.codes import PurgeCodes
+
+
+class TestPurgeCodes:
+    def setup_method(self):
+        self.now = datetime(10, 10, 10)
+        self.session = mock.Mock()
+        self.repo = mock.Mock()
+        self.repo.delete_expired = mock.AsyncMock()
+
+        @asynccontextmanager
+        async def session(**kwargs):
+            yield self.session
+
+        self.service = PurgeCodes(
+            mock.Mock(session=session), self.repo, retention=600, batch_size=2
+        )
+
+    def _purge(self, mocker: MockerFixture) -> int:
+        get_current_time_with_delta = mocker.patch(
+            "utils.batched_delete.get_current_time_with_delta"
+        )
+        get_current_time_with_delta.return_value = self.now
+        result = asyncio.run(self.service.purge())
+        get_current_time_with_delta.assert_called_once_with(seconds=-600)
+        return result
+
+    def test_purge(self, mocker: MockerFixture):
+        self.repo.delete_expired.side_effect = [2, 2, 1]
+
+        assert self._purge(mocker) == 5
+
+        assert self.repo.delete_expired.await_args_list == [
+            mock.call(self.session, self.now, 2)
+        ] * 3
+        stats = self.service.stats.as_dict()
+        assert stats["runs"] == 1
+        assert stats["batches"] == 3
+        assert stats["purged"] == 5
+        assert stats["last_run_purged"] == 5
+
+    def test_nothing_expired(self, mocker: MockerFixture):
+        self.repo.delete_expired.return_value = 0
+
+        assert self._purge(mocker) == 0
+
+        self.repo.delete_expired.assert_awaited_once()
+        assert self.service.stats.batches == 1
+
+    def test_run_survives_errors(self):
+        self.repo.delete_expired.side_effect = [
+            ValueError,
+            1,
+            asyncio.CancelledError,
+        ]
+        self.service.interval = 0
+
+        async def run():
+            try:
+                await self.service.run()
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(run())
+
+        assert self.service.stats.purged == 1
+        assert self.service.stats.runs == 1
@@ -0,0 +1,131 @@
+import random
+import time
+from unittest import mock
+
+import jwt
+import pytest
+
+from config.di import get_di_test_container  # noqa: F401
+from services.jwt import HS256Codec, JWTKey, KeyRing, PyJWTCodec, TokenPurposeEnum
+from utils.test import ServiceTestMixin
+
+
+SECRET = "s" * 64
+OTHER_SECRET = "o" * 64
+
+
+def _key(kid: str | None = None, secret: str = SECRET) -> JWTKey:
+    key = KeyRing(
+        path="", algorithm="HS256", access_secret=secret, refresh_secret=secret
+    ).signing_key(TokenPurposeEnum.ACCESS)
+    key.kid = kid
+    return key
+
+
+def _payload(**claims) -> dict:
+    now = time.time()
+    return {"user": 1, "exp": now + 60, "created_at": now, **claims}
+
+
+def _result(codec, token, key):
+    try:
+        return codec.decode(token, key)
+    except jwt.exceptions.PyJWTError as e:
+        return type(e)
+
+
+class TestHS256Codec(ServiceTestMixin):
+    def setup_method(self):
+        self.pyjwt = PyJWTCodec()
+        self.codec = HS256Codec(fallback=self.pyjwt)
+
+    @pytest.mark.parametrize("kid", [None, "2024-02"])
+    def test_encode_parity(self, kid):
+        key = _key(kid)
+        rng = random.Random(0)
+        for _ in range(200):
+            now = rng.uniform(1e9, 4e9)
+            payload = {
+                "user": rng.randrange(1, 2**40),
+                "exp": now + rng.choice([60, 86400.5]),
+                "created_at": now,
+                "rev": rng.choice([0, now - 3600]),
+            }
+
+            assert self.codec.encode(payload, key) == self.pyjwt.encode(payload, key)
+
+    @pytest.mark.parametrize("kid", [None, "2024-02"])
+    def test_decode_parity(self, kid):
+        key = _key(kid)
+        headers = {"kid": kid} if kid else None
+        token = jwt.encode(_payload(), SECRET, algorithm="HS256", headers=headers)
+        header, payload, signature = token.split(".")
+        tokens = [
+            token,
+            token.encode(),
+            f"{header}.{payload}.{signature[:-2]}",
+            f"{header}.{payload}.{signature}=",
+            f"{header}.{payload}=.{signature}",
+            f"{header}.{payload}",
+            f"{header}.{payload}.{signature}.{signature}",
+            "not a token",
+            "",
+            jwt.encode(_payload(), OTHER_SECRET, algorithm="HS256", headers=headers),
+            jwt.encode(_payload(), SECRET, algorithm="HS512", headers=headers),
+            jwt.encode(_payload(), None, algorithm="none", headers=headers),
+            jwt.encode(
+                _payload(),
+                SECRET,
+                algorithm="HS256",
+                headers={**(headers or {}), "typ": "at+jwt"},
+            ),
+            jwt.encode(
+                _payload(),
+                SECRET,
+                algorithm="HS256",
+                headers=headers,
+                sort_headers=False,
+            ),
+        ]
+        for payload in [
+            _payload(exp=time.time() - 1),
+            _payload(exp=int(time.time() + 60)),
+            _payload(exp="soon"),
+            _payload(user="1"),
+            _payload(rev=time.time()),
+            _payload(rev=0),
+            _payload(rev="0"),
+            _payload(aud="other"),
+            _payload(iat=time.time() + 3600),
+            _payload(nbf=time.time() + 3600),
+            {"user": 1, "created_at": time.time()},
+            {},
+        ]:
+            tokens.append(
+                jwt.encode(payload, SECRET, algorithm="HS256", headers=headers)
+            )
+
+        for token in tokens:
+            assert _result(self.codec, token, key) == _result(
+                self.pyjwt, token, key
+            ), token
+
+    def test_issued_tokens_skip_fallback(self):
+        key = _key("2024-02")
+        fallback = mock.Mock(wraps=self.pyjwt)
+        codec = HS256Codec(fallback=fallback)
+        payload = _payload()
+
+        assert codec.decode(codec.encode(payload, key), key) == payload
+        with pytest.raises(jwt.exceptions.ExpiredSignatureError):
+            codec.decode(codec.encode(_payload(exp=time.time() - 1), key), key)
+        fallback.encode.assert_not_called()
+        fallback.decode.assert_not_called()
+
+    def test_other_algorithms(self):
+        key = JWTKey("rsa", "RS256", mock.Mock(), "private", "public")
+        fallback = mock.Mock()
+        codec = HS256Codec(fallback=fallback)
+
+        assert codec.encode({}, key) == fallback.encode.return_value
+        assert codec.decode("token", key) == fallback.decode.return_value
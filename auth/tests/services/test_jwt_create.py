@@ -1,11 +1,12 @@
 from unittest import mock
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 
 from pytest_mock import MockerFixture
 
 from config import settings
 from config.di import get_di_test_container
-from services.jwt import CreateJWTTokens
+from services.jwt import CreateJWTTokens, JWTKey, PyJWTCodec, TokenPurposeEnum
 from schemas import JWTTokensSchema
 from utils.test import ServiceTestMixin
 
@@ -15,12 +16,35 @@ container = get_di_test_container()
 
 class TestCreateJWTTokens(ServiceTestMixin):
     def setup_method(self):
+        self.user = SimpleNamespace(
+            **{**vars(ServiceTestMixin.user), "tokens_revoked_at": None}
+        )
         self.now = datetime(10, 10, 10)
 
-        self.context = container.create_jwt_tokens.override(CreateJWTTokens())
+        self.key_ring = mock.Mock()
+        self.key_ring.signing_key.side_effect = lambda purpose: {
+            TokenPurposeEnum.ACCESS: JWTKey(
+                "access",
+                settings.JWT_ALGORITHM,
+                mock.Mock(),
+                settings.ACCESS_SECRET_KEY,
+                settings.ACCESS_SECRET_KEY,
+            ),
+            TokenPurposeEnum.REFRESH: JWTKey(
+                None,
+                settings.JWT_ALGORITHM,
+                mock.Mock(),
+                settings.REFRESH_SECRET_KEY,
+                settings.REFRESH_SECRET_KEY,
+            ),
+        }[purpose]
+
+        self.context = container.create_jwt_tokens.override(
+            CreateJWTTokens(key_ring=self.key_ring, codec=PyJWTCodec())
+        )
 
     def test_create(self, mocker: MockerFixture):
-        jwt = mocker.patch("services.jwt.create.jwt")
+        jwt = mocker.patch("services.jwt.codec.jwt")
         jwt.encode.return_value = "encoded"
         get_current_time = mocker.patch("services.jwt.create.get_current_time")
         get_current_time.return_value = self.now
@@ -39,9 +63,11 @@ class TestCreateJWTTokens(ServiceTestMixin):
                             self.now + timedelta(minutes=settings.ACCESS_TOKEN_LIFETIME)
                         ).timestamp(),
                         "created_at": self.now.timestamp(),
+                        "rev": 0,
                     },
                     key=settings.ACCESS_SECRET_KEY,
                     algorithm=settings.JWT_ALGORITHM,
+                    headers={"kid": "access"},
                 ),
                 mock.call(
                     payload={
@@ -51,8 +77,10 @@ class TestCreateJWTTokens(ServiceTestMixin):
                             + timedelta(minutes=settings.REFRESH_TOKEN_LIFETIME)
                         ).timestamp(),
                         "created_at": self.now.timestamp(),
+                        "rev": 0,
                     },
                     key=settings.REFRESH_SECRET_KEY,
                     algorithm=settings.JWT_ALGORITHM,
+                    headers=None,
                 ),
             ]
@@ -0,0 +1,286 @@
+import asyncio
+import json
+import os
+from unittest import mock
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+from pytest_mock import MockerFixture
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, ec, ed25519
+
+from config.di import get_di_test_container
+from protobufs.compiled.auth_grpc_typed import JWKS
+from protobufs.compiled.auth_jwks import JWKSVerifier
+from services.authenticate import Authenticate
+from services.jwt import (
+    CreateJWTTokens,
+    GetJWKS,
+    KeyRing,
+    PyJWTCodec,
+    TokenPurposeEnum,
+)
+from services.revocations import RevocationEpochs, RevocationFeed
+from services.verified_tokens import VerifiedTokenCache
+from utils.test import ServiceTestMixin
+from utils.exceptions import Custom401Exception
+
+
+container = get_di_test_container()
+
+
+def _pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def _public_pem(private_key) -> str:
+    return (
+        private_key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+
+
+RSA_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+EC_KEY = ec.generate_private_key(ec.SECP256R1())
+ED_KEY = ed25519.Ed25519PrivateKey.generate()
+
+
+class TestKeyRing(ServiceTestMixin):
+    def setup_method(self):
+        self.keys_data = {
+            "access": {
+                "signing_kid": "ec",
+                "keys": [
+                    {"kid": "ec", "algorithm": "ES256", "private_key": _pem(EC_KEY)},
+                    {
+                        "kid": "rsa",
+                        "algorithm": "RS256",
+                        "public_key": _public_pem(RSA_KEY),
+                    },
+                    {"kid": "ed", "algorithm": "EdDSA", "private_key": _pem(ED_KEY)},
+                ],
+            },
+            "refresh": {
+                "signing_kid": "hs",
+                "keys": [{"kid": "hs", "algorithm": "HS256", "secret": "refresh"}],
+            },
+        }
+
+    def _key_ring(self, tmp_path, data=None) -> KeyRing:
+        path = tmp_path / "keys.json"
+        path.write_text(json.dumps(data or self.keys_data))
+        return KeyRing(
+            path=str(path),
+            algorithm="HS256",
+            access_secret="legacy-access",
+            refresh_secret="legacy-refresh",
+        )
+
+    def _authenticate(self, key_ring: KeyRing) -> Authenticate:
+        return Authenticate(
+            repo=mock.Mock(),
+            user_state_cache=mock.Mock(),
+            key_ring=key_ring,
+            codec=PyJWTCodec(),
+            verified_token_cache=VerifiedTokenCache(max_size=0),
+            revocation_epochs=RevocationEpochs(
+                repo=mock.Mock(),
+                feed=RevocationFeed(max_queue_size=0),
+                enabled=False,
+                window=0,
+                sync_interval=0,
+            ),
+        )
+
+    def test_signing_keys(self, tmp_path):
+        key_ring = self._key_ring(tmp_path)
+        tokens = CreateJWTTokens(key_ring=key_ring, codec=PyJWTCodec())(self.user)
+
+        assert jwt.get_unverified_header(tokens.access) == {
+            "alg": "ES256",
+            "typ": "JWT",
+            "kid": "ec",
+        }
+        assert jwt.get_unverified_header(tokens.refresh)["kid"] == "hs"
+
+        authenticate = self._authenticate(key_ring)
+        assert authenticate.decode(tokens.access).user == self.user.id
+        assert authenticate.decode(tokens.refresh, access=False).user == self.user.id
+        with pytest.raises(Custom401Exception):
+            authenticate.decode(tokens.refresh)
+        with pytest.raises(Custom401Exception):
+            authenticate.decode(tokens.access, access=False)
+
+    @pytest.mark.parametrize(
+        "kid, algorithm, private_key",
+        [("rsa", "RS256", _pem(RSA_KEY)), ("ed", "EdDSA", _pem(ED_KEY))],
+    )
+    def test_verifying_keys(self, tmp_path, kid, algorithm, private_key):
+        authenticate = self._authenticate(self._key_ring(tmp_path))
+        token = jwt.encode(
+            {"user": 1, "exp": 2**40, "created_at": 0},
+            private_key,
+            algorithm=algorithm,
+            headers={"kid": kid},
+        )
+
+        assert authenticate.decode(token).user == 1
+
+    def test_unknown_kid(self, tmp_path):
+        authenticate = self._authenticate(self._key_ring(tmp_path))
+        token = jwt.encode(
+            {"user": 1, "exp": 2**40, "created_at": 0},
+            _pem(RSA_KEY),
+            algorithm="RS256",
+            headers={"kid": "unknown"},
+        )
+
+        with pytest.raises(Custom401Exception):
+            authenticate.decode(token)
+
+    def test_token_kid_cache(self, tmp_path, mocker: MockerFixture):
+        key_ring = self._key_ring(tmp_path)
+        get_unverified_header = mocker.spy(jwt, "get_unverified_header")
+        tokens = [
+            jwt.encode(
+                {"user": user, "exp": 2**40, "created_at": 0},
+                _pem(RSA_KEY),
+                algorithm="RS256",
+                headers={"kid": "rsa"},
+            )
+            for user in (1, 2)
+        ]
+
+        for token in tokens + [tokens[0].encode()]:
+            key = key_ring.token_verifying_key(TokenPurposeEnum.ACCESS, token)
+            assert key.kid == "rsa"
+        # one parse for the `str` header segment and one for the `bytes` one
+        assert get_unverified_header.call_count == 2
+
+    def test_legacy_tokens(self, tmp_path):
+        authenticate = self._authenticate(self._key_ring(tmp_path))
+        token = jwt.encode(
+            {"user": 1, "exp": 2**40, "created_at": 0},
+            "legacy-access",
+            algorithm="HS256",
+        )
+
+        assert authenticate.decode(token).user == 1
+
+    def test_without_file(self):
+        key_ring = KeyRing(
+            path="", algorithm="HS256", access_secret="a", refresh_secret="r"
+        )
+        tokens = CreateJWTTokens(key_ring=key_ring, codec=PyJWTCodec())(self.user)
+
+        assert "kid" not in jwt.get_unverified_header(tokens.access)
+        assert jwt.decode(tokens.access, "a", algorithms=["HS256"])["user"] == 1
+        assert jwt.decode(tokens.refresh, "r", algorithms=["HS256"])["user"] == 1
+        assert key_ring.public_keys(TokenPurposeEnum.ACCESS) == []
+
+    def test_reload(self, tmp_path, mocker: MockerFixture):
+        monotonic = mocker.patch("services.jwt.key_ring.time.monotonic")
+        monotonic.return_value = 0
+        path = tmp_path / "keys.json"
+        path.write_text(json.dumps(self.keys_data))
+        key_ring = KeyRing(
+            path=str(path),
+            algorithm="HS256",
+            access_secret="",
+            refresh_secret="",
+            reload_interval=10,
+        )
+        assert key_ring.signing_key(TokenPurposeEnum.ACCESS).kid == "ec"
+
+        self.keys_data["access"]["signing_kid"] = "ed"
+        path.write_text(json.dumps(self.keys_data))
+        os.utime(path, (1, 1))
+        monotonic.return_value = 5
+        assert key_ring.signing_key(TokenPurposeEnum.ACCESS).kid == "ec"
+        monotonic.return_value = 10
+        assert key_ring.signing_key(TokenPurposeEnum.ACCESS).kid == "ed"
+
+        path.write_text("broken")
+        os.utime(path, (2, 2))
+        monotonic.return_value = 20
+        assert key_ring.signing_key(TokenPurposeEnum.ACCESS).kid == "ed"
+        assert key_ring.verifying_key(TokenPurposeEnum.ACCESS, "rsa") is not None
+
+    def test_signing_key_without_private_part(self, tmp_path):
+        self.keys_data["access"]["signing_kid"] = "rsa"
+        with pytest.raises(ValueError):
+            self._key_ring(tmp_path)
+
+
+class TestGetJWKS(ServiceTestMixin):
+    def setup_method(self):
+        self.keys_data = {
+            "access": {
+                "signing_kid": "ec",
+                "keys": [
+                    {"kid": "ec", "algorithm": "ES256", "private_key": _pem(EC_KEY)},
+                    {"kid": "ed", "algorithm": "EdDSA", "private_key": _pem(ED_KEY)},
+                    {"kid": "hs", "algorithm": "HS256", "secret": "secret"},
+                ],
+            },
+        }
+
+    def _key_ring(self, tmp_path) -> KeyRing:
+        path = tmp_path / "keys.json"
+        path.write_text(json.dumps(self.keys_data))
+        return KeyRing(
+            path=str(path), algorithm="HS256", access_secret="", refresh_secret="r"
+        )
+
+    def test_jwks(self, tmp_path):
+        jwks = GetJWKS(key_ring=self._key_ring(tmp_path))()
+
+        assert [key["kid"] for key in jwks["keys"]] == ["ec", "ed"]
+        assert all("d" not in key and "k" not in key for key in jwks["keys"])
+        assert {key.key_id for key in jwt.PyJWKSet.from_dict(jwks).keys} == {
+            "ec",
+            "ed",
+        }
+
+    def test_offline_verification(self, tmp_path, mocker: MockerFixture):
+        key_ring = self._key_ring(tmp_path)
+        stub = mock.Mock()
+        stub.get_jwks = mock.AsyncMock(
+            return_value=JWKS(
+                jwks=json.dumps(GetJWKS(key_ring=key_ring)()), detail=None
+            )
+        )
+        verifier = JWKSVerifier(stub)
+        now = datetime.now(tz=timezone.utc)
+        mocker.patch("services.jwt.create.get_current_time", return_value=now)
+        tokens = CreateJWTTokens(key_ring=key_ring, codec=PyJWTCodec())(self.user)
+        expired = jwt.encode(
+            {
+                "user": 1,
+                "exp": (now - timedelta(minutes=1)).timestamp(),
+                "created_at": 0,
+            },
+            _pem(EC_KEY),
+            algorithm="ES256",
+            headers={"kid": "ec"},
+        )
+
+        async def verify():
+            verified = await verifier.verify(tokens.access)
+            assert verified.user == self.user.id
+            with pytest.raises(Custom401Exception):
+                await verifier.verify(tokens.refresh)
+            with pytest.raises(Custom401Exception):
+                await verifier.verify(expired)
+
+        asyncio.run(verify())
+        stub.get_jwks.assert_awaited_once()
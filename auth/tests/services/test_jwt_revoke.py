@@ -18,7 +18,11 @@ class TestRevokeJWTTokens(ServiceTestMixin):
         self.repo = mock.Mock()
 
         self.context = container.revoke_jwt_tokens.override(
-            RevokeJWTTokens(repo=self.repo)
+            RevokeJWTTokens(
+                repo=self.repo,
+                user_state_cache=mock.Mock(),
+                revocation_epochs=mock.Mock(),
+            )
         )
 
     def test_revoke(self, mocker: MockerFixture):
@@ -1,3 +1,4 @@
+import asyncio
 from unittest import mock
 
 import pytest
@@ -18,7 +19,7 @@ class TestLoginUser(ServiceTestMixin):
         self.tokens = JWTTokensSchema(access="access", refresh="refresh")
 
         self.create_jwt_tokens = mock.Mock(return_value=self.tokens)
-        self.check_password = mock.Mock(return_value=True)
+        self.check_password = mock.AsyncMock(return_value=True)
 
         self.repo = mock.Mock()
         self.repo.get_by_login.return_value = self.user
@@ -59,3 +60,26 @@ class TestLoginUser(ServiceTestMixin):
                 self.entry.password, self.user.password
             )
             self.create_jwt_tokens.assert_called_once_with(self.user)
+
+    def test_concurrent_logins_share_query(self):
+        async def get_by_login(session, login):
+            await asyncio.sleep(0.01)
+            return self.user
+
+        self.repo.get_by_login = mock.AsyncMock(side_effect=get_by_login)
+        login_user = LoginUser(
+            create_jwt_tokens=self.create_jwt_tokens,
+            check_password=self.check_password,
+            repo=self.repo,
+        )
+        sessions = [mock.Mock() for _ in range(3)]
+
+        async def login():
+            return await asyncio.gather(
+                *(login_user(session, self.entry) for session in sessions)
+            )
+
+        assert asyncio.run(login()) == [self.tokens] * 3
+        self.repo.get_by_login.assert_awaited_once_with(sessions[0], self.entry.login)
+        sessions[0].expunge.assert_called_once_with(self.user)
+        assert login_user._user_lookups.stats.collapsed == 2
@@ -20,11 +20,11 @@ class TestChangePassword(ServiceTestMixin):
             re_new_password="new_password",
         )
 
-        self.check_password = mock.Mock(return_value=True)
+        self.check_password = mock.AsyncMock(return_value=True)
 
         self.validate_password = mock.Mock()
 
-        self.hash_password = mock.Mock(return_value="hashed")
+        self.hash_password = mock.AsyncMock(return_value="hashed")
 
         self.revoke_jwt_tokens = mock.Mock()
 
@@ -37,6 +37,7 @@ class TestChangePassword(ServiceTestMixin):
                 validate_password=self.validate_password,
                 hash_password=self.hash_password,
                 revoke_jwt_tokens=self.revoke_jwt_tokens,
+                user_state_cache=mock.Mock(),
                 repo=self.repo,
             )
         )
@@ -1,6 +1,10 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 from pytest_mock import MockerFixture
 
 from config.di import get_di_test_container
+from services.password import AsyncCheckPassword
 from utils.test import ServiceTestMixin
 
 
@@ -9,7 +13,7 @@ container = get_di_test_container()
 
 class TestCheckPassword(ServiceTestMixin):
     def test_check_match(self, mocker: MockerFixture):
-        bcrypt = mocker.patch("services.password.check.bcrypt")
+        bcrypt = mocker.patch("utils.password.bcrypt")
         bcrypt.checkpw.return_value = True
 
         result = container.check_password()("plain", "hashed")
@@ -20,7 +24,7 @@ class TestCheckPassword(ServiceTestMixin):
         )
 
     def test_check_mismatch(self, mocker: MockerFixture):
-        bcrypt = mocker.patch("services.password.check.bcrypt")
+        bcrypt = mocker.patch("utils.password.bcrypt")
         bcrypt.checkpw.return_value = False
 
         result = container.check_password()("plain", "hashed")
@@ -29,3 +33,37 @@ class TestCheckPassword(ServiceTestMixin):
         bcrypt.checkpw.assert_called_once_with(
             "plain".encode("utf-8"), "hashed".encode("utf-8")
         )
+
+
+class TestAsyncCheckPassword(ServiceTestMixin):
+    def setup_method(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        self.context = container.async_check_password.override(
+            AsyncCheckPassword(executor=self.executor)
+        )
+
+    def teardown_method(self):
+        self.executor.shutdown()
+
+    def test_check_match(self, mocker: MockerFixture):
+        bcrypt = mocker.patch("utils.password.bcrypt")
+        bcrypt.checkpw.return_value = True
+        with self.context:
+            result = asyncio.run(container.async_check_password()("plain", "hashed"))
+
+            assert result
+            bcrypt.checkpw.assert_called_once_with(
+                "plain".encode("utf-8"), "hashed".encode("utf-8")
+            )
+
+    def test_check_mismatch(self, mocker: MockerFixture):
+        bcrypt = mocker.patch("utils.password.bcrypt")
+        bcrypt.checkpw.return_value = False
+        with self.context:
+            result = asyncio.run(container.async_check_password()("plain", "hashed"))
+
+            assert not result
+            bcrypt.checkpw.assert_called_once_with(
+                "plain".encode("utf-8"), "hashed".encode("utf-8")
+            )
@@ -24,8 +24,8 @@ class TestConfirmResetPassword(ServiceTestMixin):
 
         self.check_code = mock.Mock(return_value=True)
         self.validate_password = mock.Mock(return_value=True)
-        self.hash_password = mock.Mock(return_value="hashed")
-        self.check_password = mock.Mock(return_value=False)
+        self.hash_password = mock.AsyncMock(return_value="hashed")
+        self.check_password = mock.AsyncMock(return_value=False)
 
         self.repo = mock.Mock()
         self.repo.get_by_email.return_value = self.user
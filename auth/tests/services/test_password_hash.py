@@ -1,6 +1,10 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 from pytest_mock import MockerFixture
 
 from config.di import get_di_test_container
+from services.password import AsyncHashPassword
 from utils.test import ServiceTestMixin
 
 
@@ -9,7 +13,7 @@ container = get_di_test_container()
 
 class TestHashassword(ServiceTestMixin):
     def test_check_match(self, mocker: MockerFixture):
-        bcrypt = mocker.patch("services.password.hash.bcrypt")
+        bcrypt = mocker.patch("utils.password.bcrypt")
         bcrypt.hashpw.return_value = "hashed".encode("utf-8")
         bcrypt.gensalt.return_value = "salt".encode("utf-8")
 
@@ -20,3 +24,28 @@ class TestHashassword(ServiceTestMixin):
             "password".encode("utf-8"), "salt".encode("utf-8")
         )
         bcrypt.gensalt.assert_called_once_with()
+
+
+class TestAsyncHashPassword(ServiceTestMixin):
+    def setup_method(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        self.context = container.async_hash_password.override(
+            AsyncHashPassword(executor=self.executor)
+        )
+
+    def teardown_method(self):
+        self.executor.shutdown()
+
+    def test_hash(self, mocker: MockerFixture):
+        bcrypt = mocker.patch("utils.password.bcrypt")
+        bcrypt.hashpw.return_value = "hashed".encode("utf-8")
+        bcrypt.gensalt.return_value = "salt".encode("utf-8")
+        with self.context:
+            password = asyncio.run(container.async_hash_password()("password"))
+
+            assert password == "hashed"
+            bcrypt.hashpw.assert_called_once_with(
+                "password".encode("utf-8"), "salt".encode("utf-8")
+            )
+            bcrypt.gensalt.assert_called_once_with()
@@ -14,7 +14,7 @@ class TestCheckRegistration(ServiceTestMixin):
         self.repo.get_by_id.return_value = self.user
 
         self.context = container.check_registration.override(
-            CheckRegistration(repo=self.repo)
+            CheckRegistration(repo=self.repo, user_state_cache=mock.Mock())
         )
 
     def test_user_not_found(self):
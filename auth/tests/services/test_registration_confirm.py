@@ -24,11 +24,13 @@ class TestConfirmRegistration(ServiceTestMixin):
 
         self.repo = mock.Mock()
         self.repo.get_by_email.return_value = self.user
+        self.repo.update.return_value = self.user
 
         self.context = container.confirm_registration.override(
             ConfirmRegistration(
                 create_jwt_tokens=self.create_jwt_tokens,
                 check_code=self.check_code,
+                user_state_cache=mock.Mock(),
                 repo=self.repo,
             )
         )
@@ -1,13 +1,14 @@
+import asyncio
 from unittest import mock
-from datetime import datetime
 
 import pytest
 from pytest_mock import MockerFixture
 
-from config import settings
 from config.di import get_di_test_container
 from services.registration import RegisterUser
 from services.codes.types import CodeTypeEnum
+from services.entries import CreateCodeEntry, RegistrationEntry, SendCodeEntry
+from services.repo import UNIQUE_EMAIL_INDEX, UNIQUE_USERNAME_INDEX
 from schemas import RegistrationSchema, CodeSentSchema
 from utils.test import ServiceTestMixin
 from utils.exceptions import Custom400Exception
@@ -18,7 +19,8 @@ container = get_di_test_container()
 
 class TestRegisterUser(ServiceTestMixin):
     def setup_method(self):
-        self.now = datetime(10, 10, 10)
+        self.code = "1111"
+        self.session = mock.Mock()
         self.entry = RegistrationSchema(
             email=self.user.email,
             username=self.user.username,
@@ -27,145 +29,130 @@ class TestRegisterUser(ServiceTestMixin):
         )
         self.code_sent = CodeSentSchema(email=self.user.email, message="message")
 
-        self.create_code = mock.Mock(return_value=self.code_sent)
+        self.send_code = mock.AsyncMock(return_value=self.code_sent)
         self.validate_username = mock.Mock(return_value=True)
         self.validate_password = mock.Mock(return_value=True)
-        self.hash_password = mock.Mock(return_value="hashed")
-        self.celery_app = mock.Mock()
+        self.hash_password = mock.AsyncMock(return_value="hashed")
 
+        self.code_repo = mock.AsyncMock(transactional=True)
         self.repo = mock.Mock()
-        self.repo.email_exists.return_value = False
-        self.repo.username_exists.return_value = False
-        self.repo.create.return_value = self.user
-
-        self.context = container.register_user.override(
-            RegisterUser(
-                create_code=self.create_code,
-                validate_username=self.validate_username,
-                validate_password=self.validate_password,
-                hash_password=self.hash_password,
-                repo=self.repo,
-                celery_app=self.celery_app,
-            )
+        self.repo.register = mock.AsyncMock(
+            return_value=RegistrationEntry(user_id=self.user.id)
         )
 
-    def test_email_exists(self, mocker: MockerFixture):
-        get_current_time_with_delta = mocker.patch(
-            "services.registration.create.get_current_time_with_delta"
+        self.service = RegisterUser(
+            send_code=self.send_code,
+            validate_username=self.validate_username,
+            validate_password=self.validate_password,
+            hash_password=self.hash_password,
+            repo=self.repo,
+            code_repo=self.code_repo,
         )
-        get_current_time_with_delta.return_value = self.now
-        self.repo.email_exists.return_value = True
-        with self.context, pytest.raises(Custom400Exception):
-            container.register_user()(self.entry)
-
-            self.create_code.assert_not_called()
-            self.validate_username.assert_not_called()
-            self.validate_password.assert_not_called()
-            self.hash_password.assert_not_called()
-            self.repo.create.assert_not_called()
-            self.celery_app.send_task.assert_not_called()
-            get_current_time_with_delta.assert_not_called()
-
-    def test_username_exists(self, mocker: MockerFixture):
-        get_current_time_with_delta = mocker.patch(
-            "services.registration.create.get_current_time_with_delta"
+        self.context = container.register_user.override(self.service)
+
+    def _register(self, mocker: MockerFixture):
+        mocker.patch(
+            "services.registration.create.generate_code", return_value=self.code
         )
-        get_current_time_with_delta.return_value = self.now
-        self.repo.username_exists.return_value = True
-        with self.context, pytest.raises(Custom400Exception):
-            container.register_user()(self.entry)
-
-            self.create_code.assert_not_called()
-            self.validate_username.assert_not_called()
-            self.validate_password.assert_not_called()
-            self.hash_password.assert_not_called()
-            self.repo.create.assert_not_called()
-            self.celery_app.send_task.assert_not_called()
-            get_current_time_with_delta.assert_not_called()
+        with self.context:
+            return asyncio.run(container.register_user()(self.session, self.entry))
+
+    @pytest.mark.parametrize(
+        "conflicts, message",
+        [
+            ([UNIQUE_EMAIL_INDEX], "Email is already taken."),
+            ([UNIQUE_USERNAME_INDEX], "Username is already taken."),
+            ([UNIQUE_USERNAME_INDEX, UNIQUE_EMAIL_INDEX], "Email is already taken."),
+        ],
+    )
+    def test_conflict(self, mocker: MockerFixture, conflicts, message):
+        self.repo.register.return_value = RegistrationEntry(conflicts=conflicts)
+        with pytest.raises(Custom400Exception) as e:
+            self._register(mocker)
+
+        assert e.value.detail == message
+        self.repo.register.assert_awaited_once()
+        self.send_code.assert_not_called()
 
     def test_username_not_valid(self, mocker: MockerFixture):
-        get_current_time_with_delta = mocker.patch(
-            "services.registration.create.get_current_time_with_delta"
-        )
-        get_current_time_with_delta.return_value = self.now
         self.validate_username.side_effect = Custom400Exception
-        with self.context, pytest.raises(Custom400Exception):
-            container.register_user()(self.entry)
-
-            self.create_code.assert_not_called()
-            self.validate_username.assert_called_once_with(
-                self.entry.username, raise_exception=True
-            )
-            self.validate_password.assert_not_called()
-            self.hash_password.assert_not_called()
-            self.repo.create.assert_not_called()
-            self.celery_app.send_task.assert_not_called()
-            get_current_time_with_delta.assert_not_called()
+        with pytest.raises(Custom400Exception):
+            self._register(mocker)
 
-    def test_password_mismatch(self, mocker: MockerFixture):
-        get_current_time_with_delta = mocker.patch(
-            "services.registration.create.get_current_time_with_delta"
+        self.validate_username.assert_called_once_with(
+            self.user.username, raise_exception=True
         )
-        get_current_time_with_delta.return_value = self.now
+        self.validate_password.assert_not_called()
+        self.hash_password.assert_not_called()
+        self.repo.register.assert_not_called()
+        self.send_code.assert_not_called()
+
+    def test_password_mismatch(self, mocker: MockerFixture):
         self.entry.re_password = "re_password"
-        with self.context, pytest.raises(Custom400Exception):
-            container.register_user()(self.entry)
-
-            self.create_code.assert_not_called()
-            self.validate_username.assert_called_once_with(
-                self.entry.username, raise_exception=True
-            )
-            self.validate_password.assert_not_called()
-            self.hash_password.assert_not_called()
-            self.repo.create.assert_not_called()
-            self.celery_app.send_task.assert_not_called()
-            get_current_time_with_delta.assert_not_called()
+        with pytest.raises(Custom400Exception):
+            self._register(mocker)
+
+        self.validate_password.assert_not_called()
+        self.hash_password.assert_not_called()
+        self.repo.register.assert_not_called()
+        self.send_code.assert_not_called()
 
     def test_password_not_valid(self, mocker: MockerFixture):
-        get_current_time_with_delta = mocker.patch(
-            "services.registration.create.get_current_time_with_delta"
-        )
-        get_current_time_with_delta.return_value = self.now
         self.validate_password.side_effect = Custom400Exception
-        with self.context, pytest.raises(Custom400Exception):
-            container.register_user()(self.entry)
-
-            self.create_code.assert_not_called()
-            self.validate_username.assert_called_once_with(
-                self.entry.username, raise_exception=True
-            )
-            self.validate_password.assert_called_once_with(
-                self.entry.password, raise_exception=True
-            )
-            self.hash_password.assert_not_called()
-            self.repo.create.assert_not_called()
-            self.celery_app.send_task.assert_not_called()
-            get_current_time_with_delta.assert_not_called()
+        with pytest.raises(Custom400Exception):
+            self._register(mocker)
+
+        self.validate_password.assert_called_once_with("password", raise_exception=True)
+        self.hash_password.assert_not_called()
+        self.repo.register.assert_not_called()
+        self.send_code.assert_not_called()
 
     def test_register(self, mocker: MockerFixture):
-        get_current_time_with_delta = mocker.patch(
-            "services.registration.create.get_current_time_with_delta"
+        assert self._register(mocker) == self.code_sent
+
+        self.hash_password.assert_awaited_once_with("password")
+        self.repo.register.assert_awaited_once_with(
+            self.session,
+            self.entry,
+            code=self.code,
+            code_type=CodeTypeEnum.EMAIL_CONFIRM,
         )
-        get_current_time_with_delta.return_value = self.now
-        with self.context:
-            container.register_user()(self.entry)
-
-            self.create_code.assert_called_once_with(
-                self.user, CodeTypeEnum.EMAIL_CONFIRM, send=True
-            )
-            self.validate_username.assert_called_once_with(
-                self.entry.username, raise_exception=True
-            )
-            self.validate_password.assert_called_once_with(
-                self.entry.re_password, raise_exception=True
-            )
-            self.hash_password.assert_called_once_with(self.entry.re_password)
-            self.repo.create.assert_called_once_with(self.entry)
-            self.celery_app.send_task.assert_called_once_with(
-                "config.celery.check_email_confirmed",
-                args=(self.user.id,),
-                eta=self.now,
-            )
-            get_current_time_with_delta.assert_called_once_with(
-                seconds=settings.CONFIRM_EMAIL_CHECK_DELAY
-            )
+        assert self.entry.password == "hashed"
+        self.code_repo.create.assert_not_called()
+        self.send_code.assert_awaited_once_with(
+            self.session,
+            entry=SendCodeEntry(
+                email=self.user.email,
+                code=self.code,
+                type=CodeTypeEnum.EMAIL_CONFIRM.value,
+            ),
+        )
+
+    def test_register_code_out_of_database(self, mocker: MockerFixture):
+        self.code_repo.transactional = False
+
+        assert self._register(mocker) == self.code_sent
+
+        self.repo.register.assert_awaited_once_with(
+            self.session,
+            self.entry,
+            code=None,
+            code_type=CodeTypeEnum.EMAIL_CONFIRM,
+        )
+        self.code_repo.create.assert_awaited_once_with(
+            self.session,
+            entry=CreateCodeEntry(
+                user_id=self.user.id, code=self.code, type=CodeTypeEnum.EMAIL_CONFIRM
+            ),
+        )
+        self.send_code.assert_awaited_once()
+
+    def test_conflict_code_out_of_database(self, mocker: MockerFixture):
+        self.code_repo.transactional = False
+        self.repo.register.return_value = RegistrationEntry(
+            conflicts=[UNIQUE_EMAIL_INDEX]
+        )
+        with pytest.raises(Custom400Exception):
+            self._register(mocker)
+
+        self.code_repo.create.assert_not_called()
@@ -0,0 +1,84 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest import mock
+
+from pytest_mock import MockerFixture
+
+from services.registration import SweepRegistrations
+
+
+class TestSweepRegistrations:
+    def setup_method(self):
+        self.now = datetime(10, 10, 10)
+        self.session = mock.Mock()
+        self.repo = mock.Mock()
+        self.repo.delete_unconfirmed = mock.AsyncMock()
+        self.user_state_cache = mock.Mock()
+
+        @asynccontextmanager
+        async def session(**kwargs):
+            yield self.session
+
+        self.service = SweepRegistrations(
+            mock.Mock(session=session),
+            self.repo,
+            self.user_state_cache,
+            delay=60,
+            batch_size=2,
+        )
+
+    def _sweep(self, mocker: MockerFixture) -> int:
+        get_current_time_with_delta = mocker.patch(
+            "utils.batched_delete.get_current_time_with_delta"
+        )
+        get_current_time_with_delta.return_value = self.now
+        result = asyncio.run(self.service.sweep())
+        get_current_time_with_delta.assert_called_once_with(seconds=-60)
+        return result
+
+    def test_sweep(self, mocker: MockerFixture):
+        self.repo.delete_unconfirmed.side_effect = [[1, 2], [3]]
+
+        assert self._sweep(mocker) == 3
+
+        assert self.repo.delete_unconfirmed.await_args_list == [
+            mock.call(self.session, self.now, 2),
+            mock.call(self.session, self.now, 2),
+        ]
+        assert self.user_state_cache.invalidate.call_args_list == [
+            mock.call(self.session, id) for id in (1, 2, 3)
+        ]
+        stats = self.service.stats.as_dict()
+        assert stats["runs"] == 1
+        assert stats["batches"] == 2
+        assert stats["purged"] == 3
+        assert stats["last_run_purged"] == 3
+
+    def test_nothing_expired(self, mocker: MockerFixture):
+        self.repo.delete_unconfirmed.return_value = []
+
+        assert self._sweep(mocker) == 0
+
+        self.repo.delete_unconfirmed.assert_awaited_once()
+        self.user_state_cache.invalidate.assert_not_called()
+        assert self.service.stats.last_run_purged == 0
+
+    def test_run_survives_errors(self):
+        self.repo.delete_unconfirmed.side_effect = [
+            ValueError,
+            [1],
+            asyncio.CancelledError,
+        ]
+        self.service.interval = 0
+
+        async def run():
+            try:
+                await self.service.run()
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(run())
+
+        assert self.service.stats.purged == 1
+        assert self.service.stats.runs == 1
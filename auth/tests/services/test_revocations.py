@@ -0,0 +1,413 @@
+import asyncio
+import time
+from unittest import mock
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.di import get_di_test_container
+from protobufs.compiled.auth_cache import AuthCache
+from protobufs.compiled.auth_grpc_typed import (
+    AuthResponse,
+    RevocationEvent,
+    RevocationEvents,
+    User,
+)
+from services.authenticate import Authenticate
+from services.authenticate_batch import AuthenticateBatch
+from services.jwt import (
+    CreateJWTTokens,
+    KeyRing,
+    PyJWTCodec,
+    RevokeJWTTokens,
+)
+from services.entries import RevocationEventEntry
+from services.revocations import (
+    INACTIVE,
+    RevocationEpochs,
+    RevocationFeed,
+    WatchRevocations,
+)
+from services.user_state import UserStateCache
+from services.verified_tokens import VerifiedTokenCache
+from utils.test import ServiceTestMixin
+from utils.exceptions import Custom401Exception, Custom403Exception
+
+
+container = get_di_test_container()
+
+
+def _row(id: int, *, is_active: bool = True, tokens_revoked_at=None):
+    return SimpleNamespace(
+        id=id, is_active=is_active, tokens_revoked_at=tokens_revoked_at
+    )
+
+
+class TestRevocationEpochs:
+    def setup_method(self):
+        self.repo = mock.Mock()
+        self.repo.get_revoked_since = mock.AsyncMock(return_value=[])
+        self.repo.get_updated_since = mock.AsyncMock(return_value=[])
+        self.feed = mock.Mock()
+        self.epochs = RevocationEpochs(
+            repo=self.repo,
+            feed=self.feed,
+            enabled=True,
+            window=3600,
+            sync_interval=5,
+        )
+
+    def test_sync(self, mocker: MockerFixture):
+        now = datetime.now(tz=timezone.utc)
+        self.repo.get_revoked_since.return_value = [
+            _row(1, tokens_revoked_at=now),
+            _row(2, is_active=False),
+        ]
+        assert not self.epochs.ready
+
+        asyncio.run(self.epochs.sync(mock.Mock()))
+
+        assert self.epochs.ready
+        assert self.epochs.get(1) == now.timestamp()
+        assert self.epochs.get(2) == INACTIVE
+        assert self.epochs.get(3) is None
+        since = self.repo.get_revoked_since.await_args.args[1]
+        assert abs(since.timestamp() - (time.time() - 3600)) < 5
+
+        self.repo.get_updated_since.return_value = [
+            _row(2),
+            _row(3, tokens_revoked_at=now - timedelta(hours=2)),
+            _row(4, tokens_revoked_at=now),
+        ]
+        asyncio.run(self.epochs.sync(mock.Mock()))
+
+        assert self.epochs.get(2) is None
+        assert self.epochs.get(3) is None
+        assert self.epochs.get(4) == now.timestamp()
+        since = self.repo.get_updated_since.await_args.args[1]
+        assert abs(since.timestamp() - (time.time() - 60)) < 5
+
+    def test_revoke(self):
+        self.epochs.revoke(1, 10)
+        self.epochs.revoke(1, 5)
+
+        assert self.epochs.get(1) == 10
+        self.feed.publish.assert_called_once_with(
+            RevocationEventEntry(user_id=1, revoked_at=10, is_active=True)
+        )
+
+    def test_deactivation_is_published_once(self):
+        self.repo.get_revoked_since.return_value = [_row(1, is_active=False)]
+        asyncio.run(self.epochs.sync(mock.Mock()))
+        self.repo.get_updated_since.return_value = [_row(1, is_active=False)]
+        asyncio.run(self.epochs.sync(mock.Mock()))
+
+        self.feed.publish.assert_called_once_with(
+            RevocationEventEntry(user_id=1, revoked_at=0, is_active=False)
+        )
+
+    def test_outdated_epochs_are_dropped(self, mocker: MockerFixture):
+        now = time.time()
+        mocker.patch("services.revocations.time.time", return_value=now)
+        self.epochs.revoke(1, now - 3601)
+        self.epochs.revoke(2, now - 3599)
+
+        asyncio.run(self.epochs.sync(mock.Mock()))
+
+        assert self.epochs.get(1) is None
+        assert self.epochs.get(2) == now - 3599
+
+    def test_stale(self, mocker: MockerFixture):
+        time_ = mocker.patch("services.revocations.time.time", return_value=100)
+        asyncio.run(self.epochs.sync(mock.Mock()))
+
+        time_.return_value = 114
+        assert self.epochs.ready
+        time_.return_value = 115
+        assert not self.epochs.ready
+
+    def test_disabled(self):
+        self.epochs.enabled = False
+        asyncio.run(self.epochs.sync(mock.Mock()))
+
+        assert not self.epochs.ready
+
+
+class TestAuthenticateRevocationEpochs(ServiceTestMixin):
+    def setup_method(self):
+        self.user = SimpleNamespace(
+            **{
+                **vars(ServiceTestMixin.user),
+                "is_active": True,
+                "tokens_revoked_at": None,
+            }
+        )
+        self.repo = mock.Mock()
+        self.repo.get_by_id = mock.AsyncMock(return_value=self.user)
+        self.repo.get_many_by_ids = mock.AsyncMock(return_value=[self.user])
+        self.repo.get_revoked_since = mock.AsyncMock(return_value=[])
+        self.repo.update = mock.AsyncMock()
+        self.feed = mock.Mock()
+        self.epochs = RevocationEpochs(
+            repo=self.repo,
+            feed=self.feed,
+            enabled=True,
+            window=3600,
+            sync_interval=5,
+        )
+        asyncio.run(self.epochs.sync(mock.Mock()))
+
+        key_ring = KeyRing(
+            path="", algorithm="HS256", access_secret="a" * 64, refresh_secret="r" * 64
+        )
+        user_state_cache = UserStateCache(max_size=0, ttl=0)
+        self.authenticate = Authenticate(
+            repo=self.repo,
+            user_state_cache=user_state_cache,
+            key_ring=key_ring,
+            codec=PyJWTCodec(),
+            verified_token_cache=VerifiedTokenCache(max_size=0),
+            revocation_epochs=self.epochs,
+        )
+        self.authenticate_batch = AuthenticateBatch(
+            authenticate=self.authenticate,
+            user_state_cache=user_state_cache,
+            repo=self.repo,
+        )
+        self.revoke = RevokeJWTTokens(
+            repo=self.repo,
+            user_state_cache=user_state_cache,
+            revocation_epochs=self.epochs,
+        )
+        self.create_tokens = CreateJWTTokens(key_ring=key_ring, codec=PyJWTCodec())
+        self.tokens = self.create_tokens(self.user)
+
+    def _authenticate(self, token: str):
+        return asyncio.run(self.authenticate.user_id(mock.Mock(), token))
+
+    def test_without_db(self):
+        user_id = self._authenticate(self.tokens.access)
+        results = asyncio.run(
+            self.authenticate_batch(mock.Mock(), [self.tokens.access] * 2)
+        )
+
+        assert user_id == self.user.id
+        assert [result.user_id for result in results] == [user_id, user_id]
+        self.repo.get_by_id.assert_not_awaited()
+        self.repo.get_many_by_ids.assert_not_awaited()
+
+    def test_revoked(self):
+        asyncio.run(self.revoke(mock.Mock(), self.user))
+
+        with pytest.raises(Custom401Exception):
+            self._authenticate(self.tokens.access)
+        results = asyncio.run(
+            self.authenticate_batch(mock.Mock(), [self.tokens.access])
+        )
+        assert results[0].user_id is None
+
+        self.user.tokens_revoked_at = self.repo.update.await_args.args[2][
+            "tokens_revoked_at"
+        ]
+        assert self._authenticate(self.create_tokens(self.user).access)
+        self.repo.get_by_id.assert_not_awaited()
+
+    def test_revoked_after_commit(self):
+        session = AsyncSession()
+
+        asyncio.run(self.revoke(session, self.user))
+        assert self._authenticate(self.tokens.access) == self.user.id
+        asyncio.run(session.rollback())
+        assert self._authenticate(self.tokens.access) == self.user.id
+
+        asyncio.run(self.revoke(session, self.user))
+        asyncio.run(session.commit())
+        with pytest.raises(Custom401Exception):
+            self._authenticate(self.tokens.access)
+
+    def test_state_loaded_for_refresh(self):
+        user = asyncio.run(self.authenticate(mock.Mock(), self.tokens.access))
+
+        assert user.id == self.user.id
+        assert user.email_confirmed == self.user.email_confirmed
+        self.repo.get_by_id.assert_awaited_once()
+
+    def test_inactive(self):
+        self.epochs.revoke(self.user.id, INACTIVE)
+
+        with pytest.raises(Custom403Exception):
+            self._authenticate(self.tokens.access)
+
+    def test_not_ready(self):
+        self.epochs.enabled = False
+
+        assert self._authenticate(self.tokens.access) == self.user.id
+        self.repo.get_by_id.assert_awaited_once()
+
+
+class TestWatchRevocations:
+    def setup_method(self):
+        self.repo = mock.Mock()
+        self.repo.get_revoked_since = mock.AsyncMock(return_value=[])
+        self.feed = RevocationFeed(max_queue_size=2)
+        self.watch = WatchRevocations(feed=self.feed, repo=self.repo, window=3600)
+        self.session = mock.Mock()
+        self.session.close = mock.AsyncMock()
+
+    def test_replay_then_live(self, mocker: MockerFixture):
+        mocker.patch("services.revocations.time.time", return_value=1000)
+        revoked_at = datetime.fromtimestamp(900, tz=timezone.utc)
+        self.repo.get_revoked_since.return_value = [
+            _row(1, tokens_revoked_at=revoked_at),
+            _row(2, is_active=False),
+        ]
+
+        async def watch():
+            stream = self.watch(self.session, 950)
+            replay = await anext(stream)
+            self.session.close.assert_awaited_once()
+            self.feed.publish(
+                RevocationEventEntry(user_id=3, revoked_at=1010, is_active=True)
+            )
+            live = await anext(stream)
+            await stream.aclose()
+            return replay, live
+
+        replay, live = asyncio.run(watch())
+
+        since = self.repo.get_revoked_since.await_args.args[1]
+        assert since.timestamp() == 890
+        assert replay.events == [
+            RevocationEventEntry(user_id=2, revoked_at=0, is_active=False),
+            RevocationEventEntry(user_id=1, revoked_at=900, is_active=True),
+        ]
+        assert replay.cursor == 1000
+        assert live.events == [
+            RevocationEventEntry(user_id=3, revoked_at=1010, is_active=True)
+        ]
+        assert live.cursor == 1010
+        assert not self.feed._subscriptions
+
+    def test_replay_is_limited_by_window(self, mocker: MockerFixture):
+        mocker.patch("services.revocations.time.time", return_value=10000)
+
+        async def watch():
+            stream = self.watch(self.session, 0)
+            await anext(stream)
+            await stream.aclose()
+
+        asyncio.run(watch())
+
+        since = self.repo.get_revoked_since.await_args.args[1]
+        assert since.timestamp() == 10000 - 3600
+
+    def test_overflow_closes_stream(self):
+        async def watch():
+            stream = self.watch(self.session, 0)
+            await anext(stream)
+            for user_id in range(3):
+                self.feed.publish(
+                    RevocationEventEntry(user_id=user_id, revoked_at=1, is_active=True)
+                )
+            return [events async for events in stream]
+
+        # the queued events are replayed, when the stream is resumed
+        assert asyncio.run(watch()) == []
+        assert not self.feed._subscriptions
+
+
+class TestAuthCache:
+    def setup_method(self):
+        key_ring = KeyRing(
+            path="", algorithm="HS256", access_secret="a" * 64, refresh_secret="r" * 64
+        )
+        self.user = SimpleNamespace(id=1, tokens_revoked_at=None)
+        self.token = CreateJWTTokens(key_ring=key_ring, codec=PyJWTCodec())(
+            self.user
+        ).access
+        self.stub = mock.Mock()
+        self.stub.auth = mock.AsyncMock(return_value=AuthResponse(user=User(id=1)))
+        self.cache = AuthCache(self.stub, max_size=10)
+        self.cache.connected = True
+
+    def _auth(self):
+        return asyncio.run(self.cache.auth(self.token)).user.id
+
+    def _revoke(self, revoked_at: float, *, is_active: bool = True):
+        self.cache.apply(
+            RevocationEvents(
+                events=[
+                    RevocationEvent(
+                        user_id=1, revoked_at=revoked_at, is_active=is_active
+                    )
+                ],
+                cursor=revoked_at,
+            )
+        )
+
+    def test_cache_hit(self):
+        assert self._auth() == 1
+        assert self._auth() == 1
+
+        self.stub.auth.assert_awaited_once()
+
+    def test_rejected_not_cached(self):
+        self.stub.auth.return_value = AuthResponse(
+            user=User(id=-1), error_message="Invalid token."
+        )
+
+        assert self._auth() == -1
+        assert self._auth() == -1
+
+        assert self.stub.auth.await_count == 2
+        assert len(self.cache) == 0
+
+    def test_disconnected(self):
+        self.cache.connected = False
+        self._auth()
+        self.cache.connected = True
+        self._auth()
+
+        assert self.stub.auth.await_count == 2
+
+    def test_revocation(self):
+        self._auth()
+        self._revoke(time.time() - 60)
+        self._auth()
+        self.stub.auth.assert_awaited_once()
+
+        self._revoke(time.time() + 1)
+        self._auth()
+        assert self.stub.auth.await_count == 2
+        assert self.cache.cursor > time.time()
+
+    def test_deactivation(self):
+        self._auth()
+        self._revoke(0, is_active=False)
+        self._auth()
+
+        assert self.stub.auth.await_count == 2
+
+    def test_watch_resumes_from_cursor(self, mocker: MockerFixture):
+        requests = []
+
+        async def watch_revocations(request):
+            requests.append(request.cursor)
+            if len(requests) == 3:
+                raise asyncio.CancelledError
+            if len(requests) == 1:
+                yield RevocationEvents(events=[], cursor=10)
+            raise ConnectionError
+
+        self.stub.watch_revocations = watch_revocations
+        sleep = mocker.patch("asyncio.sleep", new=mock.AsyncMock())
+
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(self.cache.watch())
+
+        assert requests == [0, 10, 10]
+        assert [call.args[0] for call in sleep.await_args_list] == [1, 2]
+        assert not self.cache.connected
@@ -0,0 +1,231 @@
+import asyncio
+from unittest import mock
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+
+from config.di import get_di_test_container
+from services.authenticate import Authenticate
+from services.jwt import PyJWTCodec
+from services.revocations import RevocationEpochs, RevocationFeed
+from services.verified_tokens import VerifiedTokenCache
+from services.entries import JWTPayload
+from services.user_state import TOMBSTONE, UserStateCache
+from utils.cache import TTLCache
+from utils.kv import InMemoryKeyValueStore
+from utils.test import ServiceTestMixin
+from utils.exceptions import Custom401Exception
+
+
+container = get_di_test_container()
+
+
+class TestTTLCache:
+    def test_lru_eviction(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.get(1)
+        cache.set(3, "c")
+
+        assert cache.get(2) is None
+        assert cache.get(1) == "a"
+        assert cache.get(3) == "c"
+        assert cache.stats.evictions == 1
+
+    def test_expiration(self, mocker: MockerFixture):
+        monotonic = mocker.patch("utils.cache.time.monotonic", return_value=100)
+        cache = TTLCache(max_size=2, ttl=10)
+        cache.set(1, "a")
+
+        monotonic.return_value = 109
+        assert cache.get(1) == "a"
+        monotonic.return_value = 110
+        assert cache.get(1) is None
+        assert cache.stats.expirations == 1
+        assert len(cache) == 0
+
+    def test_disabled(self):
+        cache = TTLCache(max_size=0, ttl=10)
+        cache.set(1, "a")
+
+        assert cache.get(1) is None
+        assert len(cache) == 0
+
+    def test_stats(self):
+        cache = TTLCache(max_size=2, ttl=10)
+        cache.set(1, "a")
+        cache.get(1)
+        cache.get(1)
+        cache.get(2)
+        cache.delete(1)
+
+        stats = cache.stats
+        assert stats.hits == 2
+        assert stats.misses == 1
+        assert stats.invalidations == 1
+        assert stats.hit_ratio == pytest.approx(2 / 3)
+        assert stats.as_dict()["size"] == 0
+
+
+class TestUserStateCache(ServiceTestMixin):
+    def setup_method(self):
+        self.cache = UserStateCache(max_size=10, ttl=60)
+
+    def test_set_get(self):
+        state = self.cache.set(self.user)
+
+        assert self.cache.get(self.user.id) == state
+        assert state.id == self.user.id
+        assert state.is_active == self.user.is_active
+        assert state.tokens_revoked_at == self.user.tokens_revoked_at
+        assert state.email_confirmed == self.user.email_confirmed
+
+    def test_invalidate(self):
+        self.cache.set(self.user)
+        self.cache.invalidate(mock.Mock(), self.user.id)
+
+        assert self.cache.get(self.user.id) is None
+
+
+class TestSharedUserStateCache(ServiceTestMixin):
+    def setup_method(self):
+        self.user = SimpleNamespace(
+            **{
+                **vars(ServiceTestMixin.user),
+                "is_active": True,
+                "tokens_revoked_at": datetime(2020, 10, 10, tzinfo=timezone.utc),
+            }
+        )
+        self.store = InMemoryKeyValueStore()
+        self.first = UserStateCache(
+            max_size=10, ttl=60, store=self.store, shared_ttl=60, reconnect_delay=0
+        )
+        self.second = UserStateCache(
+            max_size=10, ttl=60, store=self.store, shared_ttl=60, reconnect_delay=0
+        )
+
+    def test_shared_tier(self):
+        async def run():
+            states = await self.first.set_many([self.user])
+            return states, await self.second.get_many([self.user.id, 0])
+
+        states, shared = asyncio.run(run())
+
+        assert shared == states
+        assert shared[self.user.id].tokens_revoked_at == self.user.tokens_revoked_at
+        assert self.second.get(self.user.id) == states[self.user.id]
+        assert self.second.shared_stats.hits == 1
+        assert self.second.shared_stats.misses == 1
+
+    def test_invalidation_is_published(self):
+        async def run():
+            listener = asyncio.create_task(self.second.listen())
+            await asyncio.sleep(0)
+            await self.first.set_many([self.user])
+            await self.second.get_many([self.user.id])
+
+            self.first.invalidate(None, self.user.id)
+            for _ in range(3):
+                await asyncio.sleep(0)
+            listener.cancel()
+            return await self.second.get_many([self.user.id])
+
+        assert asyncio.run(run()) == {}
+        assert asyncio.run(
+            self.store.get_many([f"auth:user_state:{self.user.id}"])
+        ) == [TOMBSTONE]
+        assert self.second.shared_stats.invalidations_received == 1
+
+    def test_stale_write_back_after_invalidation(self):
+        revoked_at = datetime(2021, 10, 10, tzinfo=timezone.utc)
+
+        async def run():
+            # the second instance reads the user before the revocation is committed
+            stale = SimpleNamespace(**vars(self.user))
+            self.user.tokens_revoked_at = revoked_at
+            self.first.invalidate(None, self.user.id)
+            for _ in range(3):
+                await asyncio.sleep(0)
+            # and writes the state back after the invalidation
+            await self.second.set_many([stale])
+            return await self.first.get_many([self.user.id])
+
+        assert asyncio.run(run()) == {}
+        assert self.first.shared_stats.misses == 1
+
+    def test_store_failure(self):
+        self.store.get_many = mock.AsyncMock(side_effect=ConnectionError)
+        self.store.set_many = mock.AsyncMock(side_effect=ConnectionError)
+
+        async def run():
+            await self.first.set_many([self.user])
+            return await self.second.get_many([self.user.id])
+
+        assert asyncio.run(run()) == {}
+        assert self.first.get(self.user.id) is not None
+        assert self.first.shared_stats.errors == 1
+        assert self.second.shared_stats.errors == 1
+
+
+class TestAuthenticateUserStateCache(ServiceTestMixin):
+    def setup_method(self):
+        self.user = SimpleNamespace(
+            **{
+                **vars(ServiceTestMixin.user),
+                "is_active": True,
+                "tokens_revoked_at": None,
+            }
+        )
+        self.now = datetime(2020, 10, 10, tzinfo=timezone.utc)
+        self.payload = JWTPayload(
+            user=self.user.id, exp=self.now.timestamp(), created_at=self.now.timestamp()
+        )
+
+        self.repo = mock.Mock()
+        self.repo.get_by_id = mock.AsyncMock(return_value=self.user)
+        self.cache = UserStateCache(max_size=10, ttl=60)
+
+        self.context = container.authenticate.override(
+            Authenticate(
+                repo=self.repo,
+                user_state_cache=self.cache,
+                key_ring=mock.Mock(),
+                codec=PyJWTCodec(),
+                verified_token_cache=VerifiedTokenCache(max_size=0),
+                revocation_epochs=RevocationEpochs(
+                    repo=mock.Mock(),
+                    feed=RevocationFeed(max_queue_size=0),
+                    enabled=False,
+                    window=0,
+                    sync_interval=0,
+                ),
+            )
+        )
+
+    def _authenticate(self, mocker: MockerFixture):
+        jwt = mocker.patch("services.jwt.codec.jwt")
+        jwt.decode.return_value = self.payload.__dict__
+        return asyncio.run(container.authenticate()(mock.Mock(), "token"))
+
+    def test_cache_hit(self, mocker: MockerFixture):
+        with self.context:
+            first = self._authenticate(mocker)
+            second = self._authenticate(mocker)
+
+            assert first == second
+            assert first.id == self.user.id
+            self.repo.get_by_id.assert_awaited_once()
+            assert self.cache.stats.hits == 1
+
+    def test_revoked_after_invalidation(self, mocker: MockerFixture):
+        with self.context:
+            self._authenticate(mocker)
+            self.user.tokens_revoked_at = datetime(2020, 10, 11, tzinfo=timezone.utc)
+            self.cache.invalidate(None, self.user.id)
+
+            with pytest.raises(Custom401Exception):
+                self._authenticate(mocker)
+            assert self.repo.get_by_id.await_count == 2
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from unittest import mock
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+
+from config.di import get_di_test_container
+from services.authenticate import Authenticate
+from services.jwt import CreateJWTTokens, KeyRing, PyJWTCodec, TokenPurposeEnum
+from services.revocations import RevocationEpochs, RevocationFeed
+from services.verified_tokens import VerifiedTokenCache
+from services.user_state import UserStateCache
+from utils.test import ServiceTestMixin
+from utils.exceptions import Custom401Exception
+
+
+container = get_di_test_container()
+
+
+class TestAuthenticateVerifiedTokenCache(ServiceTestMixin):
+    def setup_method(self):
+        self.user = SimpleNamespace(
+            **{
+                **vars(ServiceTestMixin.user),
+                "is_active": True,
+                "tokens_revoked_at": None,
+            }
+        )
+        self.key_ring = KeyRing(
+            path="", algorithm="HS256", access_secret="a" * 64, refresh_secret="r" * 64
+        )
+        self.codec = mock.Mock(wraps=PyJWTCodec())
+        self.cache = VerifiedTokenCache(max_size=2)
+        self.repo = mock.Mock()
+        self.repo.get_by_id = mock.AsyncMock(return_value=self.user)
+
+        self.context = container.authenticate.override(
+            Authenticate(
+                repo=self.repo,
+                user_state_cache=UserStateCache(max_size=0, ttl=0),
+                key_ring=self.key_ring,
+                codec=self.codec,
+                verified_token_cache=self.cache,
+                revocation_epochs=RevocationEpochs(
+                    repo=mock.Mock(),
+                    feed=RevocationFeed(max_queue_size=0),
+                    enabled=False,
+                    window=0,
+                    sync_interval=0,
+                ),
+            )
+        )
+        self.tokens = CreateJWTTokens(key_ring=self.key_ring, codec=PyJWTCodec())(
+            self.user
+        )
+
+    def _authenticate(self, token: str, *, access: bool = True):
+        return asyncio.run(container.authenticate()(mock.Mock(), token, access=access))
+
+    def test_cache_hit(self):
+        with self.context:
+            assert self._authenticate(self.tokens.access).id == self.user.id
+            assert self._authenticate(self.tokens.access).id == self.user.id
+
+            self.codec.decode.assert_called_once()
+            assert self.repo.get_by_id.await_count == 2
+            assert self.cache.stats.hits == 1
+
+    def test_purpose_is_checked(self):
+        with self.context:
+            self._authenticate(self.tokens.access)
+
+            with pytest.raises(Custom401Exception):
+                self._authenticate(self.tokens.access, access=False)
+
+    def test_revocation_is_checked(self):
+        with self.context:
+            self._authenticate(self.tokens.access)
+            self.user.tokens_revoked_at = datetime.now(tz=timezone.utc)
+
+            with pytest.raises(Custom401Exception):
+                self._authenticate(self.tokens.access)
+            self.codec.decode.assert_called_once()
+
+    def test_reloaded_keys(self):
+        with self.context:
+            self._authenticate(self.tokens.access)
+            self.key_ring.reload()
+            self._authenticate(self.tokens.access)
+
+            assert self.codec.decode.call_count == 2
+
+    def test_expiration(self, mocker: MockerFixture):
+        monotonic = mocker.patch("utils.cache.time.monotonic")
+        monotonic.return_value = 0
+        key = self.key_ring.signing_key(TokenPurposeEnum.ACCESS)
+        payload = SimpleNamespace(user=1, exp=time.time() + 60, created_at=0)
+
+        self.cache.set("token", key, payload)
+        monotonic.return_value = 50
+        assert self.cache.get("token", key) is payload
+        monotonic.return_value = 61
+        assert self.cache.get("token", key) is None
+
+        payload.exp = time.time() - 1
+        self.cache.set("token", key, payload)
+        assert len(self.cache._cache) == 0
+
+    def test_lru_eviction(self):
+        key = self.key_ring.signing_key(TokenPurposeEnum.ACCESS)
+        payload = SimpleNamespace(user=1, exp=time.time() + 60, created_at=0)
+        for token in ("first", "second", "third"):
+            self.cache.set(token, key, payload)
+
+        assert self.cache.get("first", key) is None
+        assert self.cache.get("third", key) is payload
+        assert self.cache.stats.evictions == 1
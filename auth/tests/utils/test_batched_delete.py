@@ -0,0 +1,55 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest import mock
+
+import pytest
+
+from utils.batched_delete import PeriodicBatchedDelete
+
+
+class BatchedDelete(PeriodicBatchedDelete):
+    name = "test_batched_delete"
+    title = "Test delete"
+
+    def __init__(self, db, **kwargs) -> None:
+        super().__init__(db, **kwargs)
+        self.delete_batch = mock.AsyncMock()
+
+    async def _delete_batch(self, session, created_before: datetime) -> int:
+        return await self.delete_batch(session, created_before)
+
+
+class TestPeriodicBatchedDelete:
+    def setup_method(self):
+        self.session = mock.Mock()
+
+        @asynccontextmanager
+        async def session(**kwargs):
+            yield self.session
+
+        self.db = mock.Mock(session=session)
+
+    def _job(self, age: float) -> BatchedDelete:
+        return BatchedDelete(self.db, age=age, batch_size=2, interval=0)
+
+    def test_batches(self):
+        job = self._job(60)
+        job.delete_batch.side_effect = [2, 2, 0]
+
+        assert asyncio.run(job.delete()) == 4
+
+        assert job.delete_batch.await_count == 3
+        assert job.stats.as_dict()["batches"] == 3
+        assert job.stats.last_run_purged == 4
+
+    @pytest.mark.parametrize("age", [0, -1])
+    def test_not_positive_age(self, age: float):
+        job = self._job(age)
+
+        with pytest.raises(ValueError):
+            asyncio.run(job.delete())
+        asyncio.run(asyncio.wait_for(job.run(), timeout=1))
+
+        job.delete_batch.assert_not_awaited()
+        assert job.stats.runs == 0
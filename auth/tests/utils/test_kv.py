@@ -0,0 +1,55 @@
+import asyncio
+
+from pytest_mock import MockerFixture
+
+from utils.kv import InMemoryKeyValueStore
+
+
+class TestInMemoryKeyValueStore:
+    def setup_method(self):
+        self.store = InMemoryKeyValueStore()
+
+    def test_get_set_delete(self):
+        async def run():
+            await self.store.set_many({"a": b"1", "b": b"2"}, 10)
+            await self.store.delete_many(["b"])
+            return await self.store.get_many(["a", "b", "c"])
+
+        assert asyncio.run(run()) == [b"1", None, None]
+
+    def test_expiration(self, mocker: MockerFixture):
+        monotonic = mocker.patch("utils.kv.time.monotonic", return_value=100)
+        asyncio.run(self.store.set_many({"a": b"1"}, 10))
+
+        monotonic.return_value = 109
+        assert asyncio.run(self.store.get_many(["a"])) == [b"1"]
+        monotonic.return_value = 110
+        assert asyncio.run(self.store.get_many(["a"])) == [None]
+        assert len(self.store) == 0
+
+    def test_set_only_absent(self, mocker: MockerFixture):
+        monotonic = mocker.patch("utils.kv.time.monotonic", return_value=100)
+
+        async def run():
+            await self.store.set_many({"a": b"1"}, 10)
+            await self.store.set_many({"a": b"2", "b": b"2"}, 10, only_absent=True)
+            return await self.store.get_many(["a", "b"])
+
+        assert asyncio.run(run()) == [b"1", b"2"]
+        monotonic.return_value = 110
+        asyncio.run(self.store.set_many({"a": b"3"}, 10, only_absent=True))
+        assert asyncio.run(self.store.get_many(["a"])) == [b"3"]
+
+    def test_publish_subscribe(self):
+        async def run():
+            messages = self.store.subscribe("channel")
+            received = asyncio.create_task(anext(messages))
+            await asyncio.sleep(0)
+            await self.store.publish("channel", b"message")
+            await self.store.publish("other", b"other")
+            message = await received
+            await messages.aclose()
+            return message
+
+        assert asyncio.run(run()) == b"message"
+        assert not self.store._subscribers["channel"]
@@ -0,0 +1,326 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Dict, List, Set
+from unittest import mock
+
+from pytest_mock import MockerFixture
+
+from config.mail import (
+    SEND_EMAIL_TASK,
+    BatchedEmailEntry,
+    EmailBatcher,
+    SendEmail,
+    SendEmailEntry,
+)
+from config.outbox import (
+    Outbox,
+    OutboxEntry,
+    OutboxMessageEntry,
+    OutboxRelay,
+    OutboxTaskEntry,
+)
+
+
+# the task of the email worker, that consumes the batches
+SEND_EMAILS_TASK = "mail.send_emails"
+
+
+class InMemoryBroker:
+    """
+    Stand-in for the celery app, keeps the published tasks,
+    the tasks in `failing` are not published.
+    """
+
+    def __init__(self) -> None:
+        self.tasks: List[OutboxTaskEntry] = []
+        self.failing: Set[str] = set()
+
+    def send_task(
+        self,
+        name: str,
+        args: List | None = None,
+        kwargs: Dict | None = None,
+        eta: datetime | None = None,
+        task_id: str | None = None,
+    ) -> None:
+        if name in self.failing:
+            raise ConnectionError(f"{name} can not be published")
+        self.tasks.append(
+            OutboxTaskEntry(
+                task=name,
+                messages=[],
+                args=args or [],
+                kwargs=kwargs or {},
+                eta=eta,
+                task_id=task_id,
+            )
+        )
+
+
+class TestOutbox:
+    def test_send_email(self):
+        repo = mock.AsyncMock()
+        session = mock.Mock()
+        entry = SendEmailEntry(emails=["testuser@email.com"], subject="subject")
+
+        asyncio.run(SendEmail(outbox=Outbox(repo))(session, entry))
+
+        outbox_entry = repo.add.await_args.args[1]
+        assert repo.add.await_args.args[0] is session
+        assert outbox_entry.task == "config.celery.send_email"
+        assert outbox_entry.kwargs == {
+            "entry_dict": {
+                "emails": ["testuser@email.com"],
+                "subject": "subject",
+                "message": "",
+            }
+        }
+        assert outbox_entry.dedup_key
+
+    def test_dedup_keys_are_unique(self):
+        assert OutboxEntry(task="task").dedup_key != OutboxEntry(task="task").dedup_key
+
+
+class TestOutboxRelay:
+    def setup_method(self):
+        self.messages = [
+            OutboxMessageEntry(
+                id=id,
+                task="task",
+                args=[id],
+                dedup_key=f"key{id}",
+                created_at=datetime.now(tz=timezone.utc),
+            )
+            for id in (1, 2, 3)
+        ]
+        self.session = mock.Mock()
+        self.repo = mock.AsyncMock()
+        self.repo.lock_due.return_value = self.messages
+        self.repo.get_lag.return_value = 1.5
+        self.repo.retry_later.return_value = []
+        self.celery_app = mock.Mock()
+
+        @asynccontextmanager
+        async def session(**kwargs):
+            yield self.session
+
+        self.db = mock.Mock(session=session)
+        self.relay = OutboxRelay(
+            self.db, self.repo, self.celery_app, batch_size=3, backoff=2
+        )
+
+    def test_relay(self):
+        assert asyncio.run(self.relay.relay()) == 3
+
+        self.repo.lock_due.assert_awaited_once_with(self.session, 3)
+        assert self.celery_app.send_task.call_args_list == [
+            mock.call("task", args=[id], kwargs={}, eta=None, task_id=f"key{id}")
+            for id in (1, 2, 3)
+        ]
+        self.repo.delete.assert_awaited_once_with(self.session, [1, 2, 3])
+        self.repo.retry_later.assert_not_awaited()
+        stats = self.relay.stats.as_dict()
+        assert stats["published"] == 3
+        assert stats["batches"] == 1
+        assert stats["lag"] == 1.5
+        assert stats["publish_lag_max"] >= 0
+
+    def test_partial_failure(self):
+        self.celery_app.send_task.side_effect = [None, ConnectionError, None]
+
+        asyncio.run(self.relay.relay())
+
+        self.repo.delete.assert_awaited_once_with(self.session, [1, 3])
+        self.repo.retry_later.assert_awaited_once_with(
+            self.session, [2], backoff=2, max_backoff=300, max_attempts=50
+        )
+        assert self.relay.stats.published == 2
+        assert self.relay.stats.failed == 1
+        assert self.relay.stats.dead == 0
+
+    def test_dead(self):
+        self.celery_app.send_task.side_effect = ConnectionError
+        self.repo.retry_later.return_value = [1]
+
+        asyncio.run(self.relay.relay())
+
+        assert self.relay.stats.failed == 3
+        assert self.relay.stats.dead == 1
+
+    def test_lag_is_sampled(self, mocker: MockerFixture):
+        monotonic = mocker.patch("config.outbox.time.monotonic", return_value=100)
+        self.relay.lag_interval = 10
+
+        asyncio.run(self.relay.relay())
+        monotonic.return_value = 109
+        asyncio.run(self.relay.relay())
+        self.repo.get_lag.assert_awaited_once_with(self.session)
+
+        monotonic.return_value = 110
+        asyncio.run(self.relay.relay())
+        assert self.repo.get_lag.await_count == 2
+
+    def test_nothing_due(self):
+        self.repo.lock_due.return_value = []
+
+        assert asyncio.run(self.relay.relay()) == 0
+
+        self.celery_app.send_task.assert_not_called()
+        self.repo.delete.assert_not_awaited()
+        assert self.relay.stats.batches == 0
+
+    def test_run_survives_errors(self):
+        self.repo.lock_due.side_effect = [
+            ValueError,
+            self.messages,
+            asyncio.CancelledError,
+        ]
+        self.relay.interval = 0
+
+        async def run():
+            try:
+                await self.relay.run()
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(run())
+
+        assert self.relay.stats.published == 3
+
+
+def email_message(id: int, subject: str = "subject", **kwargs) -> OutboxMessageEntry:
+    entry = SendEmailEntry(
+        emails=[f"testuser{id}@email.com"], subject=subject, message=f"code {id}"
+    )
+    return OutboxMessageEntry(
+        id=id,
+        task=SEND_EMAIL_TASK,
+        kwargs={"entry_dict": asdict(entry)},
+        dedup_key=f"key{id}",
+        **kwargs,
+    )
+
+
+class TestEmailBatcher:
+    def setup_method(self):
+        self.batcher = EmailBatcher(task=SEND_EMAILS_TASK, max_size=2)
+
+    def test_combine(self):
+        messages = [
+            *(email_message(id) for id in (1, 2, 3)),
+            email_message(4, subject="other"),
+            email_message(5, subject="other"),
+            OutboxMessageEntry(id=6, task="task"),
+            email_message(7, eta=datetime.now(tz=timezone.utc)),
+        ]
+
+        tasks, rest = self.batcher.combine(messages)
+
+        assert [[message.id for message in task.messages] for task in tasks] == [
+            [1, 2],
+            [4, 5],
+        ]
+        assert [message.id for message in rest] == [6, 7, 3]
+        assert tasks[0].task == SEND_EMAILS_TASK
+        assert tasks[0].kwargs == {
+            "entries": [
+                {
+                    "emails": [f"testuser{id}@email.com"],
+                    "subject": "subject",
+                    "message": f"code {id}",
+                    "dedup_key": f"key{id}",
+                }
+                for id in (1, 2)
+            ]
+        }
+        assert tasks[0].task_id != tasks[1].task_id
+        assert tasks[0].task_id == self.batcher.combine(messages)[0][0].task_id
+
+        stats = self.batcher.stats.as_dict()
+        assert stats == {"batches": 4, "emails": 8, "max_batch_size": 2}
+        assert self.batcher.stats.max_batch_size == 0
+
+
+class TestOutboxRelayEmailBatches:
+    def setup_method(self):
+        self.session = mock.Mock()
+        self.repo = mock.AsyncMock()
+        self.repo.get_lag.return_value = 0
+        self.repo.retry_later.return_value = []
+        self.broker = InMemoryBroker()
+
+        @asynccontextmanager
+        async def session(**kwargs):
+            yield self.session
+
+        self.relay = OutboxRelay(
+            mock.Mock(session=session),
+            self.repo,
+            self.broker,
+            combiners=[EmailBatcher(task=SEND_EMAILS_TASK, max_size=2)],
+        )
+
+    def test_one_task_per_batch(self):
+        self.repo.lock_due.return_value = [email_message(id) for id in range(5)]
+
+        asyncio.run(self.relay.relay())
+
+        assert [task.task for task in self.broker.tasks] == [
+            SEND_EMAILS_TASK,
+            SEND_EMAILS_TASK,
+            SEND_EMAIL_TASK,
+        ]
+        self.repo.delete.assert_awaited_once_with(self.session, [0, 1, 2, 3, 4])
+        assert self.relay.stats.tasks == 3
+        assert self.relay.stats.published == 5
+
+    def test_worker_contract(self):
+        entries = [
+            SendEmailEntry(
+                emails=[f"testuser{id}@email.com", f"copy{id}@email.com"],
+                subject="subject",
+                message=f"code {id}",
+            )
+            for id in (1, 2)
+        ]
+        outbox_repo = mock.AsyncMock()
+        for entry in entries:
+            asyncio.run(SendEmail(outbox=Outbox(outbox_repo))(self.session, entry))
+        outbox_entries = [call.args[1] for call in outbox_repo.add.await_args_list]
+        self.repo.lock_due.return_value = [
+            OutboxMessageEntry(id=id, **asdict(outbox_entry))
+            for id, outbox_entry in enumerate(outbox_entries)
+        ]
+
+        asyncio.run(self.relay.relay())
+
+        (task,) = self.broker.tasks
+        assert task.task == SEND_EMAILS_TASK
+        assert task.args == []
+        # every entry is what the worker builds a single email from
+        assert [BatchedEmailEntry(**entry) for entry in task.kwargs["entries"]] == [
+            BatchedEmailEntry(**asdict(entry), dedup_key=outbox_entry.dedup_key)
+            for entry, outbox_entry in zip(entries, outbox_entries)
+        ]
+
+    def test_partial_failure(self):
+        self.repo.lock_due.return_value = [
+            email_message(1),
+            email_message(2),
+            OutboxMessageEntry(id=3, task="task"),
+        ]
+        self.broker.failing.add(SEND_EMAILS_TASK)
+
+        asyncio.run(self.relay.relay())
+
+        assert [task.task for task in self.broker.tasks] == ["task"]
+        self.repo.delete.assert_awaited_once_with(self.session, [3])
+        self.repo.retry_later.assert_awaited_once_with(
+            self.session, [1, 2], backoff=1, max_backoff=300, max_attempts=50
+        )
+        stats = self.relay.stats.as_dict()
+        assert stats["published"] == 1
+        assert stats["failed"] == 2
+        assert stats["throughput"] > 0
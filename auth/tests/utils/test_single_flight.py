@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    def setup_method(self):
+        self.single_flight = SingleFlight()
+        self.calls = 0
+
+    async def _func(self, value, *, delay: float = 0.01):
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return value
+
+    def test_concurrent_calls_are_collapsed(self):
+        async def run():
+            return await asyncio.gather(
+                *(self.single_flight(1, lambda: self._func("one")) for _ in range(5)),
+                self.single_flight(2, lambda: self._func("two")),
+            )
+
+        assert asyncio.run(run()) == ["one"] * 5 + ["two"]
+        assert self.calls == 2
+        assert self.single_flight.stats.calls == 2
+        assert self.single_flight.stats.collapsed == 4
+        assert self.single_flight.stats.in_flight == 0
+
+    def test_results_are_not_kept(self):
+        async def run():
+            await self.single_flight(1, lambda: self._func("one"))
+            await self.single_flight(1, lambda: self._func("one"))
+
+        asyncio.run(run())
+
+        assert self.calls == 2
+        assert self.single_flight.stats.collapsed == 0
+
+    def test_exception_is_shared(self):
+        async def func():
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError
+
+        async def run():
+            return await asyncio.gather(
+                *(self.single_flight(1, func) for _ in range(3)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+
+        assert [type(result) for result in results] == [ValueError] * 3
+        assert self.calls == 1
+
+    def test_cancelled_first_call(self):
+        async def run():
+            first = asyncio.create_task(self.single_flight(1, lambda: self._func(1)))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(self.single_flight(1, lambda: self._func(2)))
+            await asyncio.sleep(0)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(run()) == 2
+        assert self.calls == 2
+        assert len(self.single_flight) == 0
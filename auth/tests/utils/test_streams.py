@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from utils.streams import map_unordered
+
+
+async def _items(values):
+    for value in values:
+        yield value
+
+
+class TestMapUnordered:
+    def _collect(self, values, func, max_in_flight):
+        async def collect():
+            return [
+                result
+                async for result in map_unordered(_items(values), func, max_in_flight)
+            ]
+
+        return asyncio.run(collect())
+
+    def test_results_in_completion_order(self):
+        async def func(delay):
+            await asyncio.sleep(delay / 100)
+            return delay
+
+        assert self._collect([3, 1, 2], func, 3) == [1, 2, 3]
+
+    def test_in_flight_bound(self):
+        running, peak = 0, 0
+
+        async def func(value):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            return value
+
+        assert sorted(self._collect(range(20), func, 4)) == list(range(20))
+        assert peak == 4
+
+    def test_empty(self):
+        async def func(value):
+            return value
+
+        assert self._collect([], func, 2) == []
+
+    def test_error_cancels_pending(self):
+        cancelled = []
+
+        async def func(value):
+            if value == 0:
+                raise ValueError
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(value)
+                raise
+
+        with pytest.raises(ValueError):
+            self._collect([1, 2, 0], func, 3)
+        assert sorted(cancelled) == [1, 2]
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from utils.metrics import registry
+from utils.time import get_current_time_with_delta
+
+
+logger = logging.getLogger("auth")
+
+
+@dataclass
+class BatchedDeleteStats:
+    runs: int = 0
+    batches: int = 0
+    purged: int = 0
+    last_run_purged: int = 0
+    last_run_duration: float = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+class PeriodicBatchedDelete(ABC):
+    """
+    Deletes the rows older than `age` seconds every `interval` seconds.
+
+    Rows are deleted in batches of `batch_size`, each in its own transaction,
+    so a large backlog does not hold locks on many rows at once.
+    A job with `age`, that is not positive, would delete all the rows,
+    so it is not run.
+    """
+
+    # the name of the metrics and of the sessions
+    name: str
+    # the job in the logs
+    title: str
+
+    def __init__(self, db, *, age: float, batch_size: int, interval: float) -> None:
+        self.db = db
+        self.age = age
+        self.batch_size = batch_size
+        self.interval = interval
+        self.stats = BatchedDeleteStats()
+
+        registry.register(self.name, self.stats.as_dict)
+
+    async def run(self) -> None:
+        if self.age <= 0:
+            logger.error(
+                f"{self.title} is not run - the age of the rows must be positive",
+                extra={"age": self.age},
+            )
+            return
+
+        while True:
+            try:
+                await self.delete()
+            except Exception as e:
+                logger.error(f"{self.title} failed - {str(e)}", exc_info=e)
+            await asyncio.sleep(self.interval)
+
+    async def delete(self) -> int:
+        """
+        Deletes all the expired rows, returns their count.
+        """
+        if self.age <= 0:
+            raise ValueError(f"{self.title} age must be positive, got {self.age}")
+
+        started_at = time.perf_counter()
+        created_before = get_current_time_with_delta(seconds=-self.age)
+        purged = 0
+        while True:
+            async with self.db.session(name=self.name) as session:
+                deleted = await self._delete_batch(session, created_before)
+            self.stats.batches += 1
+            purged += deleted
+            # a batch, that is not full, means, that nothing has expired anymore
+            if deleted < self.batch_size:
+                break
+
+        self.stats.runs += 1
+        self.stats.purged += purged
+        self.stats.last_run_purged = purged
+        self.stats.last_run_duration = time.perf_counter() - started_at
+        if purged:
+            logger.info(f"{self.title} deleted rows.", extra={"purged": purged})
+        return purged
+
+    @abstractmethod
+    async def _delete_batch(
+        self, session: AsyncSession, created_before: datetime
+    ) -> int:
+        """
+        Deletes at most `batch_size` rows created before `created_before`,
+        returns their count.
+        """
@@ -0,0 +1,87 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Generic, Hashable, Tuple, TypeVar
+
+from utils.metrics import registry
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    size: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {**asdict(self), "hit_ratio": self.hit_ratio}
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Bounded in-process cache with LRU eviction and per-entry expiration.
+
+    Not thread-safe, it is meant to be used from the event loop only.
+    Cache with `max_size` equal to 0 is disabled and never stores anything.
+    """
+
+    def __init__(self, max_size: int, ttl: float, *, name: str | None = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[K, Tuple[float, V]] = OrderedDict()
+        self._stats = CacheStats()
+        if name:
+            registry.register(name, lambda: self.stats.as_dict())
+
+    @property
+    def stats(self) -> CacheStats:
+        self._stats.size = len(self._data)
+        return self._stats
+
+    def get(self, key: K) -> V | None:
+        item = self._data.get(key)
+        if item is None:
+            self._stats.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self._stats.expirations += 1
+            self._stats.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self._stats.hits += 1
+        return value
+
+    def set(self, key: K, value: V, *, ttl: float | None = None) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self._stats.evictions += 1
+
+    def delete(self, key: K) -> None:
+        if self._data.pop(key, None) is not None:
+            self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
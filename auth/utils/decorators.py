@@ -1,6 +1,7 @@
 import logging
 from typing import ClassVar, Dict, Protocol, Any
 
+from dependency_injector.wiring import Provide, inject
 from sqlalchemy import Row
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -95,12 +96,30 @@ def row_to_model(wrapper_dataclass: Dataclass | None = None):
     return outer
 
 
-def inject_session(func):
-    async def wrapper(*args, **kwargs):
-        from config.di import Container
+def inject_session(func=None, *, read_only: bool = False, replica: bool = False):
+    """
+    Passes the session of the request to the handler as `session`.
 
-        async with Container.db().session() as session:
-            kwargs["session"] = session
-            return await func(*args, **kwargs)
+    Handlers, that only read, are declared with `read_only=True`,
+    their sessions are not committed.
+    Handlers, that tolerate the replication lag, are declared with `replica=True`,
+    their sessions read from the replicas.
+    """
 
-    return wrapper
+    def outer(func):
+        async def wrapper(*args, **kwargs):
+            async with _get_db().session(
+                read_only=read_only, replica=replica, name=func.__name__
+            ) as session:
+                kwargs["session"] = session
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return outer if func is None else outer(func)
+
+
+@inject
+def _get_db(db=Provide["db"]):
+    # the database of the wired container, the one the background workers use
+    return db
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Sequence, Set, Tuple
+
+import redis.asyncio as redis
+
+
+class IKeyValueStore(ABC):
+    """
+    Key-value store shared by the instances of the service.
+
+    Values are bytes with expiration time, messages of `publish`
+    are delivered to the current `subscribe` iterators of all instances.
+    `set_many` with `only_absent` keeps the values of the keys, that are set.
+    """
+
+    @abstractmethod
+    async def get_many(self, keys: Sequence[str]) -> List[bytes | None]: ...
+
+    @abstractmethod
+    async def set_many(
+        self, items: Dict[str, bytes], ttl: float, *, only_absent: bool = False
+    ) -> None: ...
+
+    @abstractmethod
+    async def delete_many(self, keys: Sequence[str]) -> None: ...
+
+    @abstractmethod
+    async def publish(self, channel: str, message: bytes) -> None: ...
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> AsyncIterator[bytes]: ...
+
+
+class RedisKeyValueStore(IKeyValueStore):
+    """
+    Every method is a single round trip, writes of many keys are pipelined.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.client = redis.Redis.from_url(url)
+
+    async def get_many(self, keys: Sequence[str]) -> List[bytes | None]:
+        if not keys:
+            return []
+        return await self.client.mget(keys)
+
+    async def set_many(
+        self, items: Dict[str, bytes], ttl: float, *, only_absent: bool = False
+    ) -> None:
+        if not items:
+            return
+        async with self.client.pipeline(transaction=False) as pipeline:
+            for key, value in items.items():
+                pipeline.set(key, value, px=int(ttl * 1000), nx=only_absent)
+            await pipeline.execute()
+
+    async def delete_many(self, keys: Sequence[str]) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self.client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        async with self.client.pubsub(ignore_subscribe_messages=True) as pubsub:
+            await pubsub.subscribe(channel)
+            async for message in pubsub.listen():
+                yield message["data"]
+
+
+class InMemoryKeyValueStore(IKeyValueStore):
+    """
+    Stand-in for tests and a single instance setup.
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue[bytes]]] = {}
+
+    async def get_many(self, keys: Sequence[str]) -> List[bytes | None]:
+        now = time.monotonic()
+        values = []
+        for key in keys:
+            item = self._data.get(key)
+            if item is not None and item[0] <= now:
+                del self._data[key]
+                item = None
+            values.append(None if item is None else item[1])
+        return values
+
+    async def set_many(
+        self, items: Dict[str, bytes], ttl: float, *, only_absent: bool = False
+    ) -> None:
+        now = time.monotonic()
+        for key, value in items.items():
+            item = self._data.get(key)
+            if only_absent and item is not None and item[0] > now:
+                continue
+            self._data[key] = (now + ttl, value)
+
+    async def delete_many(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].discard(queue)
+
+    def __len__(self) -> int:
+        return len(self._data)
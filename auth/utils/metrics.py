@@ -0,0 +1,36 @@
+from typing import Callable, Dict
+
+
+MetricsSource = Callable[[], Dict[str, float]]
+
+
+class MetricsRegistry:
+    """
+    In-process registry of components' counters.
+
+    Components register a callable, that returns their current counters,
+    and the snapshot of all of them is periodically written to the `metrics` logger.
+    """
+
+    def __init__(self) -> None:
+        self._sources: Dict[str, MetricsSource] = {}
+
+    def register(
+        self, name: str, source: MetricsSource, *, unique: bool = False
+    ) -> None:
+        """
+        A source replaces the previous one of the same name,
+        unless it is `unique`, then the name must not be registered yet.
+        """
+        if unique and name in self._sources:
+            raise ValueError(f"Metrics source {name} is already registered")
+        self._sources[name] = source
+
+    def unregister(self, name: str) -> None:
+        self._sources.pop(name, None)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {name: source() for name, source in self._sources.items()}
+
+
+registry = MetricsRegistry()
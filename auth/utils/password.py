@@ -0,0 +1,12 @@
+import bcrypt
+
+
+ENCODING = "utf-8"
+
+
+def bcrypt_hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode(ENCODING), bcrypt.gensalt()).decode(ENCODING)
+
+
+def bcrypt_check(plain_pwd: str, hashed_pwd: str) -> bool:
+    return bcrypt.checkpw(plain_pwd.encode(ENCODING), hashed_pwd.encode(ENCODING))
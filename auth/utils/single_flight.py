@@ -0,0 +1,79 @@
+import asyncio
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+from utils.metrics import registry
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    collapsed: int = 0
+    in_flight: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+class SingleFlight(Generic[K, V]):
+    """
+    Coalescing of concurrent calls with the same key.
+
+    The first call runs the function, the calls made before it is finished
+    wait for its result or exception instead of running their own ones.
+    Nothing is kept after that, the next call runs the function again.
+    When the first call is cancelled, the waiting calls run the function themselves.
+
+    Not thread-safe, it is meant to be used from the event loop only.
+    """
+
+    def __init__(self, *, name: str | None = None) -> None:
+        self._calls: Dict[K, asyncio.Future[V]] = {}
+        self._stats = SingleFlightStats()
+        if name:
+            registry.register(name, lambda: self.stats.as_dict())
+
+    @property
+    def stats(self) -> SingleFlightStats:
+        self._stats.in_flight = len(self._calls)
+        return self._stats
+
+    async def __call__(self, key: K, func: Callable[[], Awaitable[V]]) -> V:
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                return await self._run(key, func)
+
+            self._stats.collapsed += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+    async def _run(self, key: K, func: Callable[[], Awaitable[V]]) -> V:
+        self._stats.calls += 1
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # retrieved here, so it is not reported, when nobody was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,49 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Set, TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def map_unordered(
+    items: AsyncIterable[T],
+    func: Callable[[T], Awaitable[R]],
+    max_in_flight: int,
+) -> AsyncIterator[R]:
+    """
+    Apply `func` to the `items` concurrently and yield results as they complete.
+
+    No more than `max_in_flight` calls run at the same time,
+    the next item is not read from `items` until one of them is done.
+    An exception raised by `func` stops the iteration and cancels the rest of the calls.
+    """
+    iterator = aiter(items)
+    pending: Set[asyncio.Future] = set()
+    next_item: asyncio.Future | None = None
+    exhausted = False
+    try:
+        while True:
+            if not exhausted and next_item is None and len(pending) < max_in_flight:
+                next_item = asyncio.ensure_future(anext(iterator))
+
+            waiting = pending if next_item is None else pending | {next_item}
+            if not waiting:
+                return
+
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future is next_item:
+                    next_item = None
+                    try:
+                        item = future.result()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        continue
+                    pending.add(asyncio.ensure_future(func(item)))
+                else:
+                    pending.discard(future)
+                    yield future.result()
+    finally:
+        for future in pending if next_item is None else pending | {next_item}:
+            future.cancel()
@@ -1,7 +1,10 @@
-from typing import Dict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
 from types import SimpleNamespace
 
 import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
 
 
 class SchemaTestMixin:
@@ -32,3 +35,19 @@ class ServiceTestMixin:
 
 class RepoTestMixin:
     repo = None
+
+    @contextmanager
+    def assertStatementCount(self, engine: AsyncEngine, count: int) -> Iterator[None]:
+        statements: List[str] = []
+
+        def before_cursor_execute(conn, cursor, statement, *args) -> None:
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield
+        finally:
+            event.remove(
+                engine.sync_engine, "before_cursor_execute", before_cursor_execute
+            )
+        assert len(statements) == count, statements